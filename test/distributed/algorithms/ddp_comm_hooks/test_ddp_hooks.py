@@ -1,5 +1,7 @@
 
+import json
 import os
+import tempfile
 
 import numpy as np
 import torch
@@ -9,9 +11,14 @@ from torch.distributed.algorithms.ddp_comm_hooks import (
     DDPCommHookType,
     register_ddp_comm_hook,
 )
+from torch.distributed.algorithms.ddp_comm_hooks.comm_tracer import DDPCommTracer
+from torch.distributed.algorithms.ddp_comm_hooks import hierarchical_hook as hierarchical
+from torch.distributed.algorithms.ddp_comm_hooks import powerSGD_hook as powerSGD
+from torch.distributed.algorithms.ddp_comm_hooks import topk_hook as topk
 from torch.nn.parallel import DistributedDataParallel
 from torch.testing._internal.common_distributed import (
     MultiProcessTestCase,
+    requires_gloo,
     requires_nccl,
     skip_if_lt_x_gpu,
     skip_if_rocm,
@@ -30,6 +37,18 @@ def gpus_for_rank(world_size):
     return gpus_for_rank
 
 
+def run_and_get_grads(model, rank):
+    torch.manual_seed(2020)
+    input = torch.randn(40, 20)
+    # Run forward
+    output = model(input, rank)
+
+    # Run backward
+    output.mean().backward()
+
+    return [p.grad.data.cpu().numpy() for p in model.parameters()]
+
+
 class Task(nn.Module):
     def __init__(self):
         super(Task, self).__init__()
@@ -49,6 +68,28 @@ class TestDdpCommHook(nn.Module):
         return self.t0(x ** (1 + rank))
 
 
+class LowRankGradModel(nn.Module):
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.fc = nn.Linear(20, 40)
+
+    def forward(self, x, rank):
+        # With a single input, the gradient of the weight is of rank 1 on each
+        # rank, and of rank 2 once averaged across 2 ranks.
+        return self.fc(x[:1] ** (1 + rank))
+
+
+class OddSizedModel(nn.Module):
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.fc = nn.Linear(20, 3)
+
+    def forward(self, x, rank):
+        return self.fc(x ** (1 + rank))
+
+
 class DistributedDataParallelCommHookTest(MultiProcessTestCase):
     def setUp(self):
         super(DistributedDataParallelCommHookTest, self).setUp()
@@ -83,18 +124,21 @@ class DistributedDataParallelCommHookTest(MultiProcessTestCase):
                 comm_hook_type=hook_type, model=gpu_model, state=process_group
             )
 
-        return self._run_and_get_grads(gpu_model)
+        return run_and_get_grads(gpu_model, self.rank)
 
-    def _run_and_get_grads(self, model):
-        torch.manual_seed(2020)
-        input = torch.randn(40, 20)
-        # Run forward
-        output = model(input, self.rank)
+    def _get_cpu_grads(
+        self, model, process_group, hook_type=None, state=None, hook=None
+    ):
+        cpu_model = DistributedDataParallel(model, process_group=process_group)
 
-        # Run backward
-        output.mean().backward()
+        if hook_type is not None:
+            register_ddp_comm_hook(
+                comm_hook_type=hook_type, model=cpu_model, state=process_group
+            )
+        elif hook is not None:
+            cpu_model._register_comm_hook(state, hook)
 
-        return [p.grad.data.cpu().numpy() for p in model.parameters()]
+        return run_and_get_grads(cpu_model, self.rank)
 
     @requires_nccl()
     @skip_if_lt_x_gpu(2)
@@ -171,6 +215,194 @@ class DistributedDataParallelCommHookTest(MultiProcessTestCase):
         np.testing.assert_allclose(hook_grads, reference_grads, rtol=1e-5, atol=1e-4)
 
 
+    @requires_gloo()
+    def test_ddp_comm_hook_powerSGD_hook(self):
+        """
+        This unit test verifies the ``PowerSGD`` hook registered case gives
+        the same result as no hook registered case when the averaged gradients
+        are of a rank no higher than the rank of the approximation.
+        """
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+
+        # No hook registered case, get the reference grads.
+        reference_grads = self._get_cpu_grads(LowRankGradModel(), process_group)
+        # Register hook case, get the hook grads.
+        hook_grads = self._get_cpu_grads(
+            LowRankGradModel(), process_group, DDPCommHookType.POWER_SGD_RANK2
+        )
+
+        np.testing.assert_allclose(hook_grads, reference_grads, rtol=1e-4, atol=1e-6)
+
+    @requires_gloo()
+    def test_ddp_comm_hook_powerSGD_hook_error_feedback(self):
+        """
+        This unit test verifies the rank-1 ``PowerSGD`` hook only compresses the
+        weight, and keeps the error of its approximation for the next iteration.
+        """
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+        state = powerSGD.PowerSGDState(process_group, matrix_approximation_rank=1)
+
+        model = LowRankGradModel()
+        hook_grads = self._get_cpu_grads(
+            model, process_group, state=state, hook=powerSGD.powerSGD_hook
+        )
+        weight_index = [n for n, _ in model.named_parameters()].index("fc.weight")
+
+        self.assertEqual(set(state.error_dict.keys()), {weight_index})
+        self.assertEqual(set(state.q_memory_dict.keys()), {weight_index})
+        self.assertEqual(state.error_dict[weight_index].shape, (40, 20))
+        self.assertEqual(state.q_memory_dict[weight_index].shape, (20, 1))
+        # The approximation of the averaged weight gradient is of rank 1.
+        self.assertEqual(np.linalg.matrix_rank(hook_grads[0], tol=1e-6), 1)
+
+    @requires_gloo()
+    def test_ddp_comm_hook_topk_hook(self):
+        """
+        This unit test verifies the ``top-k`` hook registered case gives the same
+        result as no hook registered case when all the elements are sent, and
+        keeps the elements that are not sent otherwise.
+        """
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+
+        # No hook registered case, get the reference grads.
+        reference_grads = self._get_cpu_grads(TestDdpCommHook(), process_group)
+        # Sending all the elements is the same as allreduce.
+        state = topk.TopKState(process_group, compress_ratio=1.0)
+        hook_grads = self._get_cpu_grads(
+            TestDdpCommHook(), process_group, state=state, hook=topk.topk_hook
+        )
+        np.testing.assert_allclose(hook_grads, reference_grads, rtol=1e-5, atol=0)
+        self.assertEqual(torch.count_nonzero(state.residual_dict[0]).item(), 0)
+
+        state = topk.TopKState(process_group, compress_ratio=0.1)
+        hook_grads = self._get_cpu_grads(
+            TestDdpCommHook(), process_group, state=state, hook=topk.topk_hook
+        )
+        # Each rank sends 80 of the 800 elements of the gradient of Task.p.
+        self.assertLessEqual(np.count_nonzero(hook_grads[0]), 80 * self.world_size)
+        self.assertEqual(state.residual_dict[0].shape, (800,))
+        self.assertEqual(torch.count_nonzero(state.residual_dict[0]).item(), 720)
+
+    @requires_gloo()
+    def test_ddp_comm_tracer(self):
+        """
+        This unit test verifies ``DDPCommTracer`` records the communication of
+        each bucket without changing the gradients.
+        """
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupGloo(store, self.rank, self.world_size)
+
+        reference_grads = self._get_cpu_grads(OddSizedModel(), process_group)
+        cpu_model = DistributedDataParallel(OddSizedModel(), process_group=process_group)
+        tracer = DDPCommTracer(cpu_model)
+        for _ in range(2):
+            cpu_model.zero_grad()
+            hook_grads = run_and_get_grads(cpu_model, self.rank)
+        np.testing.assert_allclose(hook_grads, reference_grads, rtol=1e-5, atol=0)
+
+        for event in tracer.bucket_events:
+            self.assertLessEqual(event.ready_time, event.launch_time)
+            self.assertLessEqual(event.launch_time, event.completion_time)
+        stats = tracer.iteration_stats()
+        self.assertEqual([s.iteration for s in stats], [0, 1])
+        self.assertEqual(sum(s.num_buckets for s in stats), len(tracer.bucket_events))
+        for s in stats:
+            # 20 * 3 weights and 3 biases of 4 bytes
+            self.assertEqual(s.num_bytes, 63 * 4)
+            self.assertGreaterEqual(s.exposed_comm_time, 0)
+
+        with tempfile.NamedTemporaryFile(mode="w+t", suffix=".json") as f:
+            tracer.export_chrome_trace(f.name)
+            trace = json.load(f)
+        names = [event["name"] for event in trace]
+        self.assertEqual(len(names), len(tracer.bucket_events) * 2 + 2)
+        self.assertIn("iteration_1 exposed comm", names)
+
+    @requires_nccl()
+    @skip_if_lt_x_gpu(2)
+    @skip_if_rocm
+    def test_ddp_comm_tracer_nccl(self):
+        """
+        This unit test verifies ``DDPCommTracer`` times the communication of
+        each bucket with CUDA events, resolved when the results are read.
+        """
+        store = c10d.FileStore(self.file_name, self.world_size)
+        process_group = c10d.ProcessGroupNCCL(store, self.rank, self.world_size)
+
+        reference_grads = self._get_grads(process_group, None)
+        device_id = gpus_for_rank(self.world_size)[self.rank][0]
+        gpu_model = DistributedDataParallel(
+            TestDdpCommHook().to(device_id),
+            device_ids=[device_id],
+            process_group=process_group,
+        )
+        tracer = DDPCommTracer(gpu_model)
+        hook_grads = run_and_get_grads(gpu_model, self.rank)
+        np.testing.assert_allclose(hook_grads, reference_grads, rtol=1e-5, atol=0)
+
+        self.assertEqual(len(tracer._pending_buckets), 1)
+        events = tracer.bucket_events
+        self.assertEqual(len(events), 1)
+        self.assertEqual(len(tracer._pending_buckets), 0)
+        # the communication is timed on the device, from its launch
+        self.assertLessEqual(events[0].ready_time, events[0].launch_time)
+        self.assertLessEqual(events[0].launch_time, events[0].completion_time)
+        self.assertEqual(tracer.iteration_stats()[0].num_bytes, 40 * 20 * 4)
+
+
+
+class HierarchicalAllreduceHookTest(MultiProcessTestCase):
+    def setUp(self):
+        super(HierarchicalAllreduceHookTest, self).setUp()
+        self._fork_processes()
+
+    def tearDown(self):
+        try:
+            os.remove(self.file_name)
+        except OSError:
+            pass
+
+    @property
+    def world_size(self):
+        # 2 nodes of 2 ranks.
+        return 4
+
+    @requires_gloo()
+    def test_hierarchical_allreduce_hook(self):
+        """
+        This unit test verifies the hierarchical allreduce hook registered case
+        gives the same result as no hook registered case, with Gloo processes
+        standing in for the ranks of 2 nodes.
+        """
+        c10d.init_process_group(
+            "gloo",
+            init_method="file://{}".format(self.file_name),
+            rank=self.rank,
+            world_size=self.world_size,
+        )
+        state = hierarchical.HierarchicalState(local_world_size=2)
+        self.assertEqual(state.num_nodes, 2)
+        self.assertEqual(state.node_rank, self.rank // 2)
+        self.assertEqual(state.local_rank, self.rank % 2)
+
+        # The 63 gradient elements of OddSizedModel are padded to 2 shards.
+        for model_class in [TestDdpCommHook, OddSizedModel]:
+            reference_model = DistributedDataParallel(model_class())
+            reference_grads = run_and_get_grads(reference_model, self.rank)
+            hook_model = DistributedDataParallel(model_class())
+            hook_model._register_comm_hook(
+                state, hierarchical.hierarchical_allreduce_hook
+            )
+            hook_grads = run_and_get_grads(hook_model, self.rank)
+            for hook_grad, reference_grad in zip(hook_grads, reference_grads):
+                np.testing.assert_allclose(
+                    hook_grad, reference_grad, rtol=1e-5, atol=1e-7
+                )
+
+
 if __name__ == "__main__":
     assert (
         not torch.cuda._initialized
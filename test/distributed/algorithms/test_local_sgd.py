@@ -0,0 +1,105 @@
+import copy
+import os
+import sys
+
+import torch
+import torch.distributed as dist
+from torch import nn
+from torch.distributed.algorithms.local_sgd import LocalSGD
+from torch.nn.parallel import DistributedDataParallel
+from torch.testing._internal.common_distributed import MultiProcessTestCase, requires_gloo
+from torch.testing._internal.common_utils import run_tests
+
+
+class TestLocalSGD(MultiProcessTestCase):
+    def setUp(self):
+        super(TestLocalSGD, self).setUp()
+        # For Windows platform, Python does not support fork, change it to spawn here.
+        if sys.platform == 'win32':
+            self._spawn_processes()
+        else:
+            self._fork_processes()
+
+    def tearDown(self):
+        try:
+            os.remove(self.file_name)
+        except OSError:
+            pass
+
+    @property
+    def world_size(self):
+        return 2
+
+    def _init_process_group(self):
+        dist.init_process_group(
+            backend='gloo', init_method='file://{}'.format(self.file_name),
+            world_size=self.world_size, rank=self.rank)
+
+    def _model(self):
+        torch.manual_seed(0)
+        return nn.Sequential(nn.Linear(4, 8), nn.ReLU(), nn.Linear(8, 3))
+
+    def _train_step(self, ddp, optimizer, local_sgd=None):
+        input = torch.randn(5, 4)
+        optimizer.zero_grad()
+        if local_sgd is None:
+            ddp(input).sum().backward()
+            optimizer.step()
+            return None
+        with local_sgd.maybe_no_sync():
+            ddp(input).sum().backward()
+        optimizer.step()
+        return local_sgd.step()
+
+    def _same_on_all_ranks(self, tensors):
+        flat = torch.cat([t.detach().view(-1) for t in tensors])
+        gathered = [torch.empty_like(flat) for _ in range(self.world_size)]
+        dist.all_gather(gathered, flat)
+        return all(torch.allclose(g, gathered[0]) for g in gathered)
+
+    @requires_gloo()
+    def test_period_one(self):
+        # Averaging the parameters after every SGD step is the same as
+        # averaging the gradients
+        self._init_process_group()
+        model = self._model()
+        ddp = DistributedDataParallel(copy.deepcopy(model))
+        local_ddp = DistributedDataParallel(copy.deepcopy(model))
+        optimizer = torch.optim.SGD(ddp.parameters(), lr=0.1)
+        local_optimizer = torch.optim.SGD(local_ddp.parameters(), lr=0.1)
+        local_sgd = LocalSGD(local_ddp, period=1)
+
+        for i in range(3):
+            torch.manual_seed(self.rank * 100 + i)
+            self._train_step(ddp, optimizer)
+            torch.manual_seed(self.rank * 100 + i)
+            self.assertTrue(self._train_step(local_ddp, local_optimizer, local_sgd))
+            for p, local_p in zip(ddp.parameters(), local_ddp.parameters()):
+                self.assertEqual(p, local_p)
+
+    @requires_gloo()
+    def test_warmup_and_period(self):
+        self._init_process_group()
+        ddp = DistributedDataParallel(self._model())
+        optimizer = torch.optim.SGD(ddp.parameters(), lr=0.1, momentum=0.9)
+        local_sgd = LocalSGD(ddp, optimizer, period=3, warmup_steps=2, average_optimizer_state=True)
+
+        torch.manual_seed(self.rank)
+        averaged = []
+        for _ in range(8):
+            synchronous = local_sgd.is_synchronous_step()
+            averaged.append(self._train_step(ddp, optimizer, local_sgd))
+            momentum_buffers = [optimizer.state[p]['momentum_buffer'] for p in ddp.parameters()]
+            # The ranks only diverge between the averagings of the local steps
+            in_sync = synchronous or averaged[-1]
+            self.assertEqual(self._same_on_all_ranks(list(ddp.parameters())), in_sync)
+            self.assertEqual(self._same_on_all_ranks(momentum_buffers), in_sync)
+        self.assertEqual(averaged, [False, False, False, False, True, False, False, True])
+
+    def test_invalid_arguments(self):
+        with self.assertRaisesRegex(TypeError, "DistributedDataParallel"):
+            LocalSGD(self._model())
+
+
+if __name__ == '__main__':
+    run_tests()
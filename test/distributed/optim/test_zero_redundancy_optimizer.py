@@ -0,0 +1,145 @@
+import copy
+import os
+import sys
+
+import torch
+import torch.distributed as dist
+from torch import nn
+from torch.distributed.optim import ZeroRedundancyOptimizer
+from torch.nn.parallel import DistributedDataParallel
+from torch.testing._internal.common_distributed import (
+    MultiProcessTestCase,
+    requires_gloo,
+    requires_nccl,
+    skip_if_lt_x_gpu,
+)
+from torch.testing._internal.common_utils import run_tests
+
+
+class TestZeroRedundancyOptimizer(MultiProcessTestCase):
+    def setUp(self):
+        super(TestZeroRedundancyOptimizer, self).setUp()
+        # For Windows platform, Python does not support fork, change it to spawn here.
+        if sys.platform == 'win32':
+            self._spawn_processes()
+        else:
+            self._fork_processes()
+
+    def tearDown(self):
+        try:
+            os.remove(self.file_name)
+        except OSError:
+            pass
+
+    @property
+    def world_size(self):
+        return 2
+
+    def _init_process_group(self, backend='gloo'):
+        dist.init_process_group(
+            backend=backend, init_method='file://{}'.format(self.file_name),
+            world_size=self.world_size, rank=self.rank)
+
+    def _model(self):
+        torch.manual_seed(0)
+        return nn.Sequential(nn.Linear(4, 8), nn.ReLU(), nn.Linear(8, 3))
+
+    @requires_gloo()
+    def test_step(self):
+        self._init_process_group()
+        model = self._model()
+        reference = copy.deepcopy(model)
+        opt = ZeroRedundancyOptimizer(model.parameters(), optimizer_class=torch.optim.Adam, lr=0.1)
+        reference_opt = torch.optim.Adam(reference.parameters(), lr=0.1)
+
+        # the parameters are split between the ranks
+        partition = opt.partition_parameters()
+        self.assertEqual(sum(len(params) for params in partition), 4)
+        self.assertTrue(all(len(params) > 0 for params in partition))
+        self.assertEqual(opt.param_groups[0]['betas'], (0.9, 0.999))
+
+        torch.manual_seed(1)
+        for _ in range(3):
+            input = torch.randn(5, 4)
+            for m, o in ((model, opt), (reference, reference_opt)):
+                o.zero_grad()
+                m(input).sum().backward()
+                o.step()
+            for p, reference_p in zip(model.parameters(), reference.parameters()):
+                self.assertEqual(p, reference_p)
+        # only the state of the local parameters is kept
+        self.assertEqual(set(opt.state), set(partition[self.rank]))
+
+    @requires_gloo()
+    def test_state_dict(self):
+        self._init_process_group()
+        model = self._model()
+        opt = ZeroRedundancyOptimizer(model.parameters(), optimizer_class=torch.optim.SGD, lr=0.1, momentum=0.9)
+        scheduler = torch.optim.lr_scheduler.StepLR(opt, step_size=1, gamma=0.5)
+        model(torch.ones(2, 4)).sum().backward()
+        opt.step()
+        scheduler.step()
+
+        with self.assertRaisesRegex(RuntimeError, "consolidate_state_dict"):
+            opt.state_dict()
+        opt.consolidate_state_dict(to=0)
+        if self.rank != 0:
+            return
+        state_dict = opt.state_dict()
+        self.assertEqual(len(state_dict['state']), 4)
+        self.assertEqual(state_dict['param_groups'][0]['lr'], 0.05)
+
+        # the state dict is the same as the local optimizer's
+        reference_opt = torch.optim.SGD(model.parameters(), lr=0.1, momentum=0.9)
+        reference_opt.load_state_dict(state_dict)
+        self.assertEqual(reference_opt.state_dict(), state_dict)
+
+        opt.load_state_dict(reference_opt.state_dict())
+        self.assertEqual(set(opt.state), set(opt.partition_parameters()[self.rank]))
+        self.assertEqual(opt.optim.param_groups[0]['lr'], 0.05)
+
+    @requires_nccl()
+    @skip_if_lt_x_gpu(2)
+    def test_state_dict_nccl(self):
+        # NCCL doesn't support gather
+        self._init_process_group(backend='nccl')
+        torch.cuda.set_device(self.rank)
+        model = self._model().cuda(self.rank)
+        opt = ZeroRedundancyOptimizer(model.parameters(), optimizer_class=torch.optim.Adam, lr=0.1)
+        model(torch.ones(2, 4, device=self.rank)).sum().backward()
+        opt.step()
+
+        opt.consolidate_state_dict(to=1)
+        if self.rank != 1:
+            return
+        state_dict = opt.state_dict()
+        self.assertEqual(len(state_dict['state']), 4)
+        self.assertTrue(all(s['exp_avg'].device.type == 'cpu' for s in state_dict['state'].values()))
+
+    @requires_gloo()
+    def test_ddp(self):
+        self._init_process_group()
+        model = self._model()
+        reference = copy.deepcopy(model)
+        ddp = DistributedDataParallel(model)
+        opt = ZeroRedundancyOptimizer(ddp.parameters(), optimizer_class=torch.optim.Adam, lr=0.01)
+        reference_opt = torch.optim.Adam(reference.parameters(), lr=0.01)
+
+        torch.manual_seed(2)
+        inputs = [torch.randn(3, 4) for _ in range(self.world_size)]
+        for _ in range(2):
+            opt.zero_grad()
+            ddp(inputs[self.rank]).sum().backward()
+            opt.step()
+
+            # the reference sees the inputs of all the ranks
+            reference_opt.zero_grad()
+            (sum(reference(input).sum() for input in inputs) / self.world_size).backward()
+            reference_opt.step()
+
+        for p, reference_p in zip(model.parameters(), reference.parameters()):
+            self.assertEqual(p, reference_p)
+
+
+if __name__ == '__main__':
+    run_tests()
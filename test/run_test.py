@@ -49,6 +49,8 @@ TESTS = [
     'test_multiprocessing',
     'test_multiprocessing_spawn',
     'distributed/test_nccl',
+    'distributed/optim/test_zero_redundancy_optimizer',
+    'distributed/algorithms/test_local_sgd',
     'test_native_functions',
     'test_nn',
     'test_numba_integration',
@@ -14,7 +14,7 @@ import tempfile
 import random
 from torch import multiprocessing as mp
 from torch.utils.data import (_utils, Dataset, IterableDataset, TensorDataset, DataLoader, ConcatDataset,
-                              ChainDataset, BufferedShuffleDataset)
+                              ChainDataset, BufferedShuffleDataset, WorkerPool)
 from torch.utils.data._utils import MP_STATUS_CHECK_INTERVAL
 from torch.utils.data.dataset import random_split
 from torch._utils import ExceptionWrapper
@@ -739,6 +739,22 @@ class BulkLoadingDataset(Dataset):
         return self.length
 
 
+class BatchedFetchDataset(Dataset):
+    def __init__(self, length):
+        self.data = torch.arange(length)
+
+    def __getitem__(self, idx):
+        raise AssertionError("__getitem__ shouldn't be called when __getitems__ is defined")
+
+    def __getitems__(self, indices):
+        assert isinstance(indices, list)
+        # one vectorized gather for the whole batch
+        return list(self.data[indices].unbind())
+
+    def __len__(self):
+        return len(self.data)
+
+
 class BulkLoadingSampler(torch.utils.data.Sampler):
     def __init__(self, dataset, batch_size):
         self.dataset = dataset
@@ -915,6 +931,19 @@ except RuntimeError as e:
             self.assertEqual(samples[0].is_pinned(), TEST_CUDA)
             self.assertEqual(set(torch.cat(samples, 0).tolist()), set(range(n)))
 
+    def test_getitems(self):
+        ds = BatchedFetchDataset(35)
+        for num_workers in [0, 2]:
+            dl = self._get_data_loader(ds, num_workers=num_workers, batch_size=4)
+            self.assertEqual(torch.cat(list(dl)), torch.arange(35))
+
+        subset = torch.utils.data.Subset(ds, list(range(34, -1, -2)))
+        dl = self._get_data_loader(subset, batch_size=4)
+        self.assertEqual(torch.cat(list(dl)), torch.arange(34, -1, -2))
+        # without auto-collation, __getitem__ is still used
+        dl = self._get_data_loader(self.dataset, batch_size=None)
+        self.assertEqual(next(iter(dl))[0], self.data[0])
+
     def test_growing_dataset(self):
         dataset = [torch.ones(4) for _ in range(4)]
         dataloader_seq = self._get_data_loader(dataset, shuffle=False)
@@ -1335,6 +1364,91 @@ except RuntimeError as e:
     def test_seqential_batch_workers_prefetch(self):
         self._test_sequential(DataLoader(self.dataset, batch_size=2, num_workers=4, prefetch_factor=3))
 
+    def _test_sequential_ring_buffer(self, loader):
+        it = iter(loader)
+        unpack = it._ring_reader.unpack
+        ring_batches = []
+
+        def counting_unpack(batch, hold=False):
+            ring_batches.append(batch.worker_id)
+            return unpack(batch, hold)
+
+        it._ring_reader.unpack = counting_unpack
+        for i, (sample, target) in enumerate(it):
+            idx = i * loader.batch_size
+            self.assertEqual(sample, self.data[idx:idx + loader.batch_size])
+            self.assertEqual(target, self.labels[idx:idx + loader.batch_size])
+        self.assertEqual(i, math.floor((len(self.dataset) - 1) / loader.batch_size))
+        # every worker sent batches through its slots
+        self.assertEqual(set(ring_batches), set(range(loader.num_workers)))
+
+    def test_seqential_batch_workers_ring_buffer(self):
+        # batch_size=3 makes the last batch smaller than the slots
+        self._test_sequential_ring_buffer(self._get_data_loader(self.dataset, batch_size=3, num_workers=4,
+                                                                ring_buffer_slots=3))
+        self._test_sequential_ring_buffer(self._get_data_loader(self.dataset, num_workers=2, ring_buffer_slots=1))
+
+    def test_ring_buffer_persistent_workers_early_break(self):
+        # The batches dropped when an epoch is cut short give their slots back,
+        # including the first batch of a worker, which carries the buffers
+        loader = self._get_data_loader(self.dataset, batch_size=2, num_workers=2, ring_buffer_slots=2,
+                                       persistent_workers=True, prefetch_factor=4)
+        for _ in range(3):
+            next(iter(loader))
+        it = iter(loader)
+        self.assertEqual(len(it._ring_reader.slots), 2)
+        for i, (sample, target) in enumerate(it):
+            self.assertEqual(sample, self.data[2 * i:2 * i + 2])
+            self.assertEqual(target, self.labels[2 * i:2 * i + 2])
+        self.assertEqual(i, len(self.dataset) // 2 - 1)
+
+    def test_ring_buffer_options(self):
+        with self.assertRaisesRegex(ValueError, "needs num_workers > 0"):
+            self._get_data_loader(self.dataset, ring_buffer_slots=2)
+        with self.assertRaisesRegex(ValueError, "non-negative"):
+            self._get_data_loader(self.dataset, num_workers=2, ring_buffer_slots=-1)
+
+    def test_worker_pool(self):
+        with WorkerPool(2) as pool:
+            loader = self._get_data_loader(self.dataset, batch_size=2, worker_pool=pool)
+            counting_loader = DataLoader(CountingDataset(20), batch_size=4, worker_pool=pool, prefetch_factor=3)
+            for _ in range(2):
+                self._test_sequential(loader)
+            # interleaved iteration over two loaders sharing the workers
+            counting_iter = iter(counting_loader)
+            for i, (sample, target) in enumerate(loader):
+                if i < len(counting_loader):
+                    self.assertEqual(next(counting_iter), torch.arange(4 * i, 4 * i + 4))
+                self.assertEqual(sample, self.data[2 * i:2 * i + 2])
+                self.assertEqual(target, self.labels[2 * i:2 * i + 2])
+            # the iterator of a temporary loader outlives it
+            it = iter(DataLoader(CountingDataset(20), batch_size=4, worker_pool=pool))
+            gc.collect()
+            self.assertEqual(list(it), list(torch.arange(20).split(4)))
+            # an abandoned iterator doesn't affect the next ones
+            it = iter(counting_loader)
+            next(it)
+            del it
+            self.assertEqual(list(counting_loader), list(torch.arange(20).split(4)))
+
+            errors = DataLoader(ErrorDataset(10), batch_size=2, worker_pool=pool)
+            with self.assertRaisesRegex(NotImplementedError, "in DataLoader worker process"):
+                list(errors)
+            self._test_sequential(loader)
+        with self.assertRaisesRegex(RuntimeError, "shut down"):
+            list(loader)
+
+    def test_worker_pool_options(self):
+        with WorkerPool(1) as pool:
+            with self.assertRaisesRegex(ValueError, "mutually exclusive with num_workers"):
+                self._get_data_loader(self.dataset, worker_pool=pool, num_workers=2)
+            with self.assertRaisesRegex(ValueError, "mutually exclusive with worker_init_fn"):
+                self._get_data_loader(self.dataset, worker_pool=pool, worker_init_fn=print)
+            with self.assertRaisesRegex(ValueError, "not supported with IterableDataset"):
+                DataLoader(CountingIterableDataset(10), worker_pool=pool)
+        with self.assertRaisesRegex(ValueError, "should be positive"):
+            WorkerPool(0)
+
     def test_shuffle_workers(self):
         self._test_shuffle(self._get_data_loader(self.dataset, shuffle=True, num_workers=4))
 
@@ -1436,6 +1550,116 @@ except RuntimeError as e:
         ):
             self.assertEqual(list(fn()), list(fn()))
 
+    def test_sampler_default_generator(self):
+        from torch.utils.data import RandomSampler, WeightedRandomSampler, SubsetRandomSampler
+
+        def sample(fn):
+            torch.manual_seed(0)
+            return list(fn())
+
+        weights = [0.1, 0.9, 0.4, 0.7, 3.0, 0.6]
+        n = len(self.dataset)
+        for fn, expected_fn in (
+            (lambda: RandomSampler(self.dataset),
+             lambda: torch.randperm(n).tolist()),
+            (lambda: SubsetRandomSampler(range(10, 20)),
+             lambda: (torch.randperm(10) + 10).tolist()),
+            (lambda: WeightedRandomSampler(weights, num_samples=5, replacement=False),
+             lambda: torch.multinomial(torch.tensor(weights, dtype=torch.double), 5, False).tolist()),
+        ):
+            # without a generator, the samplers draw from the default generator
+            self.assertEqual(sample(fn), sample(expected_fn))
+
+        # and so does a shuffling DataLoader, after drawing its base seed
+        def shuffled():
+            torch.empty((), dtype=torch.int64).random_()
+            return torch.randperm(n)
+        loader = self._get_data_loader(self.dataset, batch_size=n, shuffle=True)
+        self.assertEqual(sample(lambda: next(iter(loader))[0]), sample(lambda: self.data[shuffled()]))
+
+        # resuming replays the iteration without touching the default generator
+        sampler = RandomSampler(self.dataset)
+        expected = sample(lambda: sampler)
+        sampler.load_state_dict(dict(sampler.state_dict(), num_yielded=0))
+        torch.manual_seed(1)
+        self.assertEqual(list(sampler), expected)
+        self.assertEqual(torch.rand(1), torch.rand(1, generator=torch.Generator().manual_seed(1)))
+
+    def test_sampler_state_dict(self):
+        from torch.utils.data import (SequentialSampler, RandomSampler, WeightedRandomSampler,
+                                      SubsetRandomSampler, BatchSampler)
+        from torch.utils.data.distributed import DistributedSampler
+
+        weights = [0.1, 0.9, 0.4, 0.7, 3.0, 0.6]
+        for sampler in (
+            SequentialSampler(self.dataset),
+            RandomSampler(self.dataset),
+            RandomSampler(self.dataset, num_samples=50, replacement=True),
+            RandomSampler(self.dataset, generator=torch.Generator().manual_seed(42)),
+            WeightedRandomSampler(weights, num_samples=5, replacement=False),
+            SubsetRandomSampler(range(10)),
+            BatchSampler(RandomSampler(self.dataset), batch_size=3, drop_last=False),
+            DistributedSampler(self.dataset, num_replicas=2, rank=1),
+        ):
+            it = iter(sampler)
+            head = [next(it) for _ in range(4)]
+            state = sampler.state_dict()
+            tail = list(it)
+            # another epoch moves the sampler on
+            list(sampler)
+            sampler.load_state_dict(state)
+            self.assertEqual(sampler.state_dict(), state)
+            self.assertEqual(list(sampler), tail)
+            sampler.load_state_dict(dict(state, num_yielded=0))
+            self.assertEqual(list(sampler), head + tail)
+
+        with self.assertRaisesRegex(TypeError, "state_dict"):
+            sampler = BatchSampler(range(10), batch_size=3, drop_last=False)
+            list(sampler)
+            sampler.load_state_dict(sampler.state_dict())
+
+    def test_sampler_subclass_without_super_init(self):
+        from torch.utils.data import SequentialSampler, RandomSampler
+
+        class FirstHalfSampler(SequentialSampler):
+            def __init__(self, data_source):
+                self.data_source = range(len(data_source) // 2)
+
+        class ShuffledSampler(RandomSampler):
+            def __init__(self, data_source):
+                self.data_source = data_source
+                self.replacement = False
+                self._num_samples = None
+                self.generator = torch.Generator().manual_seed(0)
+
+        self.assertEqual(list(FirstHalfSampler(self.dataset)), list(range(50)))
+        sampler = ShuffledSampler(self.dataset)
+        self.assertEqual(sorted(sampler), list(range(100)))
+        self.assertEqual(sampler.state_dict()['num_yielded'], 100)
+
+    def test_dataloader_state_dict(self):
+        for kwargs in ({}, {'num_workers': 2}, {'num_workers': 2, 'persistent_workers': True}):
+            loader = self._get_data_loader(self.dataset, batch_size=3, shuffle=True, **kwargs)
+            it = iter(loader)
+            for _ in range(5):
+                next(it)
+            state = it.state_dict()
+            self.assertEqual(state['sampler']['num_yielded'], 5)
+            rest = list(it)
+            list(loader)
+
+            loader.load_state_dict(state)
+            resumed = iter(loader)
+            self.assertEqual(resumed.state_dict(), state)
+            self.assertEqual(list(resumed), rest)
+            del it, resumed
+
+        loader = self._get_data_loader(CountingIterableDataset(10), batch_size=2)
+        with self.assertRaisesRegex(ValueError, "IterableDataset"):
+            iter(loader).state_dict()
+        loader = self._get_data_loader(self.dataset, sampler=range(10))
+        with self.assertRaisesRegex(TypeError, "state_dict"):
+            iter(loader).state_dict()
 
     def _test_sampler(self, **kwargs):
         indices = range(2, 12)  # using a regular iterable
@@ -1483,6 +1707,125 @@ except RuntimeError as e:
             self.assertTrue(input.is_pinned())
             self.assertTrue(target.is_pinned())
 
+    @unittest.skipIf(not TEST_CUDA, "CUDA unavailable")
+    def test_sequential_pin_memory_buffers(self):
+        loader = self._get_data_loader(self.dataset, batch_size=3, num_workers=4, pin_memory=True,
+                                       pin_memory_buffers=20)
+        self._test_sequential(loader)
+        for input, target in loader:
+            self.assertTrue(input.is_pinned())
+            self.assertTrue(target.is_pinned())
+
+    @unittest.skipIf(not TEST_CUDA, "CUDA unavailable")
+    def test_pin_memory_buffers_persistent_workers_early_break(self):
+        # The buffers of the batches dropped when an epoch is cut short go back
+        # to the pool
+        loader = self._get_data_loader(self.dataset, batch_size=2, num_workers=2, pin_memory=True,
+                                       pin_memory_buffers=20, persistent_workers=True, prefetch_factor=3)
+        for _ in range(4):
+            next(iter(loader))
+        it = iter(loader)
+        for i, (input, target) in enumerate(it):
+            self.assertTrue(input.is_pinned())
+            self.assertEqual(input, self.data[2 * i:2 * i + 2])
+            self.assertEqual(target, self.labels[2 * i:2 * i + 2])
+        pool = it._pinned_buffer_pool
+        num_free_buffers = sum(len(free) for free in pool.free_buffers.values())
+        # all the buffers but those of the last batch are free
+        self.assertEqual(len(it._held_pinned_lease), 2)
+        self.assertEqual(num_free_buffers + 2, pool.num_buffers)
+
+    def test_adaptive_prefetch(self):
+        loader = self._get_data_loader(self.dataset, batch_size=2, num_workers=2, max_prefetch_factor=4)
+        self._test_sequential(loader)
+        it = iter(loader)
+        for _ in it:
+            pass
+        stats = it.prefetch_stats()
+        self.assertEqual(stats['num_batches'], 50)
+        self.assertAlmostEqual(stats['avg_batch_nbytes'], 2 * (2 * 3 * 5 * 4 + 8))
+        self.assertIn(stats['prefetch_factor'], range(1, 5))
+        self.assertIsNone(iter(self._get_data_loader(self.dataset, num_workers=2)).prefetch_stats())
+
+        # batches in the ring buffer are sized from their slots
+        loader = self._get_data_loader(self.dataset, batch_size=2, num_workers=2, max_prefetch_factor=4,
+                                       ring_buffer_slots=8)
+        it = iter(loader)
+        for _ in it:
+            pass
+        self.assertAlmostEqual(it.prefetch_stats()['avg_batch_nbytes'], 2 * (2 * 3 * 5 * 4 + 8))
+
+        # the send times of an epoch cut short don't carry over to the next one
+        loader = self._get_data_loader(self.dataset, batch_size=2, num_workers=2, max_prefetch_factor=4,
+                                       persistent_workers=True)
+        for _ in range(2):
+            it = iter(loader)
+            next(it)
+            self.assertLessEqual(set(it._task_send_times), set(it._task_info))
+
+        with self.assertRaisesRegex(ValueError, "at least prefetch_factor"):
+            self._get_data_loader(self.dataset, num_workers=2, prefetch_factor=3, max_prefetch_factor=2)
+        with self.assertRaisesRegex(ValueError, "needs max_prefetch_factor"):
+            self._get_data_loader(self.dataset, num_workers=2, prefetch_memory_budget=1000)
+
+    def test_adaptive_prefetch_controller(self):
+        controller = _utils.prefetch._AdaptivePrefetchController(2, 4, num_workers=2, memory_budget=10000, window=2)
+        # the consumer waits, so the prefetch factor grows up to the memory budget
+        for _ in range(10):
+            factor = controller.record(wait_time=0.5, busy_time=0.5, nbytes=1000)
+        self.assertEqual(factor, 4)
+        controller.memory_budget = 6000
+        self.assertEqual(controller.record(0.5, 0.5, 1000), 4)
+        self.assertEqual(controller.record(0.5, 0.5, 1000), 3)
+        for _ in range(2):
+            self.assertEqual(controller.record(0.5, 0.5, 1000), 3)
+
+        # with (almost) no waits, the prefetch factor shrinks after a few idle windows
+        for _ in range(2 * controller.shrink_idle_windows - 1):
+            self.assertEqual(controller.record(0.001, 1.0, 1000), 3)
+        self.assertEqual(controller.record(0.0, 1.0, 1000), 2)
+
+        stats = controller.stats()
+        self.assertEqual(stats['num_increases'], 2)
+        self.assertEqual(stats['num_decreases'], 2)
+        self.assertAlmostEqual(stats['avg_batch_nbytes'], 1000)
+
+    def test_pinned_buffer_pool(self):
+        allocated = []
+
+        def allocator(numel, dtype):
+            allocated.append(numel)
+            return torch.empty(numel, dtype=dtype)
+
+        pool = _utils.pin_memory._PinnedBufferPool(4, allocator=allocator)
+        first = pool.pin({'a': torch.ones(2, 3), 'b': [torch.arange(4), 'x']})
+        self.assertEqual(first.data['a'], torch.ones(2, 3))
+        self.assertEqual(first.data['b'][0], torch.arange(4))
+        self.assertEqual(first.data['b'][1], 'x')
+        self.assertEqual(allocated, [6, 4])
+
+        # buffers are reused once the lease is released
+        pool.release(first.lease)
+        second = pool.pin({'a': torch.zeros(1, 3), 'b': [torch.arange(4), 'x']})
+        self.assertEqual(second.data['a'], torch.zeros(1, 3))
+        self.assertEqual(allocated, [6, 4])
+        self.assertEqual({b.data_ptr() for b in first.lease}, {b.data_ptr() for b in second.lease})
+
+        # a larger tensor allocates a new buffer sized to it, up to the limit
+        third = pool.pin([torch.ones(8), torch.ones(8)])
+        self.assertEqual(allocated, [6, 4, 8, 8])
+        self.assertEqual(third.data, [torch.ones(8), torch.ones(8)])
+
+        if TEST_CUDA:
+            # when the pool is exhausted the tensor is pinned as usual
+            self.assertEqual(len(pool.pin(torch.ones(3)).lease), 0)
+
+        # a released buffer that is too small is replaced by a larger one
+        pool.release(second.lease)
+        fourth = pool.pin(torch.ones(10, dtype=torch.int64))
+        self.assertEqual(allocated, [6, 4, 8, 8, 10])
+        self.assertEqual(fourth.data, torch.ones(10, dtype=torch.int64))
+
     @unittest.skipIf(not TEST_NUMPY, "numpy unavailable")
     def test_numpy(self):
         import numpy as np
@@ -1813,6 +2156,24 @@ except RuntimeError as e:
 
         self.assertTrue((tensor == tensor.new_tensor([[0, 1], [2, 3], [4, 5], [6, 7]])).all().item())
 
+    @unittest.skipIf(not TEST_NUMPY, "numpy unavailable")
+    def test_default_collate_numpy_arrays(self):
+        import numpy as np
+
+        batch = [{'x': np.full((2, 3), i, dtype=np.float32), 'y': np.arange(i, i + 4)} for i in range(5)]
+        collated = _utils.collate.default_collate(batch)
+        self.assertEqual(collated['x'].dtype, torch.float32)
+        self.assertEqual(collated['x'].shape, (5, 2, 3))
+        self.assertEqual(collated['x'], torch.arange(5, dtype=torch.float32).view(5, 1, 1).expand(5, 2, 3))
+        self.assertEqual(collated['y'], torch.stack([torch.arange(i, i + 4) for i in range(5)]))
+
+        # non-contiguous samples
+        arr = np.arange(24).reshape(4, 6)
+        self.assertEqual(_utils.collate.default_collate([arr.T, arr.T]), torch.from_numpy(np.stack([arr.T, arr.T])))
+
+        # samples with different shapes still fail in torch.stack
+        self.assertRaises(RuntimeError, lambda: _utils.collate.default_collate([np.zeros(2), np.zeros(3)]))
+
     def test_default_collate_bad_sequence_type(self):
         batch = [['X'], ['X', 'X']]
         self.assertRaises(RuntimeError, lambda: _utils.collate.default_collate(batch))
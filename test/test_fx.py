@@ -4,8 +4,10 @@ import operator
 import numbers
 import pickle
 import copy
+import os
+import tempfile
 from pathlib import Path
-from torch.fx import symbolic_trace, Proxy, Node, GraphModule, Tracer, Graph
+from torch.fx import symbolic_trace, Proxy, Node, GraphModule, Tracer, Graph, Interpreter
 from torch.fx.experimental import GraphManipulation
 from torch.fx.experimental import shape_prop
 from torch.fx.experimental.subgraph_creation_example import split_module
@@ -540,6 +542,47 @@ class TestFX(JitTestCase):
         x = torch.rand(3, 4)
         self.assertEqual(loaded(x), traced(x))
 
+    def test_graphmodule_code_cache(self):
+        import torch.fx.graph_module as graph_module
+
+        class Nested(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.st = torch.nn.Linear(4, 4)
+
+            def forward(self, x):
+                return torch.relu(self.st(x))
+
+        traced = symbolic_trace(Nested())
+        x = torch.rand(3, 4)
+
+        # the same code is compiled once
+        copied = GraphModule(traced, traced.graph)
+        self.assertIs(type(copied).forward.__code__, type(traced).forward.__code__)
+
+        # unpickling restores the code without tracing it
+        loaded = pickle.loads(pickle.dumps(traced))
+        self.assertIsNone(loaded._graph)
+        self.assertEqual(loaded.code, traced.code)
+        self.assertEqual(loaded(x), traced(x))
+        loaded.graph.lint(loaded)
+        self.assertEqual(loaded.code, traced.code)
+
+        old_dir = graph_module._code_cache_dir
+        with tempfile.TemporaryDirectory() as cache_dir:
+            try:
+                graph_module.set_code_cache_dir(cache_dir)
+                graph_module.clear_code_cache()
+                traced.recompile()
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                # a new process starts with an empty in-memory cache
+                graph_module.clear_code_cache()
+                loaded = pickle.loads(pickle.dumps(traced))
+                self.assertEqual(loaded(x), traced(x))
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+            finally:
+                graph_module.set_code_cache_dir(old_dir)
+
     def test_deepcopy_graphmodule_with_transform(self):
         st = SimpleTest()
         traced = symbolic_trace(st)
@@ -772,6 +815,44 @@ class TestFX(JitTestCase):
         # Test shape propogation and make sure results match actual
         self.assertEqual(output_shape, ref_out.shape)
 
+    def test_interpreter(self):
+        class MyModule(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.param = torch.nn.Parameter(torch.rand(3, 4))
+                self.linear = torch.nn.Linear(4, 5)
+
+            def forward(self, x):
+                return self.linear(x + self.param).clamp(min=0.0, max=1.0)
+
+        m = MyModule()
+        gm = symbolic_trace(m)
+        x = torch.randn(3, 4)
+        self.assertEqual(Interpreter(gm).run(x), gm(x))
+
+        with self.assertRaisesRegex(RuntimeError, 'Expected positional argument'):
+            Interpreter(gm).run()
+
+    def test_interpreter_override(self):
+        class NegSigmSwapInterpreter(Interpreter):
+            def call_function(self, target, args, kwargs):
+                if target == torch.sigmoid:
+                    return torch.neg(*args, **kwargs)
+                return super().call_function(target, args, kwargs)
+
+            def call_method(self, target, args, kwargs):
+                if target == 'neg':
+                    call_self, *args_tail = args
+                    return call_self.sigmoid(*args_tail, **kwargs)
+                return super().call_method(target, args, kwargs)
+
+        def fn(x):
+            return torch.sigmoid(x).neg()
+
+        gm = symbolic_trace(fn)
+        x = torch.randn(3, 4)
+        self.assertEqual(NegSigmSwapInterpreter(gm).run(x), torch.neg(x).sigmoid())
+
     def test_fn_type_annotations(self):
         class Foo(torch.nn.Module):
             def forward(self, p : Pair, z : torch.Tensor, i : int) -> Dict[str, torch.Tensor]:
@@ -889,6 +970,19 @@ class TestFX(JitTestCase):
         input = torch.randn(33, 44)
         self.assertEqual(gm(input), torch.relu(torch.neg(input)))
 
+    def test_erase_node_removes_uses(self):
+        graph = torch.fx.Graph()
+        x = graph.placeholder('x')
+        relu = graph.call_function(torch.relu, (x,))
+        neg = graph.call_function(torch.neg, (relu,))
+        output = graph.output(x)
+        graph.erase_node(neg)
+        self.assertEqual(list(relu.users), [])
+        # the producer of an erased Node can be erased in turn
+        graph.erase_node(relu)
+        self.assertEqual(list(x.users), [output])
+        self.assertEqual([n.op for n in graph.nodes], ['placeholder', 'output'])
+
     def test_erase_node_error(self):
         st = SimpleTest()
         traced = symbolic_trace(st)
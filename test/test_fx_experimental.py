@@ -1,7 +1,17 @@
+import copy
+import operator
 import torch
 from torch.fx.symbolic_trace import symbolic_trace
 from torch.fx.experimental import GraphManipulation
 from torch.fx.experimental.Partitioner import Partitioner, Device
+from torch.fx.experimental.node_profiler import NodeProfiler
+from torch.fx.experimental.graph_passes import (eliminate_dead_code, eliminate_common_subexpressions,
+                                                fold_constants)
+from torch.fx.experimental.subgraph_rewriter import replace_pattern
+from torch.fx.experimental.pipeline_split import split_pipeline_stages
+from torch.fx.experimental.shape_prop import ShapeProp
+from torch.fx.experimental.memory_planner import (analyze_memory, compute_last_uses, reorder_for_memory,
+                                                  free_unused_values)
 from torch.testing._internal.common_utils import run_tests
 from torch.testing._internal.jit_utils import JitTestCase
 
@@ -91,5 +101,356 @@ class TestFXExperimental(JitTestCase):
         self.assertEqual(traced(a, b), module_with_submodules(a, b))
         assert len(module_with_submodules.graph.nodes) == 5
 
+    def test_node_profiler(self):
+        class TestModule(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.linear = torch.nn.Linear(4, 8)
+
+            def forward(self, a):
+                return torch.relu(self.linear(a)).sum(dim=0)
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        a = torch.rand(2, 4)
+        profiler = NodeProfiler(traced)
+        for _ in range(3):
+            self.assertEqual(profiler.run(a), m(a))
+
+        nodes = {node.name: node for node in traced.graph.nodes}
+        self.assertEqual(nodes['linear_1'].shape, torch.Size([2, 8]))
+        self.assertEqual(nodes['linear_1'].dtype, torch.float)
+        self.assertEqual(nodes['linear_1'].output_bytes, 2 * 8 * 4)
+        self.assertEqual(nodes['sum_1'].output_bytes, 8 * 4)
+        summary = profiler.summary()
+        self.assertEqual(len(summary), len(nodes))
+        self.assertTrue(all(profile.num_runs == 3 for _, profile in summary))
+        self.assertTrue(all(summary[i][1].total_time >= summary[i + 1][1].total_time
+                            for i in range(len(summary) - 1)))
+        self.assertEqual(len(profiler.summary(top=2)), 2)
+
+    def test_eliminate_dead_code(self):
+        class TestModule(torch.nn.Module):
+            def forward(self, a):
+                unused = torch.sigmoid(a).neg()
+                a.add_(1)
+                return a * 2
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        self.assertTrue(eliminate_dead_code(traced.graph))
+        traced.recompile()
+        targets = [node.target for node in traced.graph.nodes]
+        self.assertNotIn(torch.sigmoid, targets)
+        self.assertNotIn('neg', targets)
+        # in-place operations are kept even if their value is unused
+        self.assertIn('add_', targets)
+        self.assertFalse(eliminate_dead_code(traced.graph))
+        a = torch.rand(3)
+        self.assertEqual(traced(a.clone()), m(a.clone()))
+
+    def test_eliminate_dead_code_side_effects(self):
+        graph = torch.fx.Graph()
+        a = graph.placeholder('a')
+        d = graph.placeholder('d')
+        graph.call_function(operator.setitem, (d, 'key', a))
+        graph.call_function(print, (a,))
+        graph.call_function(torch.manual_seed, (0,))
+        graph.call_method('backward', (a,))
+        impure_targets = [operator.setitem, print, torch.manual_seed, 'backward']
+        if torch.distributed.is_available():
+            graph.call_function(torch.distributed.all_reduce, (a,))
+            impure_targets.append(torch.distributed.all_reduce)
+        graph.call_function(torch.neg, (graph.call_function(torch.sigmoid, (a,)),))
+        graph.output(a)
+
+        self.assertTrue(eliminate_dead_code(graph))
+        targets = [node.target for node in graph.nodes]
+        for target in impure_targets:
+            self.assertIn(target, targets)
+        self.assertNotIn(torch.neg, targets)
+        self.assertNotIn(torch.sigmoid, targets)
+        # the erased Nodes are no longer users of `a`
+        self.assertNotIn(torch.sigmoid, [user.target for user in a.users])
+
+    def test_eliminate_common_subexpressions(self):
+        class TestModule(torch.nn.Module):
+            def forward(self, a):
+                b = a.reshape(2, 3) + a.reshape(2, 3)
+                c = torch.rand_like(b) + torch.rand_like(b)
+                return b + torch.relu(b) + torch.relu(b) + c * 0
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        self.assertTrue(eliminate_common_subexpressions(traced.graph))
+        traced.recompile()
+        traced.graph.lint(traced)
+        targets = [node.target for node in traced.graph.nodes]
+        self.assertEqual(targets.count('reshape'), 1)
+        self.assertEqual(targets.count(torch.relu), 1)
+        # nondeterministic functions aren't merged
+        self.assertEqual(targets.count(torch.rand_like), 2)
+        a = torch.rand(6)
+        self.assertEqual(traced(a), m(a))
+
+    def test_fold_constants(self):
+        class TestModule(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.weight = torch.nn.Parameter(torch.rand(4, 4))
+                self.scale = torch.nn.Parameter(torch.rand(4))
+
+            def forward(self, a):
+                w = (self.weight * self.scale).t()
+                return torch.mm(a, w) + self.scale
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        a = torch.rand(2, 4)
+        ref = m(a)
+        self.assertTrue(fold_constants(traced))
+        traced.graph.lint(traced)
+        ops = [node.op for node in traced.graph.nodes]
+        self.assertEqual(ops.count('call_method'), 0)
+        self.assertEqual(ops.count('get_attr'), 2)
+        self.assertEqual(traced(a), ref)
+        self.assertFalse(fold_constants(traced))
+
+    def test_replace_pattern(self):
+        class TestModule(torch.nn.Module):
+            def forward(self, a, b, c):
+                u = torch.neg(torch.add(a, b))
+                w = torch.neg(torch.add(u, c))
+                # `s` is used outside of the pattern, so this isn't a match
+                s = torch.add(a, c)
+                return w + torch.neg(s) + s
+
+        def pattern(x, y):
+            return torch.neg(torch.add(x, y))
+
+        def replacement(x, y):
+            return torch.sub(torch.neg(x), y)
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        matches = replace_pattern(traced, pattern, replacement)
+        self.assertEqual(len(matches), 2)
+        traced.graph.lint(traced)
+        targets = [node.target for node in traced.graph.nodes]
+        self.assertEqual(targets.count(torch.sub), 2)
+        self.assertEqual(targets.count(torch.add), 1)
+        self.assertEqual(targets.count(torch.neg), 3)
+        a, b, c = torch.rand(3), torch.rand(3), torch.rand(3)
+        self.assertEqual(traced(a, b, c), m(a, b, c))
+
+        # constant arguments must be equal
+        def scale_pattern(x):
+            return torch.mul(x, 2)
+
+        def scale_replacement(x):
+            return torch.add(x, x)
+
+        class ScaleModule(torch.nn.Module):
+            def forward(self, a):
+                return torch.mul(a, 2) + torch.mul(a, 3)
+
+        m = ScaleModule()
+        traced = symbolic_trace(m)
+        self.assertEqual(len(replace_pattern(traced, scale_pattern, scale_replacement)), 1)
+        self.assertEqual(traced(a), m(a))
+
+        # the replacement can't use a parameter that the pattern doesn't match
+        def unused_pattern(x, y):
+            return torch.neg(x)
+
+        def unused_replacement(x, y):
+            return torch.add(x, y)
+
+        traced = symbolic_trace(m)
+        with self.assertRaisesRegex(RuntimeError, "parameter y"):
+            replace_pattern(traced, unused_pattern, unused_replacement)
+
+    def test_replace_pattern_chain(self):
+        class TestModule(torch.nn.Module):
+            def forward(self, a, b):
+                c = torch.relu(torch.add(torch.mul(torch.neg(a), b), b))
+                return torch.relu(torch.add(torch.mul(c, b), b))
+
+        def pattern(x, y):
+            return torch.relu(torch.add(torch.mul(x, y), y))
+
+        def replacement(x, y):
+            return torch.relu(torch.addcmul(y, x, y))
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        matches = replace_pattern(traced, pattern, replacement)
+        self.assertEqual(len(matches), 2)
+        traced.graph.lint(traced)
+        targets = [node.target for node in traced.graph.nodes]
+        self.assertNotIn(torch.mul, targets)
+        self.assertNotIn(torch.add, targets)
+        self.assertEqual(targets.count(torch.addcmul), 2)
+        self.assertEqual(targets.count(torch.relu), 2)
+        for node in traced.graph.nodes:
+            for user in node.users:
+                self.assertIn(user, list(traced.graph.nodes))
+        a, b = torch.rand(3), torch.rand(3)
+        self.assertEqual(traced(a, b), m(a, b))
+
+    def test_split_pipeline_stages(self):
+        class TestModule(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.layers = torch.nn.Sequential(
+                    torch.nn.Linear(8, 32), torch.nn.ReLU(),
+                    torch.nn.Linear(32, 32), torch.nn.ReLU(),
+                    torch.nn.Linear(32, 32), torch.nn.ReLU(),
+                    torch.nn.Linear(32, 8))
+
+            def forward(self, a):
+                return self.layers(a) + a
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        a = torch.rand(2, 8)
+        for num_stages in (1, 2, 3):
+            result = split_pipeline_stages(traced, num_stages)
+            self.assertEqual(len(result.stages), num_stages)
+            self.assertEqual(result.module_with_stages(a), m(a))
+            # the stages can run one after the other
+            ops = [node.op for node in result.module_with_stages.graph.nodes]
+            self.assertEqual(ops.count('call_module'), num_stages)
+
+        # the two 32x32 layers end up in different stages
+        result = split_pipeline_stages(traced, 2)
+        self.assertLess(max(result.stage_costs), 1.1 * min(result.stage_costs))
+
+        # profiled timings take precedence over parameter sizes
+        compute_nodes = [n for n in traced.graph.nodes if n.op in ('call_module', 'call_function')]
+        for node in compute_nodes:
+            node.elapsed_time = 1.0
+        result = split_pipeline_stages(traced, 4)
+        self.assertEqual(result.stage_costs, [2.0, 2.0, 2.0, 2.0])
+        self.assertEqual(result.module_with_stages(a), m(a))
+
+    def test_memory_planner(self):
+        def f(x):
+            a = x * 2
+            b = x * 3
+            return a.sum() + b.sum()
+
+        traced = symbolic_trace(f)
+        x = torch.rand(4, 4)
+        ShapeProp(traced).propagate(x)
+        nodes = {node.name: node for node in traced.graph.nodes}
+        last_uses = compute_last_uses(traced.graph)
+        self.assertIs(last_uses[nodes['mul']], nodes['sum_1'])
+        self.assertIs(last_uses[nodes['mul_1']], nodes['sum_2'])
+        self.assertIs(last_uses[nodes['add']], nodes['output'])
+
+        # a and b are alive at the same time
+        profile = analyze_memory(traced.graph)
+        self.assertEqual(profile.peak_bytes, 64 + 64 + 4)
+        self.assertIs(profile.peak_node, nodes['sum_1'])
+
+        # computing a.sum() before b frees a earlier
+        self.assertTrue(reorder_for_memory(traced.graph))
+        self.assertEqual([node.name for node in traced.graph.nodes],
+                         ['x', 'mul', 'sum_1', 'mul_1', 'sum_2', 'add', 'output'])
+        self.assertEqual(analyze_memory(traced.graph).peak_bytes, 4 + 64 + 4)
+        self.assertFalse(reorder_for_memory(traced.graph))
+        traced.recompile()
+        self.assertEqual(traced(x), f(x))
+
+        free_unused_values(traced)
+        self.assertIn('del mul', traced.code)
+        self.assertEqual(traced(x), f(x))
+        free_unused_values(traced, enable=False)
+        self.assertNotIn('del ', traced.code)
+
+    def test_reorder_for_memory_side_effects(self):
+        # Running `dot` as soon as `h` is computed would free `h` the earliest,
+        # but it must still read `t` after `t` is mutated
+        graph = torch.fx.Graph()
+        x = graph.placeholder('x')
+        t = graph.placeholder('t')
+        h = graph.call_function(operator.mul, (x, 2))
+        s = graph.call_method('sum', (h,))
+        setitem = graph.call_function(operator.setitem, (t, 0, s))
+        dot = graph.call_function(torch.dot, (t, h))
+        graph.output(dot)
+        order = list(graph.nodes)
+        self.assertFalse(reorder_for_memory(graph, {h: 100, s: 4, setitem: 50, dot: 4}))
+        self.assertEqual(list(graph.nodes), order)
+        gm = torch.fx.GraphModule(torch.nn.Module(), graph)
+        x, t = torch.rand(4), torch.rand(4)
+        expected = t.clone()
+        expected[0] = (x * 2).sum()
+        self.assertEqual(gm(x, t.clone()), torch.dot(expected, x * 2))
+
+        class TestModule(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.relu = torch.nn.ReLU(inplace=True)
+
+            def forward(self, x, t):
+                h = x * 2
+                self.relu(t)
+                return torch.dot(t, h)
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        nodes = {node.name: node for node in traced.graph.nodes}
+        order = list(traced.graph.nodes)
+        self.assertFalse(reorder_for_memory(traced.graph, {nodes['mul']: 100, nodes['relu']: 200, nodes['dot']: 4}))
+        self.assertEqual(list(traced.graph.nodes), order)
+        traced.recompile()
+        x, t = torch.rand(4), torch.randn(4)
+        self.assertEqual(traced(x, t.clone()), m(x, t.clone()))
+
+    def test_reorder_for_memory_modules(self):
+        class Branch(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.expand = torch.nn.Linear(4, 64)
+                self.reduce = torch.nn.Linear(64, 1)
+
+        class TestModule(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.a = Branch()
+                self.b = Branch()
+                self.bn = torch.nn.BatchNorm1d(1)
+
+            def forward(self, x):
+                h1 = self.a.expand(x)
+                h2 = self.b.expand(x)
+                u = self.bn(self.b.reduce(h2))
+                v = self.bn(self.a.reduce(h1))
+                return u + v
+
+        m = TestModule()
+        traced = symbolic_trace(m)
+        x = torch.rand(8, 4)
+        ShapeProp(traced).propagate(x)
+        self.assertEqual([node.name for node in traced.graph.nodes],
+                         ['x', 'a_expand', 'b_expand', 'b_reduce', 'bn', 'a_reduce', 'bn_1', 'add', 'output'])
+        # h1 and h2 are alive at the same time
+        self.assertEqual(analyze_memory(traced.graph).peak_bytes, 2 * 2048 + 32)
+        # module calls are barriers unless the root module is known
+        self.assertFalse(reorder_for_memory(traced.graph))
+
+        # reducing h1 before computing h2 frees it earlier, but the calls to bn
+        # keep their order, which its running statistics depend on
+        expected_module = copy.deepcopy(m)
+        self.assertTrue(reorder_for_memory(traced.graph, root=traced))
+        self.assertEqual([node.name for node in traced.graph.nodes],
+                         ['x', 'a_expand', 'a_reduce', 'b_expand', 'b_reduce', 'bn', 'bn_1', 'add', 'output'])
+        self.assertEqual(analyze_memory(traced.graph).peak_bytes, 2048 + 2 * 32)
+        traced.recompile()
+        self.assertEqual(traced(x), expected_module(x))
+        self.assertEqual(traced.bn.running_mean, expected_module.bn.running_mean)
+
 if __name__ == '__main__':
     run_tests()
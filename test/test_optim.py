@@ -332,6 +332,8 @@ class TestOptim(TestCase):
             ((optim.Adamax, optim._multi_tensor.Adamax), dict(weight_decay=1)),
             ((optim.Adadelta, optim._multi_tensor.Adadelta), dict(weight_decay=0)),
             ((optim.Adadelta, optim._multi_tensor.Adadelta), dict(weight_decay=1)),
+            ((optim.Adagrad, optim._multi_tensor.Adagrad), dict(weight_decay=0)),
+            ((optim.Adagrad, optim._multi_tensor.Adagrad), dict(weight_decay=1, lr_decay=0.1)),
         ]
 
         kIterations = 11
@@ -380,6 +382,82 @@ class TestOptim(TestCase):
                 self.assertEqual(p1, p2)
 
 
+    def test_flatten_parameters(self):
+        optimizers_with_flags = [
+            (optim.SGD, dict(lr=0.1, momentum=0.9, weight_decay=0.1)),
+            (optim.Adam, dict(lr=0.01, amsgrad=True)),
+            (optim_mt.Adam, dict(lr=0.01, weight_decay=0.1)),
+            (optim.RMSprop, dict(lr=0.01, momentum=0.5, centered=True)),
+        ]
+        input = torch.randn(4, 3)
+        for opt, flags in optimizers_with_flags:
+            model = torch.nn.Sequential(torch.nn.Linear(3, 5), torch.nn.LayerNorm(5), torch.nn.Linear(5, 1))
+            flat_model = deepcopy(model)
+            optimizer = opt(model.parameters(), **flags)
+            flat_optimizer = opt(flat_model.parameters(), **flags)
+            flat_optimizer.flatten_parameters()
+
+            params = list(flat_model.parameters())
+            flat = flat_optimizer._flat_params[0][0].param
+            for p in params:
+                self.assertTrue(flat.data_ptr() <= p.data_ptr() < flat.data_ptr() + flat.numel() * flat.element_size())
+
+            for _ in range(3):
+                for m, o in ((model, optimizer), (flat_model, flat_optimizer)):
+                    o.zero_grad(set_to_none=True)
+                    m(input).sum().backward()
+                    o.step()
+                self.assertEqual(list(model.parameters()), params)
+            # the state of each parameter is a view of the flat state
+            self.assertEqual(list(flat_optimizer.state), params)
+            for p, flat_p in zip(model.parameters(), params):
+                self.assertEqual(set(optimizer.state[p]), set(flat_optimizer.state[flat_p]))
+                for key, value in optimizer.state[p].items():
+                    self.assertEqual(value, flat_optimizer.state[flat_p][key])
+            # assigning to the state copies into the flat state
+            for s in flat_optimizer.state.values():
+                for key, value in s.items():
+                    s[key] = value.to(flat.device) if torch.is_tensor(value) else value
+            # the state dicts are interchangeable
+            self.assertEqual(optimizer.state_dict(), flat_optimizer.state_dict())
+            flat_optimizer.load_state_dict(optimizer.state_dict())
+            self.assertEqual(list(flat_optimizer.state), params)
+            self.assertEqual(optimizer.state_dict(), flat_optimizer.state_dict())
+            # copies stay flattened
+            flat_copy = deepcopy(flat_optimizer)
+            self.assertEqual(list(flat_copy._flat_params), [0])
+            self.assertEqual(flat_copy.state_dict(), flat_optimizer.state_dict())
+
+            # replaced gradients are copied into the flat buffer
+            for p, flat_p in zip(model.parameters(), params):
+                p.grad = torch.ones_like(p)
+                flat_p.grad = torch.ones_like(flat_p)
+            optimizer.step()
+            # closures see the parameters of the groups
+            flat_optimizer.step(lambda: self.assertEqual(flat_optimizer.param_groups[0]['params'], params))
+            self.assertEqual(list(model.parameters()), params)
+            self.assertEqual(flat.grad, torch.ones_like(flat))
+
+        # works with lr schedulers created before or after
+        for create_scheduler_first in (True, False):
+            param = torch.nn.Parameter(torch.ones(2))
+            optimizer = SGD([param, torch.nn.Parameter(torch.ones(3))], lr=1.)
+            if create_scheduler_first:
+                scheduler = StepLR(optimizer, step_size=1, gamma=0.5)
+                optimizer.flatten_parameters()
+            else:
+                optimizer.flatten_parameters()
+                scheduler = StepLR(optimizer, step_size=1, gamma=0.5)
+            with warnings.catch_warnings(record=True) as ws:
+                warnings.simplefilter("always")
+                for _ in range(2):
+                    param.sum().backward()
+                    optimizer.step()
+                    optimizer.zero_grad()
+                    scheduler.step()
+                self.assertEqual(len(ws), 0)
+            self.assertEqual(param, torch.full((2,), -0.5))
+
     def test_adam(self):
         for optimizer in [optim.Adam, optim_mt.Adam]:
             self._test_basic_cases(
@@ -445,17 +523,18 @@ class TestOptim(TestCase):
                 optimizer(None, lr=1e-2, weight_decay=-1)
 
     def test_sparse_adam(self):
-        self._test_rosenbrock_sparse(
-            lambda params: optim.SparseAdam(params, lr=4e-2),
-            [],
-            True
-        )
-        with self.assertRaisesRegex(ValueError, "Invalid beta parameter at index 0: 1.0"):
-            optim.SparseAdam(None, lr=1e-2, betas=(1.0, 0.0))
-        with self.assertRaisesRegex(ValueError, "SparseAdam requires dense parameter tensors"):
-            optim.SparseAdam([torch.zeros(3, layout=torch.sparse_coo)])
-        with self.assertRaisesRegex(ValueError, "SparseAdam requires dense parameter tensors"):
-            optim.SparseAdam([{"params": [torch.zeros(3, layout=torch.sparse_coo)]}])
+        for optimizer in [optim.SparseAdam, optim_mt.SparseAdam]:
+            self._test_rosenbrock_sparse(
+                lambda params: optimizer(params, lr=4e-2),
+                [],
+                True
+            )
+            with self.assertRaisesRegex(ValueError, "Invalid beta parameter at index 0: 1.0"):
+                optimizer(None, lr=1e-2, betas=(1.0, 0.0))
+            with self.assertRaisesRegex(ValueError, "SparseAdam requires dense parameter tensors"):
+                optimizer([torch.zeros(3, layout=torch.sparse_coo)])
+            with self.assertRaisesRegex(ValueError, "SparseAdam requires dense parameter tensors"):
+                optimizer([{"params": [torch.zeros(3, layout=torch.sparse_coo)]}])
 
     # ROCm precision is too low to pass this test
     @skipIfRocm
@@ -481,43 +560,45 @@ class TestOptim(TestCase):
                 optimizer(None, lr=1e-2, rho=1.1)
 
     def test_adagrad(self):
-        self._test_basic_cases(
-            lambda weight, bias: optim.Adagrad([weight, bias], lr=1e-1)
-        )
-        self._test_basic_cases(
-            lambda weight, bias: optim.Adagrad([weight, bias], lr=1e-1,
+        for optimizer in [optim.Adagrad, optim_mt.Adagrad]:
+            self._test_basic_cases(
+                lambda weight, bias: optimizer([weight, bias], lr=1e-1)
+            )
+            self._test_basic_cases(
+                lambda weight, bias: optimizer([weight, bias], lr=1e-1,
                                                initial_accumulator_value=0.1)
-        )
-        self._test_basic_cases(
-            lambda weight, bias: optim.Adagrad(
-                self._build_params_dict(weight, bias, lr=1e-2),
-                lr=1e-1)
-        )
-        self._test_basic_cases(
-            lambda weight, bias: optim.Adagrad(
-                self._build_params_dict(weight, bias, lr=1e-2),
-                lr=1e-1),
-            [lambda opt: ReduceLROnPlateau(opt)]
-        )
-        self._test_basic_cases(
-            lambda weight, bias: optim.Adagrad(
-                self._build_params_dict(weight, bias, lr=1e-2),
-                lr=1e-1),
-            [lambda opt: ReduceLROnPlateau(opt),
-             lambda opt: ExponentialLR(opt, gamma=0.99)]
-        )
-        with self.assertRaisesRegex(ValueError, "Invalid lr_decay value: -0.5"):
-            optim.Adagrad(None, lr=1e-2, lr_decay=-0.5)
+            )
+            self._test_basic_cases(
+                lambda weight, bias: optimizer(
+                    self._build_params_dict(weight, bias, lr=1e-2),
+                    lr=1e-1)
+            )
+            self._test_basic_cases(
+                lambda weight, bias: optimizer(
+                    self._build_params_dict(weight, bias, lr=1e-2),
+                    lr=1e-1),
+                [lambda opt: ReduceLROnPlateau(opt)]
+            )
+            self._test_basic_cases(
+                lambda weight, bias: optimizer(
+                    self._build_params_dict(weight, bias, lr=1e-2),
+                    lr=1e-1),
+                [lambda opt: ReduceLROnPlateau(opt),
+                 lambda opt: ExponentialLR(opt, gamma=0.99)]
+            )
+            with self.assertRaisesRegex(ValueError, "Invalid lr_decay value: -0.5"):
+                optimizer(None, lr=1e-2, lr_decay=-0.5)
 
     def test_adagrad_sparse(self):
-        self._test_rosenbrock_sparse(
-            lambda params: optim.Adagrad(params, lr=1e-1)
-        )
-        self._test_rosenbrock_sparse(
-            lambda params: optim.Adagrad(params, lr=0.1),
-            [lambda opt: StepLR(opt, gamma=1 - 1e-5, step_size=500),
-             lambda opt: ReduceLROnPlateau(opt, threshold=1e-4)]
-        )
+        for optimizer in [optim.Adagrad, optim_mt.Adagrad]:
+            self._test_rosenbrock_sparse(
+                lambda params: optimizer(params, lr=1e-1)
+            )
+            self._test_rosenbrock_sparse(
+                lambda params: optimizer(params, lr=0.1),
+                [lambda opt: StepLR(opt, gamma=1 - 1e-5, step_size=500),
+                 lambda opt: ReduceLROnPlateau(opt, threshold=1e-4)]
+            )
 
     def test_adamax(self):
         for optimizer in [optim.Adamax, optim_mt.Adamax]:
@@ -600,14 +681,15 @@ class TestOptim(TestCase):
                 optimizer(None, lr=1e-2, etas=(1.0, 0.5))
 
     def test_lbfgs(self):
-        self._test_basic_cases(
-            lambda weight, bias: optim.LBFGS([weight, bias]),
-            ignore_multidevice=True
-        )
-        self._test_basic_cases(
-            lambda weight, bias: optim.LBFGS([weight, bias], line_search_fn="strong_wolfe"),
-            ignore_multidevice=True
-        )
+        for optimizer in [optim.LBFGS, optim_mt.LBFGS]:
+            self._test_basic_cases(
+                lambda weight, bias: optimizer([weight, bias]),
+                ignore_multidevice=True
+            )
+            self._test_basic_cases(
+                lambda weight, bias: optimizer([weight, bias], line_search_fn="strong_wolfe"),
+                ignore_multidevice=True
+            )
 
     @unittest.skipIf(TEST_WITH_UBSAN, "division-by-zero error with UBSAN")
     def test_lbfgs_return_type(self):
@@ -1929,6 +2011,40 @@ class TestSWAUtils(TestCase):
         for p_avg, p_swa in zip(averaged_params, averaged_dnn.parameters()):
             self.assertEqual(p_avg, p_swa)
 
+    def test_averaged_model_ema_decay(self):
+        # Test AveragedModel with ema_decay against the equivalent avg_fn
+        dnn = torch.nn.Sequential(
+            torch.nn.Conv2d(1, 5, kernel_size=3),
+            torch.nn.Linear(5, 10)
+        )
+        alpha = 0.9
+
+        def avg_fn(p_avg, p, n_avg):
+            return alpha * p_avg + (1 - alpha) * p
+        averaged_dnn = AveragedModel(dnn, avg_fn=avg_fn)
+        ema_dnn = AveragedModel(dnn, ema_decay=alpha)
+        for _ in range(10):
+            for p in dnn.parameters():
+                p.detach().add_(torch.randn_like(p))
+            averaged_dnn.update_parameters(dnn)
+            ema_dnn.update_parameters(dnn)
+
+        for p_avg, p_ema in zip(averaged_dnn.parameters(), ema_dnn.parameters()):
+            self.assertEqual(p_avg, p_ema)
+        self.assertEqual(ema_dnn.n_averaged, averaged_dnn.n_averaged)
+
+        # modules without parameters are counted but have nothing to average
+        for kwargs in ({}, {'ema_decay': alpha}):
+            averaged_relu = AveragedModel(torch.nn.ReLU(), **kwargs)
+            for _ in range(2):
+                averaged_relu.update_parameters(torch.nn.ReLU())
+            self.assertEqual(averaged_relu.n_averaged, 2)
+
+        with self.assertRaisesRegex(ValueError, "cannot be used together"):
+            AveragedModel(dnn, avg_fn=avg_fn, ema_decay=alpha)
+        with self.assertRaisesRegex(ValueError, "Invalid ema_decay"):
+            AveragedModel(dnn, ema_decay=1.5)
+
     def _test_update_bn(self, dnn, dl_x, dl_xy, cuda):
 
         preactivation_sum = torch.zeros(dnn.n_features)
@@ -746,6 +746,95 @@ class TestSerialization(TestCase, SerializationMixin):
             torch.save(model, path)
             torch.load(path)
 
+    @unittest.skipIf(IS_WINDOWS, "torch.save with filename will open file twice, not supported in Windows.")
+    def test_serialization_mmap(self):
+        x = torch.randn(5, 5)
+        b = (x, x[1:], torch.arange(10, dtype=torch.int64), torch.tensor([True, False]))
+
+        with tempfile.NamedTemporaryFile() as f:
+            torch.save(b, f.name)
+            c = torch.load(f.name, mmap=True)
+            self.assertEqual(b, c)
+            # storage sharing is preserved for mapped storages
+            self.assertEqual(c[0].storage().data_ptr(), c[1].storage().data_ptr())
+            # every storage starts on the 64 byte alignment of the archive
+            for t in c:
+                self.assertEqual(t.storage().data_ptr() % 64, 0)
+
+            # the mapping is private, so writes don't reach the file
+            c[0].fill_(0)
+            d = torch.load(f.name)
+            self.assertEqual(b[0], d[0])
+
+            e = torch.load(pathlib.Path(f.name), mmap=True)
+            self.assertEqual(b, e)
+
+    def test_serialization_num_threads(self):
+        x = torch.randn(5, 5)
+        b = {'x': x, 'y': x[2:], 'z': [torch.arange(i) for i in range(20)]}
+
+        for num_threads in (1, 4):
+            with BytesIOContext() as f:
+                torch.save(b, f, num_threads=num_threads)
+                f.seek(0)
+                c = torch.load(f)
+            self.assertEqual(b, c)
+            self.assertEqual(c['x'].storage().data_ptr(), c['y'].storage().data_ptr())
+
+        with BytesIOContext() as f:
+            with self.assertRaisesRegex(ValueError, "zipfile"):
+                torch.save(b, f, _use_new_zipfile_serialization=False, num_threads=2)
+
+    def test_serialization_incremental(self):
+        model = torch.nn.Sequential(torch.nn.Embedding(1000, 16), torch.nn.Linear(16, 4))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = [os.path.join(tmpdir, f'ckpt{i}.pt') for i in range(3)]
+            torch.save(model.state_dict(), paths[0])
+
+            with torch.no_grad():
+                model[1].weight.add_(1)
+            torch.save(model.state_dict(), paths[1], incremental_base=paths[0])
+
+            with torch.no_grad():
+                model[1].bias.add_(1)
+            torch.save(model.state_dict(), paths[2], incremental_base=paths[1])
+
+            # the embedding table is only stored in the first checkpoint
+            self.assertLess(os.path.getsize(paths[2]), os.path.getsize(paths[0]) // 2)
+            with zipfile.ZipFile(paths[2]) as zf:
+                data_records = [n for n in zf.namelist() if '/data/' in n]
+            self.assertEqual(len(data_records), 1)
+
+            for mmap in (False, True):
+                state = torch.load(paths[2], mmap=mmap)
+                self.assertEqual(state, model.state_dict())
+
+            # checkpoints of the chain can't be overwritten by a checkpoint based on it
+            for path in (paths[0], paths[2]):
+                with self.assertRaisesRegex(ValueError, "can't overwrite"):
+                    torch.save(model.state_dict(), path, incremental_base=paths[2])
+            self.assertEqual(torch.load(paths[2]), model.state_dict())
+
+            # references are relative, so the chain can be moved as a whole
+            moved = os.path.join(tmpdir, 'moved')
+            os.mkdir(moved)
+            for path in paths:
+                shutil.move(path, moved)
+            state = torch.load(os.path.join(moved, 'ckpt2.pt'))
+            self.assertEqual(state, model.state_dict())
+
+            with open(os.path.join(moved, 'ckpt2.pt'), 'rb') as f:
+                with self.assertRaisesRegex(RuntimeError, "file name"):
+                    torch.load(f)
+
+    def test_serialization_mmap_requires_path(self):
+        with BytesIOContext() as f:
+            torch.save(torch.randn(3), f)
+            f.seek(0)
+            with self.assertRaisesRegex(ValueError, "expects a file name"):
+                torch.load(f, mmap=True)
+
     def run(self, *args, **kwargs):
         with serialization_method(use_zip=True):
             return super(TestSerialization, self).run(*args, **kwargs)
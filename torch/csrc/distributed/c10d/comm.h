@@ -16,13 +16,29 @@ void broadcast_coalesced(
     int rank = 0);
 
 // This class passes bucket contents tensor (for multiple replicas) to
-// DDP communication hook.
-// Optionally in the future this can be enhanced with parameter to bucket
-// mappings as well.
+// DDP communication hook, along with the parameter to bucket mapping.
 class GradBucket {
  public:
-  explicit GradBucket(const std::vector<at::Tensor>& tensors)
-      : tensors_(tensors) {}
+  explicit GradBucket(
+      size_t index,
+      const std::vector<at::Tensor>& tensors,
+      const std::vector<size_t>& offsets = {},
+      const std::vector<size_t>& lengths = {},
+      const std::vector<std::vector<int64_t>>& sizes_list = {},
+      const std::vector<size_t>& variable_indices = {})
+      : index_(index),
+        tensors_(tensors),
+        offsets_(offsets),
+        lengths_(lengths),
+        sizes_list_(sizes_list),
+        variable_indices_(variable_indices) {}
+
+  // Returns the index of the bucket, i.e., the order in which the buckets of
+  // an iteration are passed to the hook.
+  size_t getIndex() const {
+    return index_;
+  }
+
   // Each tensor in the list that getTensors returns refers to the replica on
   // each device. There will be multiple replicas only in the case of single
   // process multiple device mode. In the single process single device mode,
@@ -31,8 +47,35 @@ class GradBucket {
     return tensors_;
   }
 
+  // Offset and length of the gradient of each parameter of the bucket in the
+  // flat bucket tensor.
+  const std::vector<size_t>& getOffsets() const {
+    return offsets_;
+  }
+
+  const std::vector<size_t>& getLengths() const {
+    return lengths_;
+  }
+
+  // Sizes of the gradient of each parameter of the bucket.
+  const std::vector<std::vector<int64_t>>& getSizesList() const {
+    return sizes_list_;
+  }
+
+  // Indices of the parameters of the bucket in the list of the parameters of
+  // the model, which unlike the bucket index do not change when the buckets
+  // are rebuilt.
+  const std::vector<size_t>& getVariableIndices() const {
+    return variable_indices_;
+  }
+
  private:
+  size_t index_;
   std::vector<at::Tensor> tensors_;
+  std::vector<size_t> offsets_;
+  std::vector<size_t> lengths_;
+  std::vector<std::vector<int64_t>> sizes_list_;
+  std::vector<size_t> variable_indices_;
 };
 
 // DDP's c10d reducer allows communication hooks defined as a sub class
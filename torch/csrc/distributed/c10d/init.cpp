@@ -154,7 +154,31 @@ PyObject* c10d_init(PyObject* _unused, PyObject* noargs) {
       py::arg("comm_hook"));
 
   shared_ptr_class_<::c10d::GradBucket>(module, "_GradBucket")
-      .def(py::init<std::vector<Tensor>&>(), py::arg("tensors"))
+      .def(
+          py::init<
+              size_t,
+              const std::vector<Tensor>&,
+              const std::vector<size_t>&,
+              const std::vector<size_t>&,
+              const std::vector<std::vector<int64_t>>&,
+              const std::vector<size_t>&>(),
+          py::arg("index"),
+          py::arg("tensors"),
+          py::arg("offsets") = std::vector<size_t>(),
+          py::arg("lengths") = std::vector<size_t>(),
+          py::arg("sizes_list") = std::vector<std::vector<int64_t>>(),
+          py::arg("variable_indices") = std::vector<size_t>())
+      .def(
+          "get_index",
+          &::c10d::GradBucket::getIndex,
+          py::call_guard<py::gil_scoped_release>(),
+          R"(
+            ``get_index`` returns the index of the bucket, i.e., the order in
+            which the buckets of an iteration are passed to the hook. The
+            buckets, and hence their indices, may change once after the first
+            iteration, when DDP rebuilds them in the order the gradients are
+            ready.
+           )")
       .def(
           "get_tensors",
           &::c10d::GradBucket::getTensors,
@@ -165,6 +189,39 @@ PyObject* c10d_init(PyObject* _unused, PyObject* noargs) {
             replicas only in the case of single process multiple device mode. In
             the single process single device mode, this list would consist of only
             a single tensor.
+           )")
+      .def(
+          "get_offsets",
+          &::c10d::GradBucket::getOffsets,
+          py::call_guard<py::gil_scoped_release>(),
+          R"(
+            ``get_offsets`` returns the offset of the gradient of each parameter
+            of the bucket in the flat bucket tensors.
+           )")
+      .def(
+          "get_lengths",
+          &::c10d::GradBucket::getLengths,
+          py::call_guard<py::gil_scoped_release>(),
+          R"(
+            ``get_lengths`` returns the number of elements of the gradient of
+            each parameter of the bucket.
+           )")
+      .def(
+          "get_sizes_list",
+          &::c10d::GradBucket::getSizesList,
+          py::call_guard<py::gil_scoped_release>(),
+          R"(
+            ``get_sizes_list`` returns the sizes of the gradient of each
+            parameter of the bucket.
+           )")
+      .def(
+          "get_variable_indices",
+          &::c10d::GradBucket::getVariableIndices,
+          py::call_guard<py::gil_scoped_release>(),
+          R"(
+            ``get_variable_indices`` returns the index of each parameter of the
+            bucket in the parameters of the model. Unlike ``get_index``, these
+            do not change when the buckets are rebuilt.
            )");
 
   shared_ptr_class_<::c10d::Reducer>(module, "Reducer")
@@ -698,7 +698,20 @@ void Reducer::mark_bucket_ready(size_t bucket_index) {
     if (comm_hook_ == nullptr) {
       bucket.work = process_group_->allreduce(tensors);
     } else {
-      bucket.future_work = comm_hook_->runHook(GradBucket(tensors));
+      // The parameter to bucket mapping is the same for all the replicas
+      const auto& replica = bucket.replicas[0];
+      std::vector<std::vector<int64_t>> sizes_list;
+      sizes_list.reserve(replica.variables.size());
+      for (const auto& variable : replica.variables) {
+        sizes_list.push_back(variable.sizes().vec());
+      }
+      bucket.future_work = comm_hook_->runHook(GradBucket(
+          next_bucket_,
+          tensors,
+          replica.offsets,
+          replica.lengths,
+          sizes_list,
+          bucket.variable_indices));
     }
   }
 }
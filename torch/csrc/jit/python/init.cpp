@@ -785,6 +785,8 @@ void initJITBindings(PyObject* module) {
       .def(py::init<std::string>())
       .def(py::init([](const py::object& buffer) {
         auto writer_func = [=](const void* data, size_t size) {
+          // write_record releases the GIL, see below
+          py::gil_scoped_acquire acquire;
           auto bytes = py::bytes(reinterpret_cast<const char*>(data), size);
           buffer.attr("write")(std::move(bytes));
           return size;
@@ -792,12 +794,16 @@ void initJITBindings(PyObject* module) {
         return std::make_unique<PyTorchStreamWriter>(std::move(writer_func));
       }))
       .def(py::init<const std::function<size_t(const void*, size_t)>&>())
+      // Records can be large, so the GIL is released while they are written
+      // to let torch.save overlap writing with other work (see
+      // _save_streaming in torch/serialization.py).
       .def(
           "write_record",
           [](PyTorchStreamWriter& self,
              const std::string& name,
              const char* data,
-             size_t size) { return self.writeRecord(name, data, size); })
+             size_t size) { return self.writeRecord(name, data, size); },
+          py::call_guard<py::gil_scoped_release>())
       .def("write_end_of_file", &PyTorchStreamWriter::writeEndOfFile)
       .def(
           "write_record",
@@ -807,7 +813,8 @@ void initJITBindings(PyObject* module) {
              size_t size) {
             return self.writeRecord(
                 name, reinterpret_cast<const char*>(data), size);
-          });
+          },
+          py::call_guard<py::gil_scoped_release>());
 
   py::enum_<MobileOptimizerType>(m, "MobileOptimizerType")
       .value("CONV_BN_FUSION", MobileOptimizerType::CONV_BN_FUSION)
@@ -921,6 +928,57 @@ void initJITBindings(PyObject* module) {
                     at::CPU(scalar_type).typeMeta());
             return at::Tensor(std::move(ptr));
           })
+      .def(
+          "get_record_offset",
+          [](PyTorchStreamReader& self, const std::string& key) {
+            return self.getRecordOffset(key);
+          })
+      .def(
+          "get_storage_from_mapped_record",
+          [](PyTorchStreamReader& self,
+             const std::string& key,
+             const at::Tensor& mapped_file,
+             size_t numel,
+             py::object data_type_obj) {
+            // `mapped_file` is a uint8 tensor backed by a mapping of the whole
+            // archive (see torch.load(..., mmap=True)). Records written by
+            // PyTorchStreamWriter are stored uncompressed and 64 byte aligned,
+            // so the storage can point straight into the mapping.
+            auto scalar_type =
+                reinterpret_cast<THPDtype*>(data_type_obj.ptr())->scalar_type;
+            size_t offset = self.getRecordOffset(key);
+            size_t nbytes = numel * elementSize(scalar_type);
+            TORCH_CHECK(
+                mapped_file.scalar_type() == at::kByte &&
+                    mapped_file.is_contiguous(),
+                "expected a contiguous uint8 tensor for the mapped archive");
+            TORCH_CHECK(
+                offset + nbytes <= static_cast<size_t>(mapped_file.numel()),
+                "record '",
+                key,
+                "' lies outside of the mapped archive");
+
+            // The new storage keeps the mapping alive through its context.
+            auto* base = new c10::Storage(mapped_file.storage());
+            at::DataPtr data(
+                static_cast<uint8_t*>(mapped_file.data_ptr()) + offset,
+                base,
+                [](void* ctx) { delete static_cast<c10::Storage*>(ctx); },
+                at::kCPU);
+
+            c10::Storage storage(
+                c10::Storage::use_byte_size_t(),
+                nbytes,
+                std::move(data),
+                /*allocator=*/nullptr,
+                /*resizable=*/false);
+            auto ptr =
+                c10::make_intrusive<at::TensorImpl, at::UndefinedTensorImpl>(
+                    std::move(storage),
+                    at::DispatchKeySet(),
+                    at::CPU(scalar_type).typeMeta());
+            return at::Tensor(std::move(ptr));
+          })
       .def("get_all_records", [](PyTorchStreamReader& self) {
         return self.getAllRecords();
       });
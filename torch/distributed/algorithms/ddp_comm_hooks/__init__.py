@@ -2,7 +2,9 @@ from enum import Enum
 from functools import partial
 
 import torch.distributed.algorithms.ddp_comm_hooks.default_hooks as default
+import torch.distributed.algorithms.ddp_comm_hooks.powerSGD_hook as powerSGD
 import torch.distributed.algorithms.ddp_comm_hooks.quantization_hooks as quantization
+import torch.distributed.algorithms.ddp_comm_hooks.topk_hook as topk
 from torch.nn.parallel import DistributedDataParallel
 
 
@@ -10,6 +12,29 @@ def _ddp_comm_hook_wrapper(comm_hook, model, state):
     model._register_comm_hook(state, comm_hook)
 
 
+def _powerSGD_comm_hook_wrapper(
+    comm_hook, model, state, matrix_approximation_rank
+):
+    """
+    To be consistent with the wrappers of other DDP comm hooks, the input state
+    only needs to be a process group, which will be wrapped up with other state
+    info.
+    """
+    powerSGD_state = powerSGD.PowerSGDState(
+        process_group=state, matrix_approximation_rank=matrix_approximation_rank
+    )
+    model._register_comm_hook(powerSGD_state, comm_hook)
+
+
+def _topk_comm_hook_wrapper(comm_hook, model, state, compress_ratio):
+    """
+    Like ``_powerSGD_comm_hook_wrapper``, wraps up the input process group
+    with other state info.
+    """
+    topk_state = topk.TopKState(process_group=state, compress_ratio=compress_ratio)
+    model._register_comm_hook(topk_state, comm_hook)
+
+
 class DDPCommHookType(Enum):
     """
     DDPCommHookType enumerates the hooks of ``torch.distributed.algorithms.ddp_comm_hooks``
@@ -28,6 +53,21 @@ class DDPCommHookType(Enum):
     QUANTIZE_PER_CHANNEL = partial(
         _ddp_comm_hook_wrapper, comm_hook=quantization.quantization_perchannel_hook
     )
+    POWER_SGD = partial(
+        _powerSGD_comm_hook_wrapper,
+        comm_hook=powerSGD.powerSGD_hook,
+        matrix_approximation_rank=1,
+    )
+    # Rank-2 PowerSGD can give a higher accuracy than the default rank-1 version,
+    # but it runs slower and consumes more memory.
+    POWER_SGD_RANK2 = partial(
+        _powerSGD_comm_hook_wrapper,
+        comm_hook=powerSGD.powerSGD_hook,
+        matrix_approximation_rank=2,
+    )
+    TOPK = partial(
+        _topk_comm_hook_wrapper, comm_hook=topk.topk_hook, compress_ratio=0.01
+    )
 
 
 def register_ddp_comm_hook(
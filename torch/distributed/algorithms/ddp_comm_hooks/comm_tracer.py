@@ -0,0 +1,253 @@
+import time
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+
+import torch
+import torch.distributed as dist
+from torch.autograd.profiler import EventList, FunctionEvent
+from torch.distributed.algorithms.ddp_comm_hooks import default_hooks as default
+from torch.nn.parallel import DistributedDataParallel
+
+
+class BucketEvent(NamedTuple):
+    """The communication of one bucket, as recorded by DDPCommTracer."""
+    # Index of the iteration, counted by forward passes
+    iteration: int
+    # Index of the bucket in the iteration, as returned by GradBucket.get_index()
+    bucket_index: int
+    # Times in microseconds since the tracer was created. A bucket is ready
+    # once the gradients of all its parameters are computed, and launched once
+    # all the previous buckets are launched too.
+    ready_time: int
+    launch_time: int
+    completion_time: int
+    # Size of the bucket tensor
+    num_bytes: int
+
+
+class IterationStats(NamedTuple):
+    """Statistics of the communication of one iteration, in microseconds."""
+    iteration: int
+    num_buckets: int
+    num_bytes: int
+    # From the first to the last bucket ready
+    backward_time: int
+    # Sum of the times from the launch to the completion of each bucket
+    comm_time: int
+    # From the last bucket ready to the last bucket completed, i.e., the part
+    # of the communication that is not overlapped with the backward pass
+    exposed_comm_time: int
+
+
+class DDPCommTracer(object):
+    r"""
+    Records when the communication of each bucket of a
+    :class:`~torch.nn.parallel.DistributedDataParallel` model is ready,
+    launched and completed, to measure how much of it overlaps with the
+    backward pass, e.g. to tune ``bucket_cap_mb``.
+
+    The tracer registers itself as the communication hook of the model,
+    wrapping ``comm_hook``, so it must be created before the first iteration
+    and the model cannot have another hook. It also registers a forward
+    pre-hook counting the iterations, and a hook on each parameter recording
+    when its gradient is computed.
+
+    For CUDA models, the times are taken from CUDA events recorded on the
+    streams computing the gradients and running the communication, so that
+    they reflect when the work runs on the device. The events are only
+    resolved when the results are read, through :attr:`bucket_events`,
+    :meth:`iteration_stats` or :meth:`events`, which waits for the recorded
+    work to complete. For other models, the completion time is taken when the
+    future returned by ``comm_hook`` completes.
+
+    .. note::
+        Process groups that do not support ``Work.get_future()``, such as
+        Gloo, wait for each collective in the default hooks (see
+        ``default_hooks._get_future``). With such process groups, the traced
+        communication of each bucket is synchronous, unlike the asynchronous
+        allreduce of DDP without a communication hook, so the measured overlap
+        is a lower bound.
+
+    Arguments:
+        module (DistributedDataParallel): the model to trace.
+        comm_hook (callable, optional): the hook communicating the buckets,
+            see ``torch.distributed.algorithms.ddp_comm_hooks``
+            (default: ``allreduce_hook``).
+        state (object, optional): the state of ``comm_hook`` (default: the
+            process group of the model).
+
+    Example::
+
+        >>> ddp = DistributedDataParallel(model, device_ids=[rank], bucket_cap_mb=10)
+        >>> tracer = DDPCommTracer(ddp)
+        >>> for input in inputs:
+        >>>     ddp(input).sum().backward()
+        >>> print(tracer.iteration_stats()[-1].exposed_comm_time)
+        >>> tracer.export_chrome_trace("ddp_comm_trace.json")
+    """
+
+    def __init__(self, module: DistributedDataParallel, comm_hook=None, state=None):
+        if comm_hook is None:
+            comm_hook = default.allreduce_hook
+            state = module.process_group
+        self.comm_hook = comm_hook
+        self.state = state
+        self.iteration = -1
+        self._start = time.perf_counter()
+        self._bucket_events: List[BucketEvent] = []
+        # Buckets whose times may still be CUDA events, or whose completion is
+        # not recorded yet, see bucket_events
+        self._pending_buckets: List[List[Any]] = []
+        # Parameter index -> time its gradient was last computed
+        self._grad_ready_times: Dict[int, _Time] = {}
+        # CUDA device -> (time, event) the CUDA events of the current iteration
+        # on that device are timed from
+        self._cuda_anchors: Dict[torch.device, Tuple[int, torch.cuda.Event]] = {}
+
+        module.register_forward_pre_hook(self._start_iteration)
+        for index, param in enumerate(module._reducer_parameters):
+            param.register_hook(self._grad_hook(index))
+        module._register_comm_hook(self, _traced_hook)
+
+    def _now(self) -> int:
+        return int((time.perf_counter() - self._start) * 1e6)
+
+    def _start_iteration(self, module, inputs) -> None:
+        self.iteration += 1
+        self._grad_ready_times.clear()
+        self._cuda_anchors = {}
+
+    def _grad_hook(self, index):
+        def hook(grad):
+            self._grad_ready_times[index] = self._time(grad.device)
+        return hook
+
+    def _time(self, device: torch.device) -> '_Time':
+        # The current time, as a CUDA event on the current stream for CUDA
+        # devices. The first event of an iteration on a device is preceded by
+        # an anchor event, recorded with the current time.
+        if device.type != 'cuda':
+            return self._now()
+        stream = torch.cuda.current_stream(device)
+        if device not in self._cuda_anchors:
+            anchor = torch.cuda.Event(enable_timing=True)
+            anchor.record(stream)
+            self._cuda_anchors[device] = (self._now(), anchor)
+        event = torch.cuda.Event(enable_timing=True)
+        event.record(stream)
+        return _CudaTime(event, self._cuda_anchors[device])
+
+    @property
+    def bucket_events(self) -> List[BucketEvent]:
+        r"""
+        The communication of each bucket, in the order of launch, up to the
+        first one whose future hasn't completed. Waits for the recorded CUDA
+        work to complete.
+        """
+        num_resolved = 0
+        for pending in self._pending_buckets:
+            iteration, bucket_index, ready_times, launch_time, completion_time, num_bytes = pending
+            if completion_time is None:
+                break
+            launch = _resolve(launch_time)
+            ready = max((_resolve(t) for t in ready_times), default=launch)
+            self._bucket_events.append(BucketEvent(
+                iteration, bucket_index, ready, launch, _resolve(completion_time), num_bytes))
+            num_resolved += 1
+        del self._pending_buckets[:num_resolved]
+        return self._bucket_events
+
+    def iteration_stats(self) -> List[IterationStats]:
+        r"""
+        Returns the statistics of each iteration with communication, in order.
+        """
+        events_per_iteration: Dict[int, List[BucketEvent]] = {}
+        for event in self.bucket_events:
+            events_per_iteration.setdefault(event.iteration, []).append(event)
+        stats = []
+        for iteration, events in sorted(events_per_iteration.items()):
+            first_ready = min(e.ready_time for e in events)
+            last_ready = max(e.ready_time for e in events)
+            last_completion = max(e.completion_time for e in events)
+            stats.append(IterationStats(
+                iteration=iteration,
+                num_buckets=len(events),
+                num_bytes=sum(e.num_bytes for e in events),
+                backward_time=last_ready - first_ready,
+                comm_time=sum(e.completion_time - e.launch_time for e in events),
+                exposed_comm_time=max(0, last_completion - last_ready)))
+        return stats
+
+    def events(self) -> EventList:
+        r"""
+        Returns the recorded events as an
+        :class:`~torch.autograd.profiler.EventList`: for each bucket, the wait
+        from ready to launch and the communication from launch to completion,
+        and for each iteration, the exposed communication.
+        """
+        function_events = []
+
+        def add(name, thread, start, end):
+            function_events.append(FunctionEvent(
+                id=len(function_events), node_id=-1, name=name, thread=thread,
+                cpu_start=start, cpu_end=end, is_remote=False))
+
+        for e in self.bucket_events:
+            prefix = "iteration_{} bucket_{}".format(e.iteration, e.bucket_index)
+            add("{} wait".format(prefix), 0, e.ready_time, e.launch_time)
+            add("{} comm ({} bytes)".format(prefix, e.num_bytes), 1, e.launch_time, e.completion_time)
+        for s in self.iteration_stats():
+            end = max(e.completion_time for e in self.bucket_events if e.iteration == s.iteration)
+            add("iteration_{} exposed comm".format(s.iteration), 2, end - s.exposed_comm_time, end)
+        return EventList(function_events, use_cuda=False)
+
+    def export_chrome_trace(self, path: str) -> None:
+        r"""
+        Exports the events returned by :meth:`events` as a Chrome tracing
+        tools file, like
+        :meth:`torch.autograd.profiler.EventList.export_chrome_trace`.
+
+        Arguments:
+            path (str): Path where the trace will be written.
+        """
+        events = self.events()
+        if not events:
+            with open(path, 'w') as f:
+                f.write("[]")
+            return
+        events.export_chrome_trace(path)
+
+
+class _CudaTime(NamedTuple):
+    # A time recorded as a CUDA event, and the anchor it is timed from
+    event: torch.cuda.Event
+    anchor: Tuple[int, torch.cuda.Event]
+
+
+_Time = Union[int, _CudaTime]
+
+
+def _resolve(t: _Time) -> int:
+    if not isinstance(t, _CudaTime):
+        return t
+    anchor_time, anchor = t.anchor
+    t.event.synchronize()
+    return anchor_time + int(anchor.elapsed_time(t.event) * 1000)
+
+
+def _traced_hook(tracer: DDPCommTracer, bucket: dist._GradBucket) -> torch.futures.Future:
+    tensor = bucket.get_tensors()[0]
+    launch_time = tracer._time(tensor.device)
+    ready_times = [tracer._grad_ready_times[i] for i in bucket.get_variable_indices()
+                   if i in tracer._grad_ready_times]
+    pending = [tracer.iteration, bucket.get_index(), ready_times, launch_time, None,
+               tensor.numel() * tensor.element_size()]
+    tracer._pending_buckets.append(pending)
+
+    def record_completion(fut):
+        # For NCCL, this runs when the hook is called, on a stream waiting for
+        # the communication, on which the completion event is recorded.
+        # Otherwise, it runs when the communication completes.
+        pending[4] = tracer._time(tensor.device)
+        return fut.value()
+
+    return tracer.comm_hook(tracer.state, bucket).then(record_completion)
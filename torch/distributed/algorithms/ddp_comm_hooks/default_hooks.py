@@ -2,6 +2,22 @@ import torch
 import torch.distributed as dist
 
 
+def _get_future(work, tensors) -> torch.futures.Future:
+    """
+        Returns a ``torch.futures.Future`` holding the output ``tensors`` of the
+        asynchronous collective ``work``. The works of the process groups that do
+        not support ``get_future``, e.g. Gloo, are waited for instead, in which case
+        the returned future is already completed.
+    """
+    try:
+        return work.get_future()
+    except RuntimeError:
+        work.wait()
+        fut = torch.futures.Future()
+        fut.set_result(tensors)
+        return fut
+
+
 def allreduce_hook(
     process_group: object, bucket: dist._GradBucket
 ) -> torch.futures.Future:
@@ -23,7 +39,9 @@ def allreduce_hook(
     )
 
     tensor = bucket.get_tensors()[0]
-    fut = dist.all_reduce(tensor, group=group_to_use, async_op=True).get_future()
+    fut = _get_future(
+        dist.all_reduce(tensor, group=group_to_use, async_op=True), [tensor]
+    )
 
     def then_callback(fut):
         return [fut.value()[0].div_(world_size)]
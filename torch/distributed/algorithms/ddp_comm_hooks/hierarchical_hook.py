@@ -0,0 +1,134 @@
+import torch
+import torch.distributed as dist
+from torch.distributed.algorithms.ddp_comm_hooks.default_hooks import _get_future
+
+
+class HierarchicalState(object):
+    """
+        Creates and stores the process groups of ``hierarchical_allreduce_hook``:
+        the intra-node group of the ranks on the same node as this rank, and the
+        inter-node group of the ranks with the same local rank as this rank on
+        the other nodes. The ranks of the default process group are assumed to
+        be numbered node by node, as done by ``torch.distributed.launch``, i.e.,
+        rank ``r`` is local rank ``r % local_world_size`` of node
+        ``r // local_world_size``.
+
+        This calls ``torch.distributed.new_group``, so it must be called by all
+        the ranks of the default process group, in the same order with respect
+        to other calls of ``new_group``.
+
+        Arguments:
+            local_world_size (int): the number of ranks on each node.
+    """
+
+    def __init__(self, local_world_size):
+        world_size = dist.get_world_size()
+        rank = dist.get_rank()
+        if local_world_size < 1 or world_size % local_world_size != 0:
+            raise ValueError(
+                "Invalid local_world_size: {}, it should divide the world size {}".format(
+                    local_world_size, world_size
+                )
+            )
+        self.local_world_size = local_world_size
+        self.num_nodes = world_size // local_world_size
+        self.local_rank = rank % local_world_size
+        self.node_rank = rank // local_world_size
+
+        # Every rank must take part in the creation of every group.
+        self.intra_node_group = None
+        for node_rank in range(self.num_nodes):
+            ranks = list(
+                range(node_rank * local_world_size, (node_rank + 1) * local_world_size)
+            )
+            group = dist.new_group(ranks)
+            if node_rank == self.node_rank:
+                self.intra_node_group = group
+                self.intra_node_ranks = ranks
+        self.inter_node_group = None
+        for local_rank in range(local_world_size):
+            group = dist.new_group(list(range(local_rank, world_size, local_world_size)))
+            if local_rank == self.local_rank:
+                self.inter_node_group = group
+
+
+def _reduce_scatter_fut(state, shard, chunks):
+    if dist.get_backend(state.intra_node_group) != dist.Backend.GLOO:
+        return _get_future(
+            dist.reduce_scatter(
+                shard, chunks, group=state.intra_node_group, async_op=True
+            ),
+            [shard],
+        )
+    # Gloo does not support reduce_scatter, reduce each chunk to its rank instead.
+    works = [
+        dist.reduce(chunk, dst=dst, group=state.intra_node_group, async_op=True)
+        for chunk, dst in zip(chunks, state.intra_node_ranks)
+    ]
+    for work in works:
+        work.wait()
+    shard.copy_(chunks[state.local_rank])
+    fut = torch.futures.Future()
+    fut.set_result([shard])
+    return fut
+
+
+def hierarchical_allreduce_hook(
+    state: HierarchicalState, bucket: dist._GradBucket
+) -> torch.futures.Future:
+    """
+        This DDP communication hook allreduces ``GradBucket`` tensors in two levels,
+        so that only ``1 / local_world_size`` of each bucket is sent across nodes by
+        each rank:
+
+        1. Reduce-scatters the bucket within each node, so that each local rank
+           holds the sum over the node of one of ``local_world_size`` shards;
+        2. Allreduces each shard across the nodes, between the ranks holding it;
+        3. Allgathers the shards within each node, and takes the mean.
+
+        Compared to ``allreduce_hook``, whose ring allreduce sends every bucket
+        over the slowest link, this only sends one shard per rank over the
+        network between nodes, while the rest of the traffic stays within the
+        nodes. The hook assumes DDP uses the default process group, and works
+        with Gloo (emulating the reduce-scatter with reduces) as well as NCCL.
+
+        Example::
+            >>> state = HierarchicalState(local_world_size=8)
+            >>> ddp_model._register_comm_hook(state, hierarchical_allreduce_hook)
+    """
+    world_size = dist.get_world_size()
+    local_world_size = state.local_world_size
+
+    tensor = bucket.get_tensors()[0]
+    numel = tensor.numel()
+    shard_numel = (numel + local_world_size - 1) // local_world_size
+    if shard_numel * local_world_size == numel:
+        padded_tensor = tensor
+    else:
+        padded_tensor = torch.zeros(
+            shard_numel * local_world_size, device=tensor.device, dtype=tensor.dtype
+        )
+        padded_tensor[:numel].copy_(tensor)
+    chunks = list(padded_tensor.split(shard_numel))
+    shard = torch.empty_like(chunks[0])
+
+    fut = _reduce_scatter_fut(state, shard, chunks)
+
+    def allreduce_across_nodes(fut):
+        shard = fut.value()[0]
+        return _get_future(
+            dist.all_reduce(shard, group=state.inter_node_group, async_op=True),
+            [shard],
+        ).wait()
+
+    def allgather_within_node(fut):
+        shard = fut.value()[0]
+        _get_future(
+            dist.all_gather(chunks, shard, group=state.intra_node_group, async_op=True),
+            [chunks],
+        ).wait()
+        if padded_tensor is not tensor:
+            tensor.copy_(padded_tensor[:numel])
+        return [tensor.div_(world_size)]
+
+    return fut.then(allreduce_across_nodes).then(allgather_within_node)
@@ -0,0 +1,227 @@
+import torch
+import torch.distributed as dist
+from torch.distributed.algorithms.ddp_comm_hooks.default_hooks import _get_future
+
+
+def _orthogonalize(matrix, epsilon=1e-8):
+    """
+    Orthonormalizes the columns of ``matrix`` in place with the Gram-Schmidt
+    process. ``epsilon`` avoids dividing by zero when a column is all zeros.
+    """
+    num_cols = matrix.shape[1]
+    for i in range(num_cols):
+        col = matrix[:, i : i + 1]
+        col.div_(torch.norm(col) + epsilon)
+        if i + 1 < num_cols:
+            rest = matrix[:, i + 1 :]
+            rest.sub_(col @ (col.t() @ rest))
+
+
+def _should_compress(sizes, matrix_approximation_rank):
+    """
+    Returns whether a gradient of the given ``sizes`` is sent as a low-rank
+    approximation, i.e., whether it is a matrix (or a tensor seen as a matrix by
+    flattening all its dimensions but the first one) whose factors are smaller
+    than the matrix itself.
+    """
+    if len(sizes) < 2:
+        return False
+    num_rows = sizes[0]
+    num_cols = 1
+    for size in sizes[1:]:
+        num_cols *= size
+    rank = min(num_rows, num_cols, matrix_approximation_rank)
+    return rank * (num_rows + num_cols) < num_rows * num_cols
+
+
+class PowerSGDState(object):
+    """
+        Stores the hyperparameters of ``powerSGD_hook`` and the state it keeps
+        across iterations: the error of the last approximation of each
+        gradient for error feedback, and the last ``Q`` factor of each gradient
+        to warm-start the next approximation. The state is keyed by parameter
+        rather than by bucket, so it survives the rebuild of the buckets after
+        the first iteration.
+
+        Arguments:
+            process_group (ProcessGroup): the process group to communicate
+                with, ``None`` for the default process group.
+            matrix_approximation_rank (int): the rank of the approximation of
+                the gradients. Higher ranks give more accurate approximations,
+                at the cost of more computation and communication (default: 1).
+            use_error_feedback (bool): whether to add the error of the last
+                approximation of each gradient to the gradient before
+                approximating it, so that no part of the gradients is lost
+                over time (default: True).
+            warm_start (bool): whether to start the approximation of each
+                gradient from the ``Q`` factor of the previous iteration rather
+                than from a random one (default: True).
+            random_seed (int): seed of the random ``Q`` factors, which must be
+                the same on all the ranks (default: 0).
+    """
+
+    def __init__(
+        self,
+        process_group,
+        matrix_approximation_rank=1,
+        use_error_feedback=True,
+        warm_start=True,
+        random_seed=0,
+    ):
+        if matrix_approximation_rank < 1:
+            raise ValueError(
+                "Invalid matrix_approximation_rank: {}".format(matrix_approximation_rank)
+            )
+        self.process_group = process_group
+        self.matrix_approximation_rank = matrix_approximation_rank
+        self.use_error_feedback = use_error_feedback
+        self.warm_start = warm_start
+        # All the ranks draw the same random Q factors, in the same order.
+        self.generator = torch.Generator()
+        self.generator.manual_seed(random_seed)
+        # Parameter index -> error of the last approximation of its gradient.
+        self.error_dict = {}
+        # Parameter index -> last Q factor of its gradient.
+        self.q_memory_dict = {}
+
+
+def powerSGD_hook(
+    state: PowerSGDState, bucket: dist._GradBucket
+) -> torch.futures.Future:
+    """
+        This DDP communication hook implements the low-rank gradient compression
+        of `PowerSGD <https://arxiv.org/abs/1905.13727>`_. Each gradient of the
+        ``GradBucket`` with 2 or more dimensions is viewed as a matrix ``M`` of
+        ``n`` rows, and approximated by ``P Q^T`` where ``P`` is ``n x r`` and ``Q``
+        is ``m x r`` for a small rank ``r``, so only ``P`` and ``Q`` are allreduced:
+
+        1. Allreduces the gradients that are not worth compressing, e.g. biases,
+           as a single flat tensor;
+        2. Computes ``P = M Q`` for each matrix, from the ``Q`` of the previous
+           iteration (or a random one), and allreduces all the ``P`` factors;
+        3. Orthonormalizes each ``P``, computes ``Q = M^T P``, and allreduces all
+           the ``Q`` factors;
+        4. Replaces each ``M`` by the average ``P Q^T / world_size``.
+
+        With error feedback, the difference between the local gradient and its
+        approximation is added to the gradient of the next iteration.
+
+        This works with any process group, including Gloo on CPU. The state must
+        be a ``PowerSGDState``.
+
+        Example::
+            >>> state = PowerSGDState(process_group=process_group, matrix_approximation_rank=1)
+            >>> ddp_model._register_comm_hook(state, powerSGD_hook)
+    """
+    process_group = state.process_group
+    group_to_use = process_group if process_group is not None else dist.group.WORLD
+    world_size = (
+        process_group.size() if process_group is not None else dist.get_world_size()
+    )
+
+    input_tensor = bucket.get_tensors()[0]
+    device = input_tensor.device
+    dtype = input_tensor.dtype
+
+    offsets = bucket.get_offsets()
+    lengths = bucket.get_lengths()
+    sizes_list = bucket.get_sizes_list()
+    variable_indices = bucket.get_variable_indices()
+    if not sizes_list:
+        # No parameter to bucket mapping, compress nothing.
+        offsets, lengths, sizes_list = [0], [input_tensor.numel()], [[input_tensor.numel()]]
+        variable_indices = [None]
+
+    uncompressed_tensors = []
+    matrices = []
+    matrix_indices = []
+    for offset, length, sizes, index in zip(offsets, lengths, sizes_list, variable_indices):
+        tensor = input_tensor.narrow(0, offset, length)
+        if _should_compress(sizes, state.matrix_approximation_rank):
+            matrices.append(tensor.view(sizes[0], -1))
+            matrix_indices.append(index)
+        else:
+            uncompressed_tensors.append(tensor)
+
+    ranks = [min(m.shape[0], m.shape[1], state.matrix_approximation_rank) for m in matrices]
+
+    if state.use_error_feedback:
+        for index, matrix in zip(matrix_indices, matrices):
+            error = state.error_dict.get(index)
+            if error is not None and error.shape == matrix.shape:
+                matrix.add_(error)
+
+    # The P and Q factors of all the matrices are allreduced at once, each
+    # from a single flat tensor.
+    ps_memory = torch.empty(
+        sum(m.shape[0] * r for m, r in zip(matrices, ranks)), device=device, dtype=dtype
+    )
+    qs_memory = torch.empty(
+        sum(m.shape[1] * r for m, r in zip(matrices, ranks)), device=device, dtype=dtype
+    )
+    ps = []
+    qs = []
+    p_offset = 0
+    q_offset = 0
+    for index, matrix, rank in zip(matrix_indices, matrices, ranks):
+        n, m = matrix.shape
+        ps.append(ps_memory[p_offset : p_offset + n * rank].view(n, rank))
+        q = qs_memory[q_offset : q_offset + m * rank].view(m, rank)
+        p_offset += n * rank
+        q_offset += m * rank
+        last_q = state.q_memory_dict.get(index)
+        if state.warm_start and last_q is not None and last_q.shape == q.shape:
+            q.copy_(last_q)
+        else:
+            q.copy_(torch.randn(m, rank, generator=state.generator))
+            _orthogonalize(q)
+        qs.append(q)
+
+    if uncompressed_tensors:
+        uncompressed_memory = torch.cat([t.view(-1) for t in uncompressed_tensors])
+    else:
+        uncompressed_memory = torch.empty(0, device=device, dtype=dtype)
+    fut = _get_future(
+        dist.all_reduce(uncompressed_memory, group=group_to_use, async_op=True),
+        [uncompressed_memory],
+    )
+
+    def unpack_uncompressed_tensors_and_allreduce_ps(fut):
+        uncompressed_memory = fut.value()[0].div_(world_size)
+        offset = 0
+        for tensor in uncompressed_tensors:
+            tensor.copy_(uncompressed_memory[offset : offset + tensor.numel()])
+            offset += tensor.numel()
+
+        for matrix, p, q in zip(matrices, ps, qs):
+            torch.matmul(matrix, q, out=p)
+        return _get_future(
+            dist.all_reduce(ps_memory, group=group_to_use, async_op=True),
+            [ps_memory],
+        ).wait()
+
+    def compute_qs_and_allreduce(fut):
+        for matrix, p, q in zip(matrices, ps, qs):
+            _orthogonalize(p)
+            torch.matmul(matrix.t(), p, out=q)
+        return _get_future(
+            dist.all_reduce(qs_memory, group=group_to_use, async_op=True),
+            [qs_memory],
+        ).wait()
+
+    def decompress(fut):
+        qs_memory.div_(world_size)
+        for index, matrix, p, q in zip(matrix_indices, matrices, ps, qs):
+            approximation = p @ q.t()
+            if state.use_error_feedback:
+                state.error_dict[index] = matrix - approximation
+            matrix.copy_(approximation)
+            if state.warm_start:
+                state.q_memory_dict[index] = q
+        return [input_tensor]
+
+    return (
+        fut.then(unpack_uncompressed_tensors_and_allreduce_ps)
+        .then(compute_qs_and_allreduce)
+        .then(decompress)
+    )
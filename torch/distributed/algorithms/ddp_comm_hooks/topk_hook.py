@@ -0,0 +1,106 @@
+import torch
+import torch.distributed as dist
+from torch.distributed.algorithms.ddp_comm_hooks.default_hooks import (
+    _get_allgather_out_list,
+    _get_future,
+)
+
+
+class TopKState(object):
+    """
+        Stores the hyperparameters of ``topk_hook`` and the residuals it keeps
+        across iterations, i.e., the part of each gradient that was not sent.
+        The residuals are keyed by parameter rather than by bucket, so they
+        survive the rebuild of the buckets after the first iteration.
+
+        Arguments:
+            process_group (ProcessGroup): the process group to communicate
+                with, ``None`` for the default process group.
+            compress_ratio (float): the fraction of the elements of each bucket
+                that are sent (default: 0.01).
+            use_error_feedback (bool): whether to add the elements that were not
+                sent to the gradients of the next iteration (default: True).
+    """
+
+    def __init__(self, process_group, compress_ratio=0.01, use_error_feedback=True):
+        if not 0.0 < compress_ratio <= 1.0:
+            raise ValueError("Invalid compress_ratio: {}".format(compress_ratio))
+        self.process_group = process_group
+        self.compress_ratio = compress_ratio
+        self.use_error_feedback = use_error_feedback
+        # Parameter index -> elements of its gradient that were not sent.
+        self.residual_dict = {}
+
+
+def topk_hook(state: TopKState, bucket: dist._GradBucket) -> torch.futures.Future:
+    """
+        This DDP communication hook implements top-k gradient sparsification. Each
+        worker only sends the ``k`` elements of largest magnitude of its
+        ``GradBucket`` tensor, where ``k`` is ``compress_ratio`` times the number of
+        elements of the bucket, using ``allgather`` for their indices and values.
+        Its ``then`` callback called ``scatter_and_aggregate`` adds the gathered
+        elements of all workers to a zeroed bucket and takes the mean.
+
+        With error feedback, the elements that were not sent are kept as a residual,
+        which is added to the gradients of the next iteration.
+
+        .. warning ::
+            With ``W`` workers, the averaged gradients have up to ``W * k`` nonzero
+            elements, and ``allgather`` communicates ``W`` times more than
+            ``allreduce`` would, so this only pays off for small ``compress_ratio``.
+
+        Example::
+            >>> state = TopKState(process_group=process_group, compress_ratio=0.01)
+            >>> ddp_model._register_comm_hook(state, topk_hook)
+    """
+    process_group = state.process_group
+    group_to_use = process_group if process_group is not None else dist.group.WORLD
+    world_size = (
+        process_group.size() if process_group is not None else dist.get_world_size()
+    )
+
+    tensor = bucket.get_tensors()[0]
+
+    offsets = bucket.get_offsets()
+    lengths = bucket.get_lengths()
+    variable_indices = bucket.get_variable_indices()
+    if not variable_indices:
+        # No parameter to bucket mapping, keep one residual for the bucket.
+        offsets, lengths, variable_indices = [0], [tensor.numel()], [None]
+
+    if state.use_error_feedback:
+        for offset, length, index in zip(offsets, lengths, variable_indices):
+            residual = state.residual_dict.get(index)
+            if residual is not None and residual.numel() == length:
+                tensor.narrow(0, offset, length).add_(residual)
+
+    k = max(1, int(tensor.numel() * state.compress_ratio))
+    _, indices = torch.topk(tensor.abs(), k, sorted=False)
+    values = tensor[indices]
+
+    if state.use_error_feedback:
+        residuals = tensor.clone()
+        residuals[indices] = 0
+        for offset, length, index in zip(offsets, lengths, variable_indices):
+            state.residual_dict[index] = residuals.narrow(0, offset, length)
+
+    all_ranks_indices = _get_allgather_out_list(indices, world_size)
+    all_ranks_values = _get_allgather_out_list(values, world_size)
+    indices_fut = _get_future(
+        dist.all_gather(all_ranks_indices, indices, group=group_to_use, async_op=True),
+        [all_ranks_indices],
+    )
+    values_fut = _get_future(
+        dist.all_gather(all_ranks_values, values, group=group_to_use, async_op=True),
+        [all_ranks_values],
+    )
+
+    def scatter_and_aggregate(fut):
+        all_ranks_values = fut.value()[0]
+        all_ranks_indices = indices_fut.wait()[0]
+        tensor.zero_()
+        for rank_indices, rank_values in zip(all_ranks_indices, all_ranks_values):
+            tensor.index_add_(0, rank_indices, rank_values)
+        return [tensor.div_(world_size)]
+
+    return values_fut.then(scatter_and_aggregate)
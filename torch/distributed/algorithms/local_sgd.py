@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import torch
+import torch.distributed as dist
+from torch._utils import _flatten_dense_tensors, _unflatten_dense_tensors
+from torch.nn.parallel import DistributedDataParallel
+from torch.optim import Optimizer
+
+
+class LocalSGD(object):
+    r"""
+    Trains a :class:`~torch.nn.parallel.DistributedDataParallel` model with
+    local SGD, also known as periodic model averaging: after ``warmup_steps``
+    regular synchronous steps, each rank takes ``period`` optimizer steps on
+    its own gradients, without allreducing them, and then the parameters (and
+    optionally the optimizer state) are averaged across the ranks. This
+    divides the communication by ``period``, as a single allreduce of the
+    parameters replaces ``period`` allreduces of the gradients.
+
+    The forward and backward passes go in :meth:`maybe_no_sync`, which
+    disables the gradient synchronization of the model past the warm-up, and
+    :meth:`step` is called after each optimizer step.
+
+    Arguments:
+        module (DistributedDataParallel): the model.
+        optimizer (Optimizer, optional): the optimizer of the model, only
+            required to average its state.
+        period (int): the number of local steps between two averagings of the
+            parameters (default: 4).
+        warmup_steps (int): the number of synchronous steps before local SGD
+            starts (default: 0).
+        average_optimizer_state (bool): whether to also average the tensors of
+            the optimizer state that have the shape of their parameter, e.g.
+            momentum buffers (default: False).
+
+    Example::
+
+        >>> ddp = DistributedDataParallel(model)
+        >>> optimizer = torch.optim.SGD(ddp.parameters(), lr=0.1, momentum=0.9)
+        >>> local_sgd = LocalSGD(ddp, optimizer, period=8, warmup_steps=100)
+        >>> for input in inputs:
+        >>>     optimizer.zero_grad()
+        >>>     with local_sgd.maybe_no_sync():
+        >>>         ddp(input).sum().backward()
+        >>>     optimizer.step()
+        >>>     local_sgd.step()
+
+    .. note::
+        Past the warm-up, the model no longer broadcasts its buffers from rank
+        0 at every forward pass, so the floating point buffers, e.g. the
+        running statistics of batch norm layers, are averaged along with the
+        parameters.
+    """
+
+    def __init__(self, module: DistributedDataParallel, optimizer: Optional[Optimizer] = None,
+                 period: int = 4, warmup_steps: int = 0, average_optimizer_state: bool = False):
+        if not isinstance(module, DistributedDataParallel):
+            raise TypeError("LocalSGD expects a DistributedDataParallel module, but got {}".format(
+                torch.typename(module)))
+        if period < 1:
+            raise ValueError("Invalid period: {}".format(period))
+        if warmup_steps < 0:
+            raise ValueError("Invalid warmup_steps: {}".format(warmup_steps))
+        if average_optimizer_state and optimizer is None:
+            raise ValueError("average_optimizer_state requires the optimizer")
+        self.module = module
+        self.optimizer = optimizer
+        self.period = period
+        self.warmup_steps = warmup_steps
+        self.average_optimizer_state = average_optimizer_state
+        self.process_group = module.process_group
+        self.num_steps = 0
+
+    def is_synchronous_step(self) -> bool:
+        r"""
+        Returns whether the gradients of the next step are synchronized, i.e.,
+        whether the warm-up is not over yet.
+        """
+        return self.num_steps < self.warmup_steps
+
+    @contextmanager
+    def maybe_no_sync(self):
+        r"""
+        A context manager to wrap the forward and backward passes of each step,
+        which disables the gradient synchronization of the model, like
+        :meth:`~torch.nn.parallel.DistributedDataParallel.no_sync`, past the
+        warm-up.
+        """
+        if self.is_synchronous_step():
+            yield
+        else:
+            with self.module.no_sync():
+                yield
+
+    def step(self) -> bool:
+        r"""
+        Counts an optimizer step, and averages the parameters across the ranks
+        at the end of every period of local steps. This is a collective call, to
+        be made by all the ranks after each optimizer step. Returns whether the
+        parameters were averaged.
+        """
+        self.num_steps += 1
+        num_local_steps = self.num_steps - self.warmup_steps
+        if num_local_steps <= 0 or num_local_steps % self.period != 0:
+            return False
+        self.average_parameters()
+        return True
+
+    @torch.no_grad()
+    def average_parameters(self) -> None:
+        r"""
+        Averages the parameters and floating point buffers, and the optimizer
+        state if ``average_optimizer_state`` is set, across the ranks. This is
+        a collective call, to be made by all the ranks.
+        """
+        tensors = [p for p in self.module.parameters()]
+        tensors += [b for b in self.module.buffers() if b.is_floating_point()]
+        if self.average_optimizer_state:
+            assert self.optimizer is not None
+            for param_group in self.optimizer.param_groups:
+                for p in param_group['params']:
+                    for value in self.optimizer.state.get(p, {}).values():
+                        if (isinstance(value, torch.Tensor) and value.is_floating_point()
+                                and value.shape == p.shape):
+                            tensors.append(value)
+        self._allreduce_mean(tensors)
+
+    def _allreduce_mean(self, tensors: List[torch.Tensor]) -> None:
+        # One allreduce per device and dtype, of the flattened tensors
+        world_size = self.process_group.size()
+        buckets: Dict[Any, List[torch.Tensor]] = {}
+        for tensor in tensors:
+            buckets.setdefault((tensor.device, tensor.dtype), []).append(tensor)
+        work = []
+        for bucket in buckets.values():
+            flat = _flatten_dense_tensors([t.detach() for t in bucket])
+            work.append((dist.all_reduce(flat, group=self.process_group, async_op=True), bucket, flat))
+        for handle, bucket, flat in work:
+            handle.wait()
+            flat.div_(world_size)
+            for tensor, value in zip(bucket, _unflatten_dense_tensors(flat, bucket)):
+                tensor.copy_(value)
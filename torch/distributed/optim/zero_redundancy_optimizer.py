@@ -0,0 +1,262 @@
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import torch
+import torch.distributed as dist
+from torch._utils import _flatten_dense_tensors, _unflatten_dense_tensors
+from torch.optim import Optimizer
+
+
+def _global_rank(group, group_rank):
+    if group is dist.group.WORLD:
+        return group_rank
+    return dist.distributed_c10d._get_global_rank(group, group_rank)
+
+
+def _to_cpu(state):
+    if isinstance(state, torch.Tensor):
+        return state.cpu()
+    elif isinstance(state, dict):
+        return {k: _to_cpu(v) for k, v in state.items()}
+    elif isinstance(state, (list, tuple)):
+        return type(state)(_to_cpu(v) for v in state)
+    return state
+
+
+class ZeroRedundancyOptimizer(Optimizer):
+    r"""
+    Wraps an arbitrary :class:`optim.Optimizer <torch.optim.Optimizer>` and
+    shards its state across the ranks of a process group, as described by
+    `ZeRO <https://arxiv.org/abs/1910.02054>`_. Every rank only keeps the
+    optimizer state of its shard of the parameters and only updates those
+    parameters, after which each rank broadcasts its updated parameters to the
+    other ranks.
+
+    This is meant to be used with :class:`~torch.nn.parallel.DistributedDataParallel`,
+    which leaves the same averaged gradients on every rank, to divide the
+    memory used by the optimizer state (e.g. twice the model size for
+    :class:`~torch.optim.Adam`) by the number of ranks.
+
+    The parameters are assigned to the ranks greedily, in order, each to the
+    rank with the fewest elements so far. All the ranks must construct the
+    optimizer with the same parameters, in the same order.
+
+    Arguments:
+        params (iterable): an iterable of :class:`torch.Tensor` s or
+            :class:`dict` s, the parameters to optimize, as for any
+            optimizer. The same on every rank.
+        optimizer_class (Type[Optimizer]): the class of the local optimizer,
+            e.g. :class:`torch.optim.Adam`.
+        group (ProcessGroup, optional): the process group sharding the state
+            (default: the default process group).
+        **defaults: the other arguments of ``optimizer_class``.
+
+    Example::
+
+        >>> ddp = DistributedDataParallel(model, device_ids=[rank])
+        >>> opt = ZeroRedundancyOptimizer(ddp.parameters(), optimizer_class=torch.optim.Adam, lr=0.01)
+        >>> ddp(input).sum().backward()
+        >>> opt.step()
+
+    .. note::
+        :meth:`state_dict` only returns the state of the whole optimizer on
+        the rank :meth:`consolidate_state_dict` was called on, in the format
+        of ``optimizer_class``, so checkpoints can be loaded into a
+        :class:`ZeroRedundancyOptimizer` with any number of ranks or into
+        ``optimizer_class`` itself.
+    """
+
+    def __init__(self, params, optimizer_class: Type[Optimizer], group=None, **defaults: Any):
+        self.group = group if group is not None else dist.group.WORLD
+        self.rank = dist.get_rank(self.group)
+        self.world_size = dist.get_world_size(self.group)
+        self.optimizer_class = optimizer_class
+        self._numel_per_rank = [0] * self.world_size
+        # Parameter -> rank of the group updating it
+        self._param_to_rank: Dict[torch.Tensor, int] = {}
+        self._all_state_dicts: Optional[List[Dict[str, Any]]] = None
+        self.optim: Optional[Optimizer] = None
+
+        super().__init__(params, defaults)
+
+        # The local optimizer has one param group per param group, even if
+        # this rank updates none of its parameters, so that they correspond
+        self.optim = optimizer_class(
+            [self._local_param_group(param_group) for param_group in self.param_groups], **defaults)
+        self._sync_param_groups_from_local()
+        self.state = self.optim.state
+
+    def _local_param_group(self, param_group: Dict[str, Any]) -> Dict[str, Any]:
+        for param in param_group['params']:
+            rank = min(range(self.world_size), key=lambda r: self._numel_per_rank[r])
+            self._param_to_rank[param] = rank
+            self._numel_per_rank[rank] += param.numel()
+        local_group = {k: v for k, v in param_group.items() if k != 'params'}
+        local_group['params'] = [p for p in param_group['params'] if self._param_to_rank[p] == self.rank]
+        return local_group
+
+    def _sync_param_groups_from_local(self) -> None:
+        # Expose the defaults of optimizer_class, e.g. for lr schedulers
+        for param_group, local_group in zip(self.param_groups, self.optim.param_groups):
+            for k, v in local_group.items():
+                if k != 'params':
+                    param_group.setdefault(k, v)
+
+    def _sync_param_groups_to_local(self) -> None:
+        # Propagate changes made to the param groups, e.g. by lr schedulers
+        for param_group, local_group in zip(self.param_groups, self.optim.param_groups):
+            for k, v in param_group.items():
+                if k != 'params':
+                    local_group[k] = v
+
+    def add_param_group(self, param_group: dict) -> None:
+        super().add_param_group(param_group)
+        if self.optim is not None:
+            self.optim.add_param_group(self._local_param_group(self.param_groups[-1]))
+            self._sync_param_groups_from_local()
+
+    def partition_parameters(self) -> List[List[torch.Tensor]]:
+        r"""
+        Returns the parameters updated by each rank of the process group.
+        """
+        partition: List[List[torch.Tensor]] = [[] for _ in range(self.world_size)]
+        for param_group in self.param_groups:
+            for param in param_group['params']:
+                partition[self._param_to_rank[param]].append(param)
+        return partition
+
+    def step(self, closure: Optional[Callable[[], float]] = None, **kwargs: Any) -> Optional[float]:
+        r"""
+        Performs a single optimization step of the parameters of this rank,
+        then broadcasts the updated parameters to the other ranks. This is a
+        collective call, to be made by all the ranks of the process group.
+
+        Arguments:
+            closure (callable, optional): A closure that reevaluates the model
+                and returns the loss. Optional for most optimizers.
+            **kwargs: other arguments of the ``step`` of ``optimizer_class``.
+        """
+        self._sync_param_groups_to_local()
+        if closure is not None:
+            loss = self.optim.step(closure=closure, **kwargs)
+        else:
+            loss = self.optim.step(**kwargs)
+        self._broadcast_params()
+        return loss
+
+    @torch.no_grad()
+    def _broadcast_params(self) -> None:
+        # One broadcast per rank, device and dtype, of the flattened
+        # parameters of that rank
+        work = []
+        for rank, params in enumerate(self.partition_parameters()):
+            buckets: Dict[Any, List[torch.Tensor]] = {}
+            for param in params:
+                buckets.setdefault((param.device, param.dtype), []).append(param)
+            for bucket in buckets.values():
+                if rank == self.rank:
+                    flat = _flatten_dense_tensors([p.detach() for p in bucket])
+                else:
+                    flat = torch.empty(
+                        sum(p.numel() for p in bucket), device=bucket[0].device, dtype=bucket[0].dtype)
+                handle = dist.broadcast(
+                    flat, src=_global_rank(self.group, rank), group=self.group, async_op=True)
+                work.append((handle, rank, bucket, flat))
+        for handle, rank, bucket, flat in work:
+            handle.wait()
+            if rank != self.rank:
+                for param, value in zip(bucket, _unflatten_dense_tensors(flat, bucket)):
+                    param.copy_(value)
+
+    def _global_param_indices(self) -> Dict[torch.Tensor, int]:
+        # Same numbering as Optimizer.state_dict
+        indices: Dict[torch.Tensor, int] = {}
+        for param_group in self.param_groups:
+            for param in param_group['params']:
+                indices.setdefault(param, len(indices))
+        return indices
+
+    def consolidate_state_dict(self, to: int = 0) -> None:
+        r"""
+        Gathers the state of all the ranks on rank ``to`` of the process group,
+        so that :meth:`state_dict` can be called there. This is a collective
+        call, to be made by all the ranks of the process group.
+
+        The state of each rank is moved to the CPU and broadcast in turn with
+        :func:`~torch.distributed.broadcast_object_list`, since NCCL doesn't
+        support gather, and only rank ``to`` keeps it. With NCCL, the current
+        CUDA device of each rank must be set, e.g. with
+        :func:`torch.cuda.set_device`, as the objects go through it.
+
+        Arguments:
+            to (int): the rank of the process group receiving the state
+                (default: 0).
+        """
+        indices = self._global_param_indices()
+        local_state_dict = self.optim.state_dict()
+        # Renumber the local parameters as in the whole optimizer
+        local_params = [p for local_group in self.optim.param_groups for p in local_group['params']]
+        local_state = {indices[local_params[i]]: _to_cpu(state) for i, state in local_state_dict['state'].items()}
+        all_states: List[Any] = []
+        for rank in range(self.world_size):
+            object_list = [local_state if rank == self.rank else None]
+            dist.broadcast_object_list(object_list, src=_global_rank(self.group, rank), group=self.group)
+            if self.rank == to:
+                all_states.append(object_list[0])
+        self._all_state_dicts = all_states if self.rank == to else None
+
+    def state_dict(self) -> Dict[str, Any]:
+        r"""
+        Returns the state of the whole optimizer, in the format of
+        ``optimizer_class``, as gathered by the last call to
+        :meth:`consolidate_state_dict` on this rank.
+        """
+        if self._all_state_dicts is None:
+            raise RuntimeError(
+                "Optimizer state has not been consolidated on this rank, "
+                "call consolidate_state_dict() on all the ranks first")
+        state: Dict[int, Any] = {}
+        for rank_state in self._all_state_dicts:
+            state.update(rank_state)
+        indices = self._global_param_indices()
+        param_groups = []
+        for param_group in self.param_groups:
+            packed = {k: v for k, v in param_group.items() if k != 'params'}
+            packed['params'] = [indices[p] for p in param_group['params']]
+            param_groups.append(packed)
+        return {'state': state, 'param_groups': param_groups}
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        r"""
+        Loads a state returned by :meth:`state_dict`, or by the ``state_dict``
+        of ``optimizer_class``. Each rank only keeps the state of its own
+        parameters.
+
+        Arguments:
+            state_dict (dict): optimizer state. Should be an object returned
+                from a call to :meth:`state_dict`.
+        """
+        saved_groups = state_dict['param_groups']
+        if len(saved_groups) != len(self.param_groups):
+            raise ValueError("loaded state dict has a different number of parameter groups")
+        indices = self._global_param_indices()
+        saved_indices = [i for saved_group in saved_groups for i in saved_group['params']]
+        if len(saved_indices) != len(indices):
+            raise ValueError("loaded state dict contains a parameter group "
+                             "that doesn't match the size of optimizer's group")
+        # Saved index -> parameter, as Optimizer.load_state_dict
+        saved_to_param = dict(zip(saved_indices, indices))
+
+        local_params = [p for local_group in self.optim.param_groups for p in local_group['params']]
+        local_indices = {p: i for i, p in enumerate(local_params)}
+        local_state = {local_indices[saved_to_param[i]]: state for i, state in state_dict['state'].items()
+                       if saved_to_param.get(i) in local_indices}
+        local_groups = []
+        for saved_group, local_group in zip(saved_groups, self.optim.param_groups):
+            group = {k: v for k, v in saved_group.items() if k != 'params'}
+            group['params'] = [local_indices[p] for p in local_group['params']]
+            local_groups.append(group)
+        self.optim.load_state_dict({'state': local_state, 'param_groups': local_groups})
+        self.state = self.optim.state
+
+        for param_group, saved_group in zip(self.param_groups, saved_groups):
+            param_group.update({k: v for k, v in saved_group.items() if k != 'params'})
@@ -88,3 +88,4 @@ from .symbolic_trace import symbolic_trace, Tracer
 from .graph import Graph
 from .node import Node, map_arg
 from .proxy import Proxy
+from .interpreter import Interpreter
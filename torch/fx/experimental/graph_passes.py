@@ -0,0 +1,200 @@
+import builtins
+import operator
+import torch
+from torch.fx.graph import Graph
+from torch.fx.graph_module import GraphModule
+from torch.fx.interpreter import Interpreter
+from torch.fx.node import Argument, Node, map_arg
+from typing import Any, Dict, Hashable, List, Set
+
+# Functions whose result depends on the random number generator, and thus
+# differs between two calls with the same arguments
+_nondeterministic_functions = {
+    torch.rand, torch.rand_like, torch.randn, torch.randn_like, torch.randint,
+    torch.randint_like, torch.randperm, torch.bernoulli, torch.multinomial,
+    torch.normal, torch.poisson, torch.dropout, torch.alpha_dropout,
+    torch.feature_alpha_dropout, torch.nn.functional.dropout,
+    torch.nn.functional.dropout2d, torch.nn.functional.dropout3d,
+    torch.nn.functional.alpha_dropout, torch.nn.functional.feature_alpha_dropout,
+    torch.nn.functional.rrelu,
+}
+_nondeterministic_methods = {
+    'bernoulli', 'bernoulli_', 'cauchy_', 'exponential_', 'geometric_',
+    'log_normal_', 'multinomial', 'normal_', 'random_', 'uniform_',
+}
+
+# Functions and methods with side effects other than the in-place update of
+# their arguments, e.g. on the global state, a container, or other processes
+_impure_functions = {
+    operator.setitem, operator.delitem, builtins.print, builtins.setattr,
+    builtins.delattr, torch.manual_seed, torch.seed, torch.set_rng_state,
+    torch.cuda.manual_seed, torch.cuda.manual_seed_all, torch.cuda.set_rng_state,
+    torch.cuda.synchronize, torch.save, torch.autograd.backward,
+}
+_impure_methods = {
+    '__setitem__', '__delitem__', 'backward', 'register_hook', 'retain_grad',
+    'record_stream',
+}
+# Modules whose functions communicate with other processes
+_impure_modules = ('torch.distributed',)
+
+def _target_name(node : Node) -> str:
+    return node.target if isinstance(node.target, str) else getattr(node.target, '__name__', '')
+
+def _is_inplace(node : Node) -> bool:
+    # In-place operations (e.g. `add_` or `relu(x, inplace=True)`) and
+    # operations writing to `out` mutate one of their arguments
+    name = _target_name(node)
+    return (name.endswith('_') and not name.endswith('__')) or \
+        node.kwargs.get('inplace', False) is True or 'out' in node.kwargs
+
+def _input_nodes(node : Node) -> List[Node]:
+    inputs : Dict[Node, None] = {}
+    map_arg(node.args, lambda n: inputs.setdefault(n))
+    map_arg(node.kwargs, lambda n: inputs.setdefault(n))
+    return list(inputs)
+
+def _is_pure(node : Node) -> bool:
+    """
+    Whether `node` computes its value from its arguments without side effects,
+    so it can be removed when its value is unused.
+    """
+    if node.op == 'get_attr':
+        return True
+    if node.op == 'call_function':
+        if _is_inplace(node) or _is_impure_function(node.target):
+            return False
+        module = getattr(node.target, '__module__', None) or ''
+        return not any(module == m or module.startswith(m + '.') for m in _impure_modules)
+    if node.op == 'call_method':
+        return not _is_inplace(node) and node.target not in _impure_methods
+    # Placeholders and outputs are the interface of the Graph, and calling a
+    # module may update its state (e.g. BatchNorm running statistics)
+    return False
+
+def _is_impure_function(target : Any) -> bool:
+    try:
+        return target in _impure_functions
+    except TypeError:
+        # unhashable callable
+        return False
+
+def _is_deterministic(node : Node) -> bool:
+    if node.op == 'call_function':
+        return node.target not in _nondeterministic_functions
+    if node.op == 'call_method':
+        return node.target not in _nondeterministic_methods
+    return node.op == 'get_attr'
+
+def eliminate_dead_code(graph : Graph) -> bool:
+    """
+    Erase the Nodes of `graph` whose values are unused and that have no side
+    effects. Returns whether `graph` changed. Call `recompile()` on the owning
+    GraphModule afterwards.
+    """
+    changed = False
+    # Visit users before the values they use, so chains of dead Nodes are
+    # erased in a single pass
+    for node in reversed(graph.nodes):
+        if len(node.users) == 0 and _is_pure(node):
+            graph.erase_node(node)
+            changed = True
+    return changed
+
+def _hashable_arg(a : Argument) -> Hashable:
+    if isinstance(a, (tuple, list)):
+        return (type(a).__name__,) + tuple(_hashable_arg(elem) for elem in a)
+    elif isinstance(a, dict):
+        return ('dict',) + tuple((k, _hashable_arg(v)) for k, v in a.items())
+    elif isinstance(a, slice):
+        return ('slice', _hashable_arg(a.start), _hashable_arg(a.stop), _hashable_arg(a.step))
+    elif isinstance(a, torch.Tensor):
+        # Tensor equality is elementwise, compare identity instead
+        return ('tensor', id(a))
+    hash(a)
+    return (type(a).__name__, a)
+
+def eliminate_common_subexpressions(graph : Graph) -> bool:
+    """
+    Replace each pure, deterministic `call_function`, `call_method` or
+    `get_attr` Node that computes the same value as an earlier Node (same
+    target, args and kwargs) by that earlier Node, and erase it. Returns
+    whether `graph` changed. Call `recompile()` on the owning GraphModule
+    afterwards.
+    """
+    changed = False
+    seen : Dict[Hashable, Node] = {}
+    for node in graph.nodes:
+        if not (_is_pure(node) and _is_deterministic(node)):
+            continue
+        try:
+            key = (node.op, node.target, _hashable_arg(node.args), _hashable_arg(node.kwargs))
+        except TypeError:
+            # unhashable argument
+            continue
+        if key in seen:
+            node.replace_all_uses_with(seen[key])
+            graph.erase_node(node)
+            changed = True
+        else:
+            seen[key] = node
+    return changed
+
+def fold_constants(gm : GraphModule) -> bool:
+    """
+    Precompute the values of `gm` that only depend on its attributes
+    (parameters, buffers and other constants fetched by `get_attr` Nodes), and
+    replace the subgraphs computing them by buffers of `gm`. Returns whether
+    `gm` changed, in which case it has been recompiled.
+
+    The folded values are computed once, without autograd, so later updates to
+    the attributes they were computed from are not reflected. This is meant for
+    inference, e.g. weight scaling in a frozen model.
+    """
+    graph = gm.graph
+    constant_nodes : Set[Node] = set()
+    for node in graph.nodes:
+        if node.op == 'get_attr':
+            constant_nodes.add(node)
+        elif _is_pure(node) and _is_deterministic(node):
+            inputs = _input_nodes(node)
+            if len(inputs) > 0 and all(n in constant_nodes for n in inputs):
+                constant_nodes.add(node)
+
+    # The constant values used by the rest of the graph
+    to_fold = [node for node in graph.nodes
+               if node in constant_nodes and node.op != 'get_attr' and
+               any(user not in constant_nodes for user in node.users)]
+    if not to_fold:
+        return False
+
+    interpreter = Interpreter(gm)
+    env : Dict[Node, Any] = {}
+    with torch.no_grad():
+        for node in graph.nodes:
+            if node in constant_nodes:
+                interpreter.env = env
+                env[node] = interpreter.run_node(node)
+    interpreter.env = {}
+
+    for node in to_fold:
+        value = env[node]
+        name = _unique_attr_name(gm, f'_folded_{node.name}')
+        if isinstance(value, torch.Tensor):
+            gm.register_buffer(name, value)
+        else:
+            setattr(gm, name, value)
+        with graph.inserting_before(node):
+            folded = graph.get_attr(name)
+        node.replace_all_uses_with(folded)
+
+    eliminate_dead_code(graph)
+    gm.recompile()
+    return True
+
+def _unique_attr_name(gm : GraphModule, name : str) -> str:
+    candidate, i = name, 0
+    while hasattr(gm, candidate):
+        i += 1
+        candidate = f'{name}_{i}'
+    return candidate
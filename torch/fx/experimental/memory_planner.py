@@ -0,0 +1,207 @@
+import torch
+from torch.fx.graph import Graph
+from torch.fx.graph_module import GraphModule
+from torch.fx.node import Node
+from torch.fx.experimental.graph_passes import _input_nodes, _is_pure
+from typing import Dict, List, NamedTuple, Optional
+
+class MemoryProfile(NamedTuple):
+    """NamedTuple returned by analyze_memory."""
+    # Largest number of bytes of activations alive at the same time
+    peak_bytes: int
+    # The Node running when the peak is reached
+    peak_node: Optional[Node]
+    # Bytes of activations alive while each Node runs, including its output
+    live_bytes: Dict[Node, int]
+
+def activation_bytes(node : Node) -> int:
+    """
+    Bytes of the value of `node` if it's an activation, i.e. a value computed
+    by the graph rather than an input or an attribute. Uses the `output_bytes`
+    recorded by NodeProfiler, or else the `shape` and `dtype` recorded by
+    ShapeProp, and 0 if neither ran.
+    """
+    if node.op not in ('call_function', 'call_method', 'call_module'):
+        return 0
+    if hasattr(node, 'output_bytes'):
+        return node.output_bytes
+    shape = getattr(node, 'shape', None)
+    dtype = getattr(node, 'dtype', None)
+    if shape is None or dtype is None:
+        return 0
+    return shape.numel() * torch.empty((), dtype=dtype).element_size()
+
+def compute_last_uses(graph : Graph) -> Dict[Node, Node]:
+    """
+    Map each Node of `graph` whose value is used to the last Node using it,
+    under the current order of the Nodes.
+    """
+    last_uses : Dict[Node, Node] = {}
+    for node in graph.nodes:
+        for input_node in _input_nodes(node):
+            last_uses[input_node] = node
+    return last_uses
+
+def analyze_memory(graph : Graph, node_bytes : Optional[Dict[Node, int]] = None) -> MemoryProfile:
+    """
+    Simulate the activations alive while running `graph` in the current order
+    of its Nodes, assuming each value is freed right after its last use.
+
+    `node_bytes` maps Nodes to the size of their value, and defaults to
+    `activation_bytes`. Views are counted as separate values, so the result is
+    an upper bound when the graph creates views.
+    """
+    sizes = _sizes(graph, node_bytes)
+    last_uses = compute_last_uses(graph)
+    freed_by : Dict[Node, List[Node]] = {}
+    for value, user in last_uses.items():
+        freed_by.setdefault(user, []).append(value)
+
+    live = 0
+    peak, peak_node = 0, None
+    live_bytes : Dict[Node, int] = {}
+    for node in graph.nodes:
+        live += sizes[node]
+        live_bytes[node] = live
+        if live > peak:
+            peak, peak_node = live, node
+        for value in freed_by.get(node, []):
+            live -= sizes[value]
+        if node not in last_uses:
+            # unused value
+            live -= sizes[node]
+    return MemoryProfile(peak, peak_node, live_bytes)
+
+def _sizes(graph : Graph, node_bytes : Optional[Dict[Node, int]]) -> Dict[Node, int]:
+    if node_bytes is None:
+        return {n: activation_bytes(n) for n in graph.nodes}
+    return {n: node_bytes.get(n, 0) for n in graph.nodes}
+
+def _memory_aware_order(nodes : List[Node], sizes : Dict[Node, int],
+                        order_deps : Dict[Node, List[Node]]) -> List[Node]:
+    # Greedy list scheduling of `nodes`: among the Nodes whose inputs are
+    # computed, run the one that increases the live bytes the least, i.e. whose
+    # output is smallest compared to the inputs it is the last user of. Ties
+    # keep the original order. `order_deps` maps Nodes to the Nodes they must
+    # run after besides their inputs.
+    position = {n: i for i, n in enumerate(nodes)}
+    in_segment = set(nodes)
+    deps : Dict[Node, List[Node]] = {n: [i for i in _input_nodes(n) + order_deps.get(n, []) if i in in_segment]
+                                     for n in nodes}
+    remaining_users : Dict[Node, int] = {n: len(n.users) for n in nodes}
+    for n in nodes:
+        for i in _input_nodes(n):
+            if i not in in_segment:
+                remaining_users.setdefault(i, len(i.users))
+    num_deps = {n: len(set(deps[n])) for n in nodes}
+    dependents : Dict[Node, List[Node]] = {n: [] for n in nodes}
+    for n in nodes:
+        for d in set(deps[n]):
+            dependents[d].append(n)
+
+    ready = [n for n in nodes if num_deps[n] == 0]
+    order : List[Node] = []
+    while ready:
+        def delta(n : Node) -> int:
+            freed = sum(sizes.get(i, 0) for i in _input_nodes(n) if remaining_users[i] == 1)
+            return sizes.get(n, 0) - freed
+        best = min(ready, key=lambda n: (delta(n), position[n]))
+        ready.remove(best)
+        order.append(best)
+        for i in _input_nodes(best):
+            remaining_users[i] -= 1
+        for d in dependents[best]:
+            num_deps[d] -= 1
+            if num_deps[d] == 0:
+                ready.append(d)
+    assert len(order) == len(nodes)
+    return order
+
+# Modules drawing random numbers, whose calls keep their relative order
+_random_modules = (torch.nn.modules.dropout._DropoutNd, torch.nn.RReLU)
+
+def _is_movable(node : Node, modules : Optional[Dict[str, torch.nn.Module]]) -> bool:
+    # Calls to modules that don't update their input in place only change the
+    # state of the module, which `_module_order_deps` keeps consistent
+    if _is_pure(node):
+        return True
+    if node.op == 'call_module' and modules is not None:
+        return not getattr(modules[node.target], 'inplace', False)
+    return False
+
+def _module_order_deps(nodes : List[Node], modules : Optional[Dict[str, torch.nn.Module]]) -> Dict[Node, List[Node]]:
+    # The calls to a module with buffers (e.g. BatchNorm running statistics)
+    # and the reads of its attributes stay in order, and so do the calls to
+    # modules drawing random numbers
+    if modules is None:
+        return {}
+    stateful = {name for name, m in modules.items() if any(True for _ in m.buffers())}
+    order_deps : Dict[Node, List[Node]] = {}
+    last : Dict[Optional[str], Node] = {}
+    for node in nodes:
+        keys : List[Optional[str]] = []
+        if node.op == 'call_module':
+            if node.target in stateful:
+                keys.append(node.target)
+            if isinstance(modules[node.target], _random_modules):
+                keys.append(None)
+        elif node.op == 'get_attr':
+            keys += [name for name in stateful if node.target.startswith(name + '.')]
+        for key in keys:
+            if key in last:
+                order_deps.setdefault(node, []).append(last[key])
+            last[key] = node
+    return order_deps
+
+def reorder_for_memory(graph : Graph, node_bytes : Optional[Dict[Node, int]] = None,
+                       root : Optional[torch.nn.Module] = None) -> bool:
+    """
+    Reorder the independent Nodes of `graph` to lower its peak activation
+    memory, as computed by `analyze_memory`. Nodes with side effects (see
+    `graph_passes._is_pure`), e.g. in-place operations or `setitem`, act as
+    barriers: no Node is moved across them. Module calls are barriers too,
+    unless `root`, the module owning `graph`, is given: then only calls to
+    modules updating their input in place are, and the calls to modules with
+    buffers or drawing random numbers keep their relative order. The new order
+    is only kept if it lowers the peak. Returns whether `graph` changed. Call
+    `recompile()` on the owning GraphModule afterwards.
+    """
+    sizes = _sizes(graph, node_bytes)
+    modules = None if root is None else dict(root.named_modules())
+    original = list(graph.nodes)
+    before = analyze_memory(graph, sizes).peak_bytes
+    order_deps = _module_order_deps(original, modules)
+
+    new_order : List[Node] = []
+    segment : List[Node] = []
+    for node in original:
+        # Placeholders, outputs and Nodes with side effects end a segment
+        if not _is_movable(node, modules):
+            new_order += _memory_aware_order(segment, sizes, order_deps)
+            new_order.append(node)
+            segment = []
+        else:
+            segment.append(node)
+    new_order += _memory_aware_order(segment, sizes, order_deps)
+
+    if new_order == original:
+        return False
+    _set_order(graph, new_order)
+    if analyze_memory(graph, sizes).peak_bytes >= before:
+        _set_order(graph, original)
+        return False
+    return True
+
+def _set_order(graph : Graph, order : List[Node]) -> None:
+    # Moving every Node to the end of the list in turn leaves them in `order`
+    for node in order:
+        graph._root.prepend(node)
+
+def free_unused_values(gm : GraphModule, enable : bool = True) -> None:
+    """
+    Make the code generated for `gm` delete each value (`del x`) right after
+    its last use, so its memory can be reused before the forward pass returns,
+    and recompile `gm`.
+    """
+    gm.graph.free_unused_values = enable
+    gm.recompile()
@@ -0,0 +1,132 @@
+import torch
+from torch.fx.graph_module import GraphModule
+from torch.fx.node import Node, map_arg
+from torch.fx.experimental.subgraph_creation_example import split_module
+from typing import Dict, List, NamedTuple, Optional
+
+class PipelineSplitResult(NamedTuple):
+    """NamedTuple returned by split_pipeline_stages."""
+    # Calls the stages in order, equivalent to the original GraphModule
+    module_with_stages: GraphModule
+    # The stages, submodules `submod_0` ... `submod_{num_stages - 1}` of
+    # module_with_stages. Stage i takes as inputs the values computed by the
+    # previous stages (or passed to the module) that it uses, and returns the
+    # values used by the next stages (or returned by the module).
+    stages: List[GraphModule]
+    # Estimated cost of each stage
+    stage_costs: List[float]
+
+def _param_bytes(gm : GraphModule, node : Node, modules : Dict[str, torch.nn.Module]) -> int:
+    if node.op == 'call_module':
+        return sum(p.numel() * p.element_size() for p in modules[node.target].parameters())
+    return 0
+
+def estimate_node_costs(gm : GraphModule) -> Dict[Node, float]:
+    """
+    Estimate the cost of the Nodes computing values in `gm`, i.e. the
+    `call_function`, `call_method` and `call_module` Nodes.
+
+    If the Nodes were profiled with NodeProfiler, their cost is their
+    `elapsed_time`. Otherwise, the cost of a Node is the size in bytes of the
+    parameters of the module it calls plus the size of the tensors it reads
+    from `get_attr` Nodes, and at least 1 so that Nodes without parameters are
+    spread over the stages too.
+    """
+    compute_nodes = [n for n in gm.graph.nodes if n.op in ('call_function', 'call_method', 'call_module')]
+    if compute_nodes and all(hasattr(n, 'elapsed_time') for n in compute_nodes):
+        return {n: float(n.elapsed_time) for n in compute_nodes}
+
+    modules = dict(gm.named_modules())
+    costs : Dict[Node, float] = {}
+    for node in compute_nodes:
+        cost = _param_bytes(gm, node, modules)
+
+        def add_attr_bytes(arg : Node) -> Node:
+            nonlocal cost
+            if arg.op == 'get_attr':
+                value = gm
+                for atom in arg.target.split('.'):
+                    value = getattr(value, atom)
+                if isinstance(value, torch.Tensor):
+                    cost += value.numel() * value.element_size()
+            return arg
+        map_arg(node.args, add_attr_bytes)
+        map_arg(node.kwargs, add_attr_bytes)
+        costs[node] = float(max(cost, 1))
+    return costs
+
+def _greedy_split(costs : List[float], max_cost : float) -> List[int]:
+    # Returns the start index of each stage when filling stages up to max_cost
+    starts = [0]
+    stage_cost = 0.0
+    for i, cost in enumerate(costs):
+        if stage_cost + cost > max_cost and i > starts[-1]:
+            starts.append(i)
+            stage_cost = 0.0
+        stage_cost += cost
+    return starts
+
+def _balanced_split(costs : List[float], num_stages : int) -> List[int]:
+    """
+    Split `costs` into at most `num_stages` contiguous ranges minimizing the
+    largest sum of a range, and return the start index of each range.
+    """
+    # The smallest feasible maximum is found by bisection: filling stages
+    # greedily up to a maximum uses the fewest stages possible for it
+    low, high = max(costs), sum(costs)
+    for _ in range(64):
+        if high - low <= 1e-9 * high:
+            break
+        mid = (low + high) / 2
+        if len(_greedy_split(costs, mid)) <= num_stages:
+            high = mid
+        else:
+            low = mid
+    starts = _greedy_split(costs, high)
+
+    # Use all the stages, splitting the most expensive ones further
+    while len(starts) < num_stages and len(starts) < len(costs):
+        ends = starts[1:] + [len(costs)]
+        ranges = [(s, e) for s, e in zip(starts, ends) if e - s > 1]
+        s, e = max(ranges, key=lambda r: sum(costs[r[0]:r[1]]))
+        total, prefix, best, best_split = sum(costs[s:e]), 0.0, None, s + 1
+        for i in range(s, e - 1):
+            prefix += costs[i]
+            imbalance = abs(total - 2 * prefix)
+            if best is None or imbalance < best:
+                best, best_split = imbalance, i + 1
+        starts = sorted(starts + [best_split])
+    return starts
+
+def split_pipeline_stages(gm : GraphModule, num_stages : int,
+                          node_costs : Optional[Dict[Node, float]] = None) -> PipelineSplitResult:
+    """
+    Split `gm` into `num_stages` pipeline stages of balanced cost. Each stage is
+    a contiguous range of the Nodes of `gm.graph`, so the stages can run one
+    after the other, e.g. on different devices or processes.
+
+    `node_costs` maps the Nodes computing values to their cost, see
+    `estimate_node_costs` for the default. There are fewer stages only if
+    `gm` has fewer than `num_stages` such Nodes.
+    """
+    if num_stages < 1:
+        raise ValueError(f'num_stages should be positive, but got {num_stages}')
+    if node_costs is None:
+        node_costs = estimate_node_costs(gm)
+
+    compute_nodes = [n for n in gm.graph.nodes if n.op in ('call_function', 'call_method', 'call_module')]
+    if not compute_nodes:
+        raise RuntimeError('Cannot split a GraphModule that computes nothing')
+    costs = [float(node_costs.get(n, 0.0)) for n in compute_nodes]
+    starts = _balanced_split(costs, num_stages)
+
+    stage_of : Dict[Node, int] = {}
+    ends = starts[1:] + [len(compute_nodes)]
+    for stage, (start, end) in enumerate(zip(starts, ends)):
+        for node in compute_nodes[start:end]:
+            stage_of[node] = stage
+
+    module_with_stages = split_module(gm, gm, lambda node: stage_of[node])
+    stages = [getattr(module_with_stages, f'submod_{i}') for i in range(len(starts))]
+    stage_costs = [sum(costs[start:end]) for start, end in zip(starts, ends)]
+    return PipelineSplitResult(module_with_stages, stages, stage_costs)
@@ -1,51 +1,23 @@
 import torch
 import torch.fx
 from torch.fx.node import Node
+from torch.fx.interpreter import Interpreter
 
-from typing import Dict
-
-class ShapeProp:
-    def __init__(self, mod):
-        self.mod = mod
-        self.graph = mod.graph
-        self.modules = dict(self.mod.named_modules())
+from typing import Any
 
+class ShapeProp(Interpreter):
+    """
+    Runs a GraphModule with example inputs, recording the `shape` and `dtype`
+    of every Node whose value is a Tensor as attributes of that Node.
+    """
     def propagate(self, *args):
-        args_iter = iter(args)
-        env : Dict[str, Node] = {}
-
-        def load_arg(a):
-            return torch.fx.node.map_arg(a, lambda n: env[n.name])
-
-        def fetch_attr(target : str):
-            target_atoms = target.split('.')
-            attr_itr = self.mod
-            for i, atom in enumerate(target_atoms):
-                if not hasattr(attr_itr, atom):
-                    raise RuntimeError(f"Node referenced nonexistant target {'.'.join(target_atoms[:i])}")
-                attr_itr = getattr(attr_itr, atom)
-            return attr_itr
-
-        for node in self.graph.nodes:
-            if node.op == 'placeholder':
-                result = next(args_iter)
-            elif node.op == 'get_attr':
-                result = fetch_attr(node.target)
-            elif node.op == 'call_function':
-                result = node.target(*load_arg(node.args), **load_arg(node.kwargs))
-            elif node.op == 'call_method':
-                self_obj, *args = load_arg(node.args)
-                kwargs = load_arg(node.kwargs)
-                result = getattr(self_obj, node.target)(*args, **kwargs)
-            elif node.op == 'call_module':
-                result = self.modules[node.target](*load_arg(node.args), **load_arg(node.kwargs))
-            elif node.op == 'output':
-                return load_arg(node.args[0])
+        return self.run(*args)
 
-            if isinstance(result, torch.Tensor):
-                node.shape = result.shape
-                node.dtype = result.dtype
+    def run_node(self, n : Node) -> Any:
+        result = super().run_node(n)
 
-            env[node.name] = result
+        if isinstance(result, torch.Tensor):
+            n.shape = result.shape
+            n.dtype = result.dtype
 
-        return None
+        return result
@@ -116,7 +116,9 @@ def split_module(
                         raise RuntimeError(f'Operator target {node.target} not found!')
                     target_attr = getattr(target_attr, atom)
                 partition.targets[node.target] = target_attr
-                target = target_atoms[-1]
+                # Keep the qualified name, the submodule installs the same
+                # hierarchy (e.g. `layers.0` of an `nn.Sequential`)
+                target = node.target
 
             assert isinstance(gathered_args, tuple)
             assert isinstance(gathered_kwargs, dict)
@@ -0,0 +1,176 @@
+import torch
+from torch.fx.graph_module import GraphModule, _copy_attr
+from torch.fx.node import Argument, Node
+from torch.fx.symbolic_trace import symbolic_trace
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Union
+
+class Match(NamedTuple):
+    """A match of a pattern in a Graph."""
+    # Node of the Graph matched by the Node returned by the pattern
+    anchor: Node
+    # Maps the Nodes of the pattern (including its placeholders) to the Nodes,
+    # or constant values for placeholders, of the Graph they matched
+    nodes_map: Dict[Node, Any]
+
+class SubgraphMatcher:
+    """
+    Finds the matches of a pattern Graph in another Graph.
+
+    The pattern is a Graph returning a single value. Its placeholders match
+    any value, the other Nodes match Nodes with the same opcode, target and
+    arguments. A match is only reported if the values computed by the matched
+    Nodes, except the one matched by the returned Node, are not used outside
+    the match, so the matched Nodes can be replaced.
+    """
+    def __init__(self, pattern : torch.fx.Graph):
+        self.pattern = pattern
+        output_node = [n for n in pattern.nodes if n.op == 'output'][0]
+        pattern_anchor = output_node.args[0]
+        if not isinstance(pattern_anchor, Node) or pattern_anchor.op == 'placeholder':
+            raise RuntimeError('The pattern should return the value of a single Node computed from its inputs')
+        self.pattern_anchor : Node = pattern_anchor
+
+    def matches(self, graph : torch.fx.Graph) -> List[Match]:
+        """
+        Return the non-overlapping matches of the pattern in `graph`, in the
+        order of their anchors in `graph`.
+        """
+        matches : List[Match] = []
+        matched_nodes : Set[Node] = set()
+        # Visit the anchors in reverse order, so that when matches overlap the
+        # one computing the later value wins, e.g. the outer `add` of
+        # `(x + y) + z` for the pattern `a + b`
+        for node in reversed(graph.nodes):
+            if node in matched_nodes:
+                continue
+            nodes_map = self._match(node)
+            if nodes_map is None:
+                continue
+            internal = {gn for pn, gn in nodes_map.items() if pn.op != 'placeholder'}
+            if internal & matched_nodes:
+                continue
+            matched_nodes |= internal
+            matches.append(Match(anchor=node, nodes_map=nodes_map))
+        matches.reverse()
+        return matches
+
+    def _match(self, anchor : Node) -> Optional[Dict[Node, Any]]:
+        nodes_map : Dict[Node, Any] = {}
+        if not self._match_nodes(self.pattern_anchor, anchor, nodes_map):
+            return None
+        # Only the anchor may be used outside of the match
+        internal = {nodes_map[pn] for pn in nodes_map if pn.op != 'placeholder'}
+        for pn, gn in nodes_map.items():
+            if pn.op == 'placeholder' or gn is anchor:
+                continue
+            if any(user not in internal for user in gn.users):
+                return None
+        return nodes_map
+
+    def _match_nodes(self, pn : Node, gn : Any, nodes_map : Dict[Node, Any]) -> bool:
+        if pn in nodes_map:
+            bound = nodes_map[pn]
+            return bound is gn or (not isinstance(bound, Node) and not isinstance(gn, Node) and
+                                   type(bound) == type(gn) and bound == gn)
+        if pn.op == 'placeholder':
+            nodes_map[pn] = gn
+            return True
+        if not isinstance(gn, Node) or any(bound is gn for bound in nodes_map.values()):
+            return False
+        if pn.op != gn.op or pn.target != gn.target:
+            return False
+        if len(pn.args) != len(gn.args) or set(pn.kwargs) != set(gn.kwargs):
+            return False
+        nodes_map[pn] = gn
+        if all(self._match_args(pa, ga, nodes_map) for pa, ga in zip(pn.args, gn.args)) and \
+                all(self._match_args(pn.kwargs[k], gn.kwargs[k], nodes_map) for k in pn.kwargs):
+            return True
+        del nodes_map[pn]
+        return False
+
+    def _match_args(self, pa : Argument, ga : Argument, nodes_map : Dict[Node, Any]) -> bool:
+        if isinstance(pa, Node):
+            return self._match_nodes(pa, ga, nodes_map)
+        if isinstance(pa, (tuple, list)):
+            return isinstance(ga, (tuple, list)) and len(pa) == len(ga) and \
+                all(self._match_args(p, g, nodes_map) for p, g in zip(pa, ga))
+        if isinstance(pa, dict):
+            return isinstance(ga, dict) and set(pa) == set(ga) and \
+                all(self._match_args(pa[k], ga[k], nodes_map) for k in pa)
+        return not isinstance(ga, Node) and type(pa) == type(ga) and pa == ga
+
+def replace_pattern(gm : GraphModule,
+                    pattern : Union[Callable, torch.nn.Module],
+                    replacement : Union[Callable, torch.nn.Module]) -> List[Match]:
+    """
+    Replace every non-overlapping match of `pattern` in the Graph of `gm` by
+    `replacement`, and recompile `gm`. Returns the matches that were replaced.
+
+    `pattern` and `replacement` are traced with `symbolic_trace`. They take the
+    same parameters, and `pattern` returns a single value. The parameters of
+    `pattern` match any value, and `replacement` is called on the values they
+    matched. Attributes and submodules used by `replacement` are copied into
+    `gm` unless `gm` already has them.
+
+    Example:
+
+        def pattern(w1, w2):
+            return torch.cat([w1, w2]).sum()
+
+        def replacement(w1, w2):
+            return torch.stack([w1, w2])
+
+        replace_pattern(traced_module, pattern, replacement)
+    """
+    pattern_graph = symbolic_trace(pattern).graph
+    replacement_gm = symbolic_trace(replacement)
+    replacement_graph = replacement_gm.graph
+
+    pattern_placeholders = [n for n in pattern_graph.nodes if n.op == 'placeholder']
+    replacement_placeholders = [n for n in replacement_graph.nodes if n.op == 'placeholder']
+    if len(pattern_placeholders) != len(replacement_placeholders):
+        raise RuntimeError(f'The pattern takes {len(pattern_placeholders)} arguments, but the replacement '
+                           f'takes {len(replacement_placeholders)}')
+    for pn, rn in zip(pattern_placeholders, replacement_placeholders):
+        # A parameter the pattern doesn't use matches nothing
+        if rn.users and not pn.users:
+            raise RuntimeError(f'The replacement uses the parameter {rn.target}, which the pattern '
+                               f'does not use')
+
+    for node in replacement_graph.nodes:
+        if node.op in ('get_attr', 'call_module'):
+            assert isinstance(node.target, str)
+            if not _has_attr(gm, node.target):
+                _copy_attr(replacement_gm, gm, node.target)
+
+    graph = gm.graph
+    matches = SubgraphMatcher(pattern_graph).matches(graph)
+    # An argument of a match may be the anchor of an earlier match, which has
+    # been replaced by then
+    replaced : Dict[Node, Node] = {}
+    for match in matches:
+        val_map : Dict[Node, Any] = {}
+        for pn, rn in zip(pattern_placeholders, replacement_placeholders):
+            # Only parameters unused by the replacement may be unmatched
+            value = match.nodes_map.get(pn)
+            val_map[rn] = replaced.get(value, value) if isinstance(value, Node) else value
+        with graph.inserting_before(match.anchor):
+            replacement_value = graph.graph_copy(replacement_graph, val_map)
+        assert isinstance(replacement_value, Node)
+        match.anchor.replace_all_uses_with(replacement_value)
+        replaced[match.anchor] = replacement_value
+        # Erase the matched Nodes, users first
+        matched = [match.nodes_map[pn] for pn in pattern_graph.nodes
+                   if pn in match.nodes_map and pn.op != 'placeholder']
+        for node in reversed(matched):
+            graph.erase_node(node)
+
+    gm.recompile()
+    return matches
+
+def _has_attr(module : torch.nn.Module, target : str) -> bool:
+    for atom in target.split('.'):
+        if not hasattr(module, atom):
+            return False
+        module = getattr(module, atom)
+    return True
@@ -116,6 +116,9 @@ class Graph:
         self._used_names : Dict[str, int] = {}  # base name -> number
         self._insert = self._root.prepend
         self._len = 0
+        # Whether the generated code deletes each value after its last use,
+        # see python_code
+        self.free_unused_values = False
 
     @property
     def nodes(self):
@@ -164,6 +167,14 @@ class Graph:
         to_erase._erased = True  # iterators may retain handles to erased nodes
         self._len -= 1
 
+        # Null out the arguments of the erased Node, so that the Nodes it used
+        # no longer list it among their users
+        new_args = map_arg(to_erase.args, lambda n: None)
+        assert isinstance(new_args, tuple)
+        new_kwargs = map_arg(to_erase.kwargs, lambda n: None)
+        assert isinstance(new_kwargs, dict)
+        to_erase._update_args_kwargs(new_args, new_kwargs)
+
     def inserting_before(self, n: Optional[Node] = None):
         """Set the point at which create_node and companion methods will insert into the graph.
         When used within a 'with' statement, this will temporary set the insert point and
@@ -302,7 +313,9 @@ class Graph:
         i = self._used_names[op] = self._used_names[op] + 1
         return f'{op}_{i}'
 
-    def python_code(self, root_module: str) -> str:
+    def python_code(self, root_module: str, free_unused_values: Optional[bool] = None) -> str:
+        if free_unused_values is None:
+            free_unused_values = self.free_unused_values
         free_vars: List[str] = []
         modules_used : Set[str] = set()
         body: List[str] = []
@@ -318,7 +331,33 @@ class Graph:
             register_modules_used(typename)
             return typename
 
+        # Maps each value to the last Node using it, to delete it afterwards
+        node_to_last_use : Dict[Node, Node] = {}
+        user_to_last_uses : Dict[Node, List[Node]] = {}
+        if free_unused_values:
+            for node in self.nodes:
+                def register_last_use(n : Node) -> Node:
+                    node_to_last_use[n] = node
+                    return n
+                map_arg(node.args, register_last_use)
+                map_arg(node.kwargs, register_last_use)
+            for value, user in node_to_last_use.items():
+                user_to_last_uses.setdefault(user, []).append(value)
+
+        def delete_unused_values(user : Node):
+            if user.op in ('root', 'output'):
+                return
+            to_delete = list(user_to_last_uses.get(user, []))
+            if user not in node_to_last_use:
+                # unused value
+                to_delete.append(user)
+            if to_delete:
+                body.append(f'del {", ".join(n.name for n in to_delete)}\n')
+
         for node in self.nodes:
+            if free_unused_values:
+                # the values last used by the previous Node
+                delete_unused_values(node.prev)
             if node.op == 'placeholder':
                 assert isinstance(node.target, str)
                 maybe_type_annotation = '' if node.type is None else f' : {type_repr(node.type)}'
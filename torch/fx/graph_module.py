@@ -1,21 +1,96 @@
 import torch
 import torch.overrides
 import linecache
-from typing import Type, Dict, List, Any, Union
+import hashlib
+import marshal
+import os
+import sys
+import types
+from typing import Type, Dict, List, Any, Union, Optional
 from .graph import Graph
 import copy
 
+# NOTE [ Code Cache ]
+#
+# Compiling the generated code of a GraphModule is much slower than executing
+# the compiled code, which only defines `forward`. Compiled code objects are
+# thus cached, keyed by the SHA-256 hash of the generated code, in memory and,
+# if a directory is set with `set_code_cache_dir` (or the
+# PYTORCH_FX_CODE_CACHE_DIR environment variable), on disk so that they are
+# shared across processes. The cache files are written with `marshal`, so the
+# directory must only be writable by trusted users.
+#
+# The file name of the compiled code is derived from the same hash, so that
+# code objects loaded from disk still map to their source in `linecache`.
+_code_cache : Dict[str, types.CodeType] = {}
+_code_cache_dir : Optional[str] = os.environ.get('PYTORCH_FX_CODE_CACHE_DIR')
+
+def set_code_cache_dir(path : Optional[str]) -> None:
+    """
+    Set the directory caching the compiled code of GraphModules across
+    processes, or disable the on-disk cache if `path` is None. See
+    NOTE [ Code Cache ].
+    """
+    global _code_cache_dir
+    _code_cache_dir = path
+
+def clear_code_cache() -> None:
+    """Clear the in-memory cache of the compiled code of GraphModules."""
+    _code_cache.clear()
+
+def _code_cache_path(key : str) -> Optional[str]:
+    if _code_cache_dir is None:
+        return None
+    # marshal's format depends on the Python version
+    return os.path.join(_code_cache_dir, f'{key}.{sys.implementation.cache_tag}.fxcode')
+
+def _load_cached_code(key : str) -> Optional[types.CodeType]:
+    path = _code_cache_path(key)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            code = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        # unreadable or corrupted file, compile again
+        return None
+    return code if isinstance(code, types.CodeType) else None
+
+def _save_cached_code(key : str, code : types.CodeType) -> None:
+    path = _code_cache_path(key)
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first so that concurrent processes never
+        # read a partially written file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            marshal.dump(code, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        # the on-disk cache is best effort
+        pass
+
+def _compile_with_cache(src : str) -> types.CodeType:
+    key = hashlib.sha256(src.encode('utf-8')).hexdigest()
+    code = _code_cache.get(key)
+    if code is None:
+        code = _load_cached_code(key)
+        if code is None:
+            code = compile(src, f'<eval_with_key_{key[:16]}>', 'exec')
+            _save_cached_code(key, code)
+        _code_cache[key] = code
+    return code
+
 # normal exec loses the source code, however we can patch
 # the linecache module to still recover it.
 # using exec_with_source will add it to our local cache
 # and then tools like TorchScript will be able to get source info.
-_next_id = 0
 def exec_with_source(src: str, globals: Dict[str, Any]):
-    global _next_id
-    key = f'<eval_with_key_{_next_id}>'
-    _next_id += 1
-    _eval_cache[key] = [line + '\n' for line in src.splitlines()]
-    exec(compile(src, key, 'exec'), globals)
+    code = _compile_with_cache(src)
+    _eval_cache[code.co_filename] = [line + '\n' for line in src.splitlines()]
+    exec(code, globals)
 
 # patch linecache so that any code we exec using exec_with_source
 # works with inspect
@@ -35,20 +110,19 @@ def _forward_from_src(src : str):
 
 def deserialize_graphmodule(body : dict) -> torch.nn.Module:
     """
-    Deserialize a GraphModule given the dictionary of the original module,
-    using the code to reconstruct the graph. We delete the actual graph before
-    saving the dictionary so that changes to the in-memory graph format do not
-    get serialized.
+    Deserialize a GraphModule given the dictionary of the original module.
+    We delete the actual graph before saving the dictionary so that changes to
+    the in-memory graph format do not get serialized. The forward method is
+    restored from the saved code, and the graph is only reconstructed from the
+    code, by tracing it, when it is first accessed.
     """
-    # We create a dummy class here because symbolic_trace pulls the forward()
-    # function off of the class, rather than the instance
-    class CodeOnlyModule(torch.nn.Module):
-        def __init__(self, body):
-            super().__init__()
-            self.__dict__ = body
-
-    CodeOnlyModule.forward = _forward_from_src(body['code'])
+    gm = GraphModule.__new__(GraphModule)
+    gm.__dict__.update(body)
+    gm._graph = None
+    type(gm).forward = _forward_from_src(body['code'])
+    return gm
 
+def _graph_from_code(gm : torch.nn.Module) -> Graph:
     from .symbolic_trace import Tracer
 
     # we shouldn't trace into any of the submodules, they were not
@@ -57,8 +131,7 @@ def deserialize_graphmodule(body : dict) -> torch.nn.Module:
         def is_leaf_module(self, _: torch.nn.Module, __: str) -> bool:
             return True
 
-    com = CodeOnlyModule(body)
-    return GraphModule(com, KeepModules().trace(com))
+    return KeepModules().trace(gm)
 
 # copy an attribute value with qualified name 'target' from 'from_module' to 'to_module'
 # This installs empty Modules where none exist yet if they are subpaths of target
@@ -169,6 +242,9 @@ class GraphModule(torch.nn.Module):
 
     @property
     def graph(self):
+        if self._graph is None:
+            # deserialized GraphModule, see deserialize_graphmodule
+            self._graph = _graph_from_code(self)
         return self._graph
 
     @graph.setter
@@ -182,7 +258,7 @@ class GraphModule(torch.nn.Module):
         called after editing the contained `graph`, otherwise the generated
         code of this `GraphModule` will be out of date.
         """
-        self.code = self._graph.python_code(root_module='self')
+        self.code = self.graph.python_code(root_module='self')
         cls = type(self)
         cls.forward = _forward_from_src(self.code)
 
@@ -0,0 +1,136 @@
+from .graph_module import GraphModule
+from .node import Argument, Node, Target, map_arg
+from typing import Any, Dict, Iterator, Tuple
+
+class Interpreter:
+    """
+    An Interpreter executes a GraphModule node-by-node, instead of running the
+    Python code generated for its Graph. This makes it possible to observe or
+    change what happens at each Node, e.g. to record the shapes of the values
+    or the time spent computing them.
+
+    Each opcode has a method (`placeholder`, `get_attr`, `call_function`,
+    `call_method`, `call_module` and `output`) taking the Node's target and
+    its args and kwargs with Nodes replaced by their values. `run_node` calls
+    the right one for a Node. Subclasses override these methods to customize
+    the execution. For example, to count the calls to each submodule:
+
+        class CountModuleCalls(Interpreter):
+            def __init__(self, module):
+                super().__init__(module)
+                self.counts : Dict[str, int] = {}
+
+            def call_module(self, target, args, kwargs):
+                self.counts[target] = self.counts.get(target, 0) + 1
+                return super().call_module(target, args, kwargs)
+
+        interp = CountModuleCalls(gm)
+        out = interp.run(x)
+    """
+    def __init__(self, module : GraphModule):
+        """
+        Construct an Interpreter.
+        module - the GraphModule to run. Its `graph` is read on each call to
+                 `run`, so edits to the graph are picked up.
+        """
+        self.module = module
+        self.submodules = dict(self.module.named_modules())
+        self.env : Dict[Node, Any] = {}
+
+    def run(self, *args) -> Any:
+        """
+        Run the module on `args` by interpreting its Graph and return the
+        result.
+        """
+        self.env = {}
+        self.args_iter : Iterator[Any] = iter(args)
+        try:
+            for node in self.module.graph.nodes:
+                self.env[node] = self.run_node(node)
+
+                if node.op == 'output':
+                    return self.env[node]
+        finally:
+            # Don't keep the intermediate values alive after the run
+            self.env = {}
+        return None
+
+    def run_node(self, n : Node) -> Any:
+        """
+        Run the Node `n` and return its value.
+        """
+        args, kwargs = self.fetch_args_kwargs_from_env(n)
+        assert isinstance(args, tuple)
+        assert isinstance(kwargs, dict)
+        return getattr(self, n.op)(n.target, args, kwargs)
+
+    # Main Node running APIs
+
+    def placeholder(self, target : Target, args : Tuple[Argument, ...], kwargs : Dict[str, Any]) -> Any:
+        assert isinstance(target, str)
+        if target.startswith('*'):
+            # For a starred parameter e.g. `*args`, retrieve all
+            # remaining values from the args list.
+            return tuple(self.args_iter)
+        try:
+            return next(self.args_iter)
+        except StopIteration:
+            raise RuntimeError(f'Expected positional argument for parameter {target}, but one was not passed in!')
+
+    def get_attr(self, target : Target, args : Tuple[Argument, ...], kwargs : Dict[str, Any]) -> Any:
+        assert isinstance(target, str)
+        return self.fetch_attr(target)
+
+    def call_function(self, target : Target, args : Tuple[Argument, ...], kwargs : Dict[str, Any]) -> Any:
+        assert callable(target)
+        return target(*args, **kwargs)
+
+    def call_method(self, target : Target, args : Tuple[Argument, ...], kwargs : Dict[str, Any]) -> Any:
+        # args[0] is the `self` object for this method call
+        self_obj, *args_tail = args
+        assert isinstance(target, str)
+        return getattr(self_obj, target)(*args_tail, **kwargs)
+
+    def call_module(self, target : Target, args : Tuple[Argument, ...], kwargs : Dict[str, Any]) -> Any:
+        assert isinstance(target, str)
+        submod = self.fetch_attr(target)
+        return submod(*args, **kwargs)
+
+    def output(self, target : Target, args : Tuple[Argument, ...], kwargs : Dict[str, Any]) -> Any:
+        return args[0]
+
+    # Helper methods
+
+    def fetch_attr(self, target : str) -> Any:
+        """
+        Fetch an attribute from the module hierarchy of `self.module`.
+        target - the fully-qualified name of the attribute to fetch
+        """
+        if target in self.submodules:
+            return self.submodules[target]
+        target_atoms = target.split('.')
+        attr_itr = self.module
+        for i, atom in enumerate(target_atoms):
+            if not hasattr(attr_itr, atom):
+                raise RuntimeError(f"Node referenced nonexistent target {'.'.join(target_atoms[:i + 1])}")
+            attr_itr = getattr(attr_itr, atom)
+        return attr_itr
+
+    def fetch_args_kwargs_from_env(self, n : Node) -> Tuple[Tuple, Dict]:
+        """
+        Fetch the concrete values of the args and kwargs of Node `n` from the
+        values of the Nodes computed so far.
+        """
+        args = self.map_nodes_to_values(n.args, n)
+        assert isinstance(args, tuple)
+        kwargs = self.map_nodes_to_values(n.kwargs, n)
+        assert isinstance(kwargs, dict)
+        return args, kwargs
+
+    def map_nodes_to_values(self, args : Argument, n : Node) -> Argument:
+        def load_arg(n_arg : Node) -> Any:
+            if n_arg not in self.env:
+                raise RuntimeError(f'Node {n} referenced nonexistent value {n_arg}! Run Graph.lint() '
+                                   f'to diagnose such issues')
+            return self.env[n_arg]
+        return map_arg(args, load_arg)
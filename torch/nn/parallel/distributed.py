@@ -540,6 +540,9 @@ class DistributedDataParallel(Module):
         parameters = [
             list(parameter for _, parameter in replica)
             for replica in modules_and_parameters]
+        # The parameters of the first replica, in the order of the indices
+        # returned by GradBucket.get_variable_indices().
+        self._reducer_parameters = parameters[0]
 
         # Checks if a module will produce a sparse gradient.
         def produces_sparse_gradient(module):
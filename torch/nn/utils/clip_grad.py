@@ -1,7 +1,7 @@
 import warnings
 import torch
 from torch._six import inf
-from typing import Union, Iterable
+from typing import Dict, Iterable, List, Union
 
 _tensor_or_tensors = Union[torch.Tensor, Iterable[torch.Tensor]]
 
@@ -36,8 +36,20 @@ def clip_grad_norm_(parameters: _tensor_or_tensors, max_norm: float, norm_type:
         total_norm = torch.norm(torch.stack([torch.norm(p.grad.detach(), norm_type).to(device) for p in parameters]), norm_type)
     clip_coef = max_norm / (total_norm + 1e-6)
     if clip_coef < 1:
+        # Scale the dense gradients of each device with a single multi tensor
+        # kernel, clip_coef already being synchronized by the comparison
+        clip_coef_value = clip_coef.item()
+        grads_per_device: Dict[torch.device, List[torch.Tensor]] = {}
         for p in parameters:
-            p.grad.detach().mul_(clip_coef.to(p.grad.device))
+            grad = p.grad.detach()
+            if grad.is_sparse:
+                grad.mul_(clip_coef.to(grad.device))
+            else:
+                grads_per_device.setdefault(grad.device, []).append(grad)
+        # Only devices holding dense gradients have a list, as the foreach
+        # kernels reject empty ones
+        for grads in grads_per_device.values():
+            torch._foreach_mul_(grads, clip_coef_value)
     return total_norm
 
 
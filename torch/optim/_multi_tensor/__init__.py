@@ -13,6 +13,9 @@ from .rprop import Rprop
 from .asgd import ASGD
 from .adamax import Adamax
 from .adadelta import Adadelta
+from .adagrad import Adagrad
+from .sparse_adam import SparseAdam
+from .lbfgs import LBFGS
 
 del adam
 del adamw
@@ -22,3 +25,6 @@ del rprop
 del asgd
 del adamax
 del adadelta
+del adagrad
+del sparse_adam
+del lbfgs
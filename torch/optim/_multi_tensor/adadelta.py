@@ -55,7 +55,7 @@ class Adadelta(Optimizer):
 
             rho, eps = group['rho'], group['eps']
 
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None: 
                     if p.grad.is_sparse:
                         raise RuntimeError('Adadelta does not support sparse gradients')
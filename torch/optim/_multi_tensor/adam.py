@@ -74,7 +74,7 @@ class Adam(Optimizer):
             max_exp_avg_sq = []
             params_with_grad = []
 
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None:
                     if p.grad.is_sparse:
                         raise RuntimeError('Adam does not support sparse gradients, please consider SparseAdam instead')
@@ -59,7 +59,7 @@ class Adamax(Optimizer):
             beta1, beta2 = group['betas']
             eps = group['eps']
 
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None:
                     if p.grad.is_sparse:
                         raise RuntimeError('Adamax does not support sparse gradients')
@@ -50,7 +50,7 @@ class ASGD(Optimizer):
         states = []
 
         for group in self.param_groups:
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None:
                     if p.grad.is_sparse:
                         raise RuntimeError('ASGD does not support sparse gradients')
@@ -0,0 +1,26 @@
+import torch
+from .. import lbfgs
+
+
+class LBFGS(lbfgs.LBFGS):
+    """Implements L-BFGS algorithm with multi tensor APIs, heavily inspired by
+    `minFunc <https://www.cs.ubc.ca/~schmidtm/Software/minFunc.html>`.
+
+    L-BFGS works on the concatenation of all the parameters, so only the
+    updates of the parameters, which are done once per function evaluation,
+    are fused. See :class:`torch.optim.LBFGS` for the arguments and caveats.
+    """
+
+    def _add_grad(self, step_size, update):
+        views = [view.view_as(p) for view, p in zip(update.split(self._numels()), self._params)]
+        torch._foreach_add_(self._params, views, alpha=step_size)
+
+    def _numels(self):
+        if getattr(self, '_numels_cache', None) is None:
+            self._numels_cache = [p.numel() for p in self._params]
+        return self._numels_cache
+
+    def _clone_param(self):
+        # One copy of all the parameters, viewed as each of them
+        flat = torch.cat([p.reshape(-1) for p in self._params])
+        return [view.view_as(p) for view, p in zip(flat.split(self._numels()), self._params)]
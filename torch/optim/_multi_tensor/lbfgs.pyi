@@ -0,0 +1,3 @@
+from .. import lbfgs
+
+class LBFGS(lbfgs.LBFGS): ...
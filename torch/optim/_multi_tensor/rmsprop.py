@@ -72,7 +72,7 @@ class RMSprop(Optimizer):
             alpha = group['alpha']
             square_avg = []
 
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None:
                     if p.grad.is_sparse:
                         raise RuntimeError('RMSprop does not support sparse gradients')
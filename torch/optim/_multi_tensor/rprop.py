@@ -44,7 +44,7 @@ class Rprop(Optimizer):
         step_sizes = []
 
         for group in self.param_groups:
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 etaminus, etaplus = group['etas']
                 step_size_min, step_size_max = group['step_sizes']
 
@@ -96,7 +96,7 @@ class SGD(Optimizer):
             states = []
             has_sparse_grad = False
 
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None:
                     grads.append(p.grad)
                     params_with_grad.append(p)
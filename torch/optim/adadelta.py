@@ -49,7 +49,7 @@ class Adadelta(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is None:
                     continue
                 grad = p.grad
@@ -69,7 +69,7 @@ class Adagrad(Optimizer):
             state_sums = []
             state_steps = []
 
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None:
                     params_with_grad.append(p)
                     grads.append(p.grad)
@@ -74,7 +74,7 @@ class Adam(Optimizer):
             max_exp_avg_sqs = []
             state_steps = []
 
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is not None:
                     params_with_grad.append(p)
                     if p.grad.is_sparse:
@@ -65,7 +65,7 @@ class AdamW(Optimizer):
                 loss = closure()
 
         for group in self.param_groups:
-            for p in group['params']:
+            for p in self._params_for_step(group):
                 if p.grad is None:
                     continue
 
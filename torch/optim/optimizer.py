@@ -1,4 +1,4 @@
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from torch._six import container_abcs
 
 import torch
@@ -15,6 +15,180 @@ class _RequiredParameter(object):
 required = _RequiredParameter()
 
 
+class _FlatParams(object):
+    r"""Parameters of a group sharing a device and dtype, stored as views of
+    one flat Tensor, as well as their gradients.
+
+    The flat Tensor ``param`` and its gradient ``param.grad`` stand for all the
+    parameters when the optimizer steps, so that its state is flat too.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.numels = [p.numel() for p in params]
+        with torch.no_grad():
+            self.param = torch.cat([p.detach().reshape(-1) for p in params])
+            self.param.grad = torch.zeros_like(self.param)
+            self.param_views = self._views(self.param)
+            self.grad_views = self._views(self.param.grad)
+            for p, param_view, grad_view in zip(params, self.param_views, self.grad_views):
+                if p.grad is not None:
+                    if p.grad.is_sparse:
+                        raise RuntimeError("flat parameters do not support sparse gradients")
+                    grad_view.copy_(p.grad)
+                p.data = param_view
+                p.grad = grad_view
+
+    def _views(self, flat):
+        return [view.view_as(p) for view, p in zip(flat.split(self.numels), self.params)]
+
+    @torch.no_grad()
+    def sync_grads(self):
+        r"""Copy into the flat gradient the gradients that were replaced since
+        the last step, e.g. by ``p.grad = ...``. Missing gradients are zero."""
+        for p, param_view, grad_view in zip(self.params, self.param_views, self.grad_views):
+            if p.data_ptr() != param_view.data_ptr():
+                raise RuntimeError("a parameter was moved out of its flat buffer, e.g. by Module.to(); "
+                                   "call flatten_parameters() on a new optimizer")
+            grad = p.grad
+            if grad is grad_view:
+                continue
+            if grad is None:
+                grad_view.zero_()
+            elif grad.is_sparse:
+                raise RuntimeError("flat parameters do not support sparse gradients")
+            else:
+                grad_view.copy_(grad)
+            p.grad = grad_view
+
+    @torch.no_grad()
+    def zero_grad(self):
+        self.param.grad.zero_()
+        for p, grad_view in zip(self.params, self.grad_views):
+            if p.grad is not grad_view:
+                p.grad = grad_view
+
+    def flatten_state(self, state):
+        r"""Move the states of the parameters in ``state``, a
+        :class:`_FlatParamsState`, to the state of the flat parameter, and
+        replace them by views of it. Tensors shaped like the parameters are
+        concatenated, missing ones being zero, and other values are taken from
+        the first parameter having them."""
+        param_states = [state.pop(p, {}) for p in self.params]
+        keys = OrderedDict((k, None) for s in param_states for k in s)
+        flat_state = {}
+        for key in keys:
+            values = [s.get(key) for s in param_states]
+            if all(v is None or (torch.is_tensor(v) and v.shape == p.shape)
+                   for v, p in zip(values, self.params)) and any(torch.is_tensor(v) for v in values):
+                like = next(v for v in values if torch.is_tensor(v))
+                flat_state[key] = torch.cat([
+                    (v if v is not None else torch.zeros_like(p, dtype=like.dtype)).reshape(-1).to(self.param.device)
+                    for v, p in zip(values, self.params)])
+            else:
+                flat_state[key] = next(v for v in values if v is not None)
+        state.flat_states[self.param] = flat_state
+        state.update(self.state_views(flat_state))
+
+    def unflatten_state(self, flat_state):
+        r"""Return the states of the parameters, whose Tensors are views of
+        those of ``flat_state``."""
+        param_states = [{} for _ in self.params]
+        for key, value in flat_state.items():
+            if torch.is_tensor(value) and value.shape == self.param.shape:
+                for param_state, view in zip(param_states, self._views(value)):
+                    param_state[key] = view
+            else:
+                for param_state in param_states:
+                    param_state[key] = value
+        return dict(zip(self.params, param_states))
+
+    def state_views(self, flat_state):
+        r"""Return the states of the parameters, seen through
+        :class:`_ParamStateView` s of ``flat_state``."""
+        offsets = [0]
+        for numel in self.numels[:-1]:
+            offsets.append(offsets[-1] + numel)
+        return {p: _ParamStateView(flat_state, self.param, p, offset)
+                for p, offset in zip(self.params, offsets)}
+
+
+class _ParamStateView(container_abcs.MutableMapping):
+    r"""The state of a parameter whose group is flattened, as a view of the
+    state of the flat parameter. Tensors shaped like the flat parameter are
+    seen through views shaped like the parameter, and assigning a Tensor
+    shaped like the parameter copies it into them. Other values are shared by
+    all the parameters of the flat buffer."""
+
+    def __init__(self, flat_state, flat_param, param, offset):
+        self.flat_state = flat_state
+        self._flat_shape = flat_param.shape
+        self._shape = param.shape
+        self._offset = offset
+        self._numel = param.numel()
+
+    def _is_flat(self, value):
+        return torch.is_tensor(value) and value.shape == self._flat_shape
+
+    def _view(self, value):
+        return value[self._offset:self._offset + self._numel].view(self._shape)
+
+    def __getitem__(self, key):
+        value = self.flat_state[key]
+        return self._view(value) if self._is_flat(value) else value
+
+    def __setitem__(self, key, value):
+        if torch.is_tensor(value) and value.shape == self._shape:
+            flat_value = self.flat_state.get(key)
+            if not self._is_flat(flat_value):
+                flat_value = self.flat_state[key] = value.new_zeros(self._flat_shape)
+            with torch.no_grad():
+                self._view(flat_value).copy_(value)
+        else:
+            self.flat_state[key] = value
+
+    def __delitem__(self, key):
+        del self.flat_state[key]
+
+    def __iter__(self):
+        return iter(self.flat_state)
+
+    def __len__(self):
+        return len(self.flat_state)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _FlatParamsState(defaultdict):
+    r"""The ``state`` of an optimizer with flattened parameter groups. The
+    states of the flat parameters are kept in ``flat_states`` rather than as
+    items, so that the items are the parameters, whose states are
+    :class:`_ParamStateView` s of them."""
+
+    def __init__(self, state=()):
+        super(_FlatParamsState, self).__init__(dict, state)
+        self.flat_states = {}
+
+    def __getitem__(self, key):
+        flat_state = self.flat_states.get(key)
+        if flat_state is not None:
+            return flat_state
+        return super(_FlatParamsState, self).__getitem__(key)
+
+    def __contains__(self, key):
+        return key in self.flat_states or super(_FlatParamsState, self).__contains__(key)
+
+    def get(self, key, default=None):
+        flat_state = self.flat_states.get(key)
+        if flat_state is not None:
+            return flat_state
+        return super(_FlatParamsState, self).get(key, default)
+
+    def __reduce__(self):
+        return (_FlatParamsState, (dict(self),), {'flat_states': self.flat_states})
+
+
 class Optimizer(object):
     r"""Base class for all optimizers.
 
@@ -41,6 +215,8 @@ class Optimizer(object):
 
         self.state = defaultdict(dict)
         self.param_groups = []
+        # index of a param group -> its _FlatParams, see flatten_parameters
+        self._flat_params = {}
 
         param_groups = list(params)
         if len(param_groups) == 0:
@@ -52,14 +228,23 @@ class Optimizer(object):
             self.add_param_group(param_group)
 
     def __getstate__(self):
-        return {
+        state = {
             'defaults': self.defaults,
-            'state': self.state,
+            'state': self._unflattened_state(),
             'param_groups': self.param_groups,
         }
+        if self._flat_params:
+            state['flat_param_groups'] = sorted(self._flat_params)
+        return state
 
     def __setstate__(self, state):
+        flat_param_groups = state.pop('flat_param_groups', [])
         self.__dict__.update(state)
+        self.__dict__.setdefault('_flat_params', {})
+        if flat_param_groups:
+            # flatten the same groups as the pickled or copied optimizer
+            self._flat_params = {}
+            self._flatten_param_groups(flat_param_groups)
 
     def __repr__(self):
         format_string = self.__class__.__name__ + ' ('
@@ -96,7 +281,7 @@ class Optimizer(object):
         param_groups = [pack_group(g) for g in self.param_groups]
         # Remap state to use order indices as keys
         packed_state = {(param_mappings[id(k)] if isinstance(k, torch.Tensor) else k): v
-                        for k, v in self.state.items()}
+                        for k, v in self._unflattened_state().items()}
         return {
             'state': packed_state,
             'param_groups': param_groups,
@@ -163,6 +348,11 @@ class Optimizer(object):
         param_groups = [
             update_group(g, ng) for g, ng in zip(groups, saved_groups)]
         self.__setstate__({'state': state, 'param_groups': param_groups})
+        if self._flat_params:
+            self.state = _FlatParamsState(self.state)
+            for flat_params in self._flat_params.values():
+                for flat in flat_params:
+                    flat.flatten_state(self.state)
 
     def zero_grad(self, set_to_none: bool = False):
         r"""Sets the gradients of all optimized :class:`torch.Tensor` s to zero.
@@ -178,8 +368,14 @@ class Optimizer(object):
                 3. ``torch.optim`` optimizers have a different behavior if the gradient is 0 or None
                 (in one case it does the step with a gradient of 0 and in the other it skips
                 the step altogether).
+                After :meth:`flatten_parameters`, the gradients of the flattened parameter groups
+                are always set to zero, as they have to stay in their flat buffers.
         """
-        for group in self.param_groups:
+        for i, group in enumerate(self.param_groups):
+            if i in self._flat_params:
+                for flat in self._flat_params[i]:
+                    flat.zero_grad()
+                continue
             for p in group['params']:
                 if p.grad is not None:
                     if set_to_none:
@@ -204,6 +400,79 @@ class Optimizer(object):
         """
         raise NotImplementedError
 
+    def flatten_parameters(self):
+        r"""Store the parameters of each parameter group, their gradients and
+        their optimizer state in contiguous flat buffers, one per device and
+        dtype, so that :meth:`step` and :meth:`zero_grad` apply a few large
+        operations instead of one per parameter. This reduces the overhead of
+        models with many small parameters, such as biases and normalization
+        weights.
+
+        The parameters become views of the flat buffers, and so do their
+        ``.grad``, into which the backward pass accumulates, and the Tensors of
+        their ``state``. Assigning a Tensor shaped like a parameter to its
+        state copies it into the flat buffer, and other values, such as the
+        step count, are shared by the parameters of a buffer. The parameters,
+        ``param_groups`` and :meth:`state_dict` are unchanged otherwise, so
+        state dicts can be exchanged with optimizers that aren't flattened.
+        Copies and unpickled optimizers are flattened too. Parameter groups
+        added later are flattened by calling this method again.
+
+        .. note::
+            The optimizer steps all the parameters of a flattened group at
+            once, treating missing gradients as zero. This only gives the same
+            results as per-parameter updates for optimizers updating each
+            element independently, e.g. :class:`SGD`, :class:`Adam` or
+            :class:`RMSprop`, and when all the parameters get gradients.
+            Moving the parameters afterwards, e.g. with ``Module.to()``,
+            detaches them from the flat buffers, which raises an error on the
+            next step. Subclasses support flat buffers by iterating over
+            :meth:`_params_for_step` rather than ``group['params']`` in
+            :meth:`step`, as the optimizers of :mod:`torch.optim` do.
+        """
+        self._flatten_param_groups(range(len(self.param_groups)))
+
+    def _flatten_param_groups(self, indices):
+        if not isinstance(self.state, _FlatParamsState):
+            self.state = _FlatParamsState(self.state)
+        for i in indices:
+            if i in self._flat_params:
+                continue
+            buckets = OrderedDict()
+            for p in self.param_groups[i]['params']:
+                buckets.setdefault((p.device, p.dtype), []).append(p)
+            self._flat_params[i] = [_FlatParams(params) for params in buckets.values()]
+            for flat in self._flat_params[i]:
+                flat.flatten_state(self.state)
+
+    def _params_for_step(self, group):
+        r"""The parameters of ``group`` to update in :meth:`step`: the flat
+        parameters if the group is flattened (see :meth:`flatten_parameters`),
+        after copying the replaced gradients into the flat buffers, and
+        ``group['params']`` otherwise."""
+        if self._flat_params:
+            for i, param_group in enumerate(self.param_groups):
+                if param_group is group and i in self._flat_params:
+                    for flat in self._flat_params[i]:
+                        flat.sync_grads()
+                    return [flat.param for flat in self._flat_params[i]]
+        return group['params']
+
+    def _unflattened_state(self):
+        r"""The state of each parameter, as dicts even if its group is
+        flattened."""
+        if not self._flat_params:
+            return self.state
+        state = defaultdict(dict, self.state)
+        for flat_params in self._flat_params.values():
+            for flat in flat_params:
+                flat_state = self.state.flat_states[flat.param]
+                for p in flat.params:
+                    state.pop(p, None)
+                if flat_state:
+                    state.update(flat.unflatten_state(flat_state))
+        return state
+
     def add_param_group(self, param_group):
         r"""Add a param group to the :class:`Optimizer` s `param_groups`.
 
@@ -15,4 +15,5 @@ class Optimizer:
     def load_state_dict(self, state_dict: dict) -> None: ...
     def zero_grad(self, set_to_none: Optional[bool]=...) -> None: ...
     def step(self, closure: Optional[Callable[[], float]]=...) -> Optional[float]: ...
+    def flatten_parameters(self) -> None: ...
     def add_param_group(self, param_group: dict) -> None: ...
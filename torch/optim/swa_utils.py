@@ -26,6 +26,11 @@ class AveragedModel(Module):
             :class:`AveragedModel` parameter, the current value of :attr:`model`
             parameter and the number of models already averaged; if None, 
             equally weighted average is used (default: None)
+        ema_decay (float, optional): if provided, the parameters are updated
+            with an exponential moving average of decay :attr:`ema_decay`
+            instead, i.e. ``ema_decay * averaged_model_parameter +
+            (1 - ema_decay) * model_parameter``; cannot be used together with
+            :attr:`avg_fn` (default: None)
 
     Example:
         >>> loader, optimizer, model, loss_fn = ...
@@ -58,6 +63,13 @@ class AveragedModel(Module):
                             0.1 * averaged_model_parameter + 0.9 * model_parameter
         >>> swa_model = torch.optim.swa_utils.AveragedModel(model, avg_fn=ema_avg)
 
+    The exponential moving average can also be computed with :attr:`ema_decay`,
+    which, like the default equally-weighted average, updates all the
+    parameters at once with multi tensor kernels rather than one at a time.
+
+    Example:
+        >>> ema_model = torch.optim.swa_utils.AveragedModel(model, ema_decay=0.1)
+
     .. note::
         When using SWA with models containing Batch Normalization you may 
         need to update the activation statistics for Batch Normalization.
@@ -84,14 +96,24 @@ class AveragedModel(Module):
         Generalizes Well:
         https://arxiv.org/abs/2001.02312
     """
-    def __init__(self, model, device=None, avg_fn=None):
+    def __init__(self, model, device=None, avg_fn=None, ema_decay=None):
         super(AveragedModel, self).__init__()
+        if avg_fn is not None and ema_decay is not None:
+            raise ValueError("avg_fn and ema_decay cannot be used together")
+        if ema_decay is not None and not 0.0 <= ema_decay <= 1.0:
+            raise ValueError("Invalid ema_decay value: {}".format(ema_decay))
         self.module = deepcopy(model)
         if device is not None:
             self.module = self.module.to(device)
         self.register_buffer('n_averaged',
                              torch.tensor(0, dtype=torch.long, device=device))
-        if avg_fn is None:
+        # The built-in averages are computed with multi tensor kernels
+        self._use_foreach = avg_fn is None
+        self.ema_decay = ema_decay
+        if ema_decay is not None:
+            def avg_fn(averaged_model_parameter, model_parameter, num_averaged):
+                return ema_decay * averaged_model_parameter + (1 - ema_decay) * model_parameter
+        elif avg_fn is None:
             def avg_fn(averaged_model_parameter, model_parameter, num_averaged):
                 return averaged_model_parameter + \
                     (model_parameter - averaged_model_parameter) / (num_averaged + 1)
@@ -100,15 +122,29 @@ class AveragedModel(Module):
     def forward(self, *args, **kwargs):
         return self.module(*args, **kwargs)
 
+    @torch.no_grad()
     def update_parameters(self, model):
-        for p_swa, p_model in zip(self.parameters(), model.parameters()):
-            device = p_swa.device
-            p_model_ = p_model.detach().to(device)
-            if self.n_averaged == 0:
-                p_swa.detach().copy_(p_model_)
-            else:
-                p_swa.detach().copy_(self.avg_fn(p_swa.detach(), p_model_,
-                                                 self.n_averaged.to(device)))
+        swa_params = [p.detach() for p in self.parameters()]
+        model_params = [p_model.detach().to(p_swa.device)
+                        for p_swa, p_model in zip(swa_params, model.parameters())]
+        n_averaged = self.n_averaged.item()
+        if not swa_params:
+            # the foreach kernels reject empty lists
+            self.n_averaged += 1
+            return
+        if n_averaged == 0:
+            for p_swa, p_model in zip(swa_params, model_params):
+                p_swa.copy_(p_model)
+        elif not self._use_foreach:
+            for p_swa, p_model in zip(swa_params, model_params):
+                p_swa.copy_(self.avg_fn(p_swa, p_model, self.n_averaged.to(p_swa.device)))
+        elif self.ema_decay is not None:
+            torch._foreach_mul_(swa_params, self.ema_decay)
+            torch._foreach_add_(swa_params, model_params, alpha=1 - self.ema_decay)
+        else:
+            deltas = torch._foreach_sub(model_params, swa_params)
+            torch._foreach_div_(deltas, n_averaged + 1)
+            torch._foreach_add_(swa_params, deltas)
         self.n_averaged += 1
 
 
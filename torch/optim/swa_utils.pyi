@@ -6,7 +6,8 @@ from typing import Iterable, Any, Optional, Callable, Union, List
 
 class AveragedModel(Module):
     def __init__(self, model: Module, device: Union[int, device]=..., 
-                 avg_fun: Callable[[Tensor, Tensor, int], Tensor]=...) -> None:...
+                 avg_fun: Callable[[Tensor, Tensor, int], Tensor]=...,
+                 ema_decay: Optional[float]=...) -> None:...
 
     def update_parameters(self, model: Module) -> None:...
 
@@ -1,4 +1,6 @@
+import ctypes
 import difflib
+import hashlib
 import os
 import io
 import shutil
@@ -7,7 +9,9 @@ import sys
 import torch
 import tarfile
 import tempfile
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing, contextmanager
 from ._utils import _import_dotted_name
 from ._six import string_classes as _string_classes
@@ -27,6 +31,7 @@ SHORT_SIZE = struct.Struct('=h').size
 MAGIC_NUMBER = 0x1950a86a20f9469cfc6c
 PROTOCOL_VERSION = 1001
 STORAGE_KEY_SEPARATOR = ','
+STORAGE_MANIFEST_RECORD = 'storage_manifest.pkl'
 
 class SourceChangeWarning(Warning):
     pass
@@ -331,7 +336,8 @@ def _check_dill_version(pickle_module) -> None:
             ))
 
 def save(obj, f: Union[str, os.PathLike, BinaryIO],
-         pickle_module=pickle, pickle_protocol=DEFAULT_PROTOCOL, _use_new_zipfile_serialization=True) -> None:
+         pickle_module=pickle, pickle_protocol=DEFAULT_PROTOCOL, _use_new_zipfile_serialization=True,
+         num_threads: int = 0, incremental_base: Optional[Union[str, os.PathLike]] = None) -> None:
     """Saves an object to a disk file.
 
     See also: `saving-loading-tensors`
@@ -342,6 +348,14 @@ def save(obj, f: Union[str, os.PathLike, BinaryIO],
            os.PathLike object containing a file name
         pickle_module: module used for pickling metadata and objects
         pickle_protocol: can be specified to override the default protocol
+        num_threads: if greater than 0, each storage is written to the archive as
+            soon as it is reached during pickling, with ``num_threads`` threads
+            copying storages to the CPU while a separate thread writes them.
+            Only supported with the zipfile serialization format (default: 0)
+        incremental_base: file name of an earlier checkpoint. If given, ``f`` must
+            be a file name too, and only storages whose contents are not already
+            present in ``incremental_base`` (or in the checkpoints it refers to)
+            are written; the others are recorded as references (see note below)
 
     .. note::
         A common PyTorch convention is to save tensors using .pt file extension.
@@ -356,6 +370,15 @@ def save(obj, f: Union[str, os.PathLike, BinaryIO],
         load files in the old format. If for any reason you want ``torch.save``
         to use the old format, pass the kwarg ``_use_new_zipfile_serialization=False``.
 
+    .. note::
+        A checkpoint saved with :attr:`incremental_base` stores a SHA-256 digest of
+        every storage. Storages whose digest matches one in the base chain are
+        not written again and :func:`torch.load` reads them from the checkpoint
+        that holds their data, which is referenced by a path relative to ``f``.
+        Every checkpoint in the chain must therefore be kept, and stay at the
+        same relative location, for as long as the checkpoints saved on top of
+        it are needed.
+
     Example:
         >>> # Save to file
         >>> x = torch.tensor([0, 1, 2, 3, 4])
@@ -363,13 +386,40 @@ def save(obj, f: Union[str, os.PathLike, BinaryIO],
         >>> # Save to io.BytesIO buffer
         >>> buffer = io.BytesIO()
         >>> torch.save(x, buffer)
+        >>> # Only write the storages that changed since 'epoch1.pt'
+        >>> torch.save(model.state_dict(), 'epoch2.pt', incremental_base='epoch1.pt')
     """
     _check_dill_version(pickle_module)
 
+    if num_threads < 0:
+        raise ValueError(f"num_threads must be non-negative, but got {num_threads}")
+    if num_threads > 0 and not _use_new_zipfile_serialization:
+        raise ValueError("num_threads is only supported with the zipfile serialization format")
+
+    base_index = None
+    if incremental_base is not None:
+        if not _is_path(f) or not _is_path(incremental_base):
+            raise ValueError("incremental checkpoints must be saved to and based on file names")
+        if not _use_new_zipfile_serialization or num_threads > 0:
+            raise ValueError("incremental_base is only supported with the zipfile serialization "
+                             "format and num_threads=0")
+        out_dir = os.path.dirname(os.path.abspath(f))
+        base_index = _incremental_base_index(incremental_base, out_dir)
+        if os.path.exists(f):
+            # The new checkpoint may reference records of any archive in the chain
+            chain_archives = {os.path.join(out_dir, archive) for archive, _ in base_index.values()}
+            chain_archives.add(incremental_base)
+            if any(os.path.exists(archive) and os.path.samefile(f, archive) for archive in chain_archives):
+                raise ValueError("an incremental checkpoint can't overwrite its base or a checkpoint "
+                                 "its base refers to")
+
     with _open_file_like(f, 'wb') as opened_file:
         if _use_new_zipfile_serialization:
             with _open_zipfile_writer(opened_file) as opened_zipfile:
-                _save(obj, opened_zipfile, pickle_module, pickle_protocol)
+                if num_threads > 0:
+                    _save_streaming(obj, opened_zipfile, pickle_module, pickle_protocol, num_threads)
+                else:
+                    _save(obj, opened_zipfile, pickle_module, pickle_protocol, base_index)
                 return
         _legacy_save(obj, opened_file, pickle_module, pickle_protocol)
 
@@ -447,7 +497,48 @@ def _legacy_save(obj, f, pickle_module, pickle_protocol) -> None:
         serialized_storages[key]._write_file(f, _should_read_directly(f), True)
 
 
-def _save(obj, zip_file, pickle_module, pickle_protocol):
+def _storage_digest(storage) -> str:
+    num_bytes = storage.size() * storage.element_size()
+    if num_bytes == 0:
+        return hashlib.sha256().hexdigest()
+    # Hash the CPU storage in place rather than copying it into a bytes object
+    data = (ctypes.c_char * num_bytes).from_address(storage.data_ptr())
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_storage_manifest(zip_file) -> Optional[Dict[str, Any]]:
+    # The manifest maps each storage key of an incremental checkpoint to
+    # (digest, archive, record_key). ``archive`` is None if the record lives in
+    # the same archive, otherwise it is the path of the archive holding
+    # ``data/<record_key>``, relative to the directory of this archive.
+    if STORAGE_MANIFEST_RECORD not in zip_file.get_all_records():
+        return None
+    return pickle.loads(zip_file.get_record(STORAGE_MANIFEST_RECORD))
+
+
+def _incremental_base_index(base_path, out_dir) -> Dict[str, Tuple[str, str]]:
+    # Returns a map from storage digest to (archive, record_key) for all the
+    # storage data reachable from ``base_path``, with archive paths relative to
+    # ``out_dir``. References are always resolved to the archive that actually
+    # holds the data, so loading never has to walk the chain.
+    base_path = os.path.abspath(base_path)
+    base_dir = os.path.dirname(base_path)
+    index: Dict[str, Tuple[str, str]] = {}
+    with _open_zipfile_reader(str(base_path)) as base_zip:
+        manifest = _read_storage_manifest(base_zip)
+        if manifest is not None:
+            for digest, archive, record_key in manifest['storages'].values():
+                path = base_path if archive is None else os.path.join(base_dir, archive)
+                index.setdefault(digest, (os.path.relpath(path, out_dir), record_key))
+        else:
+            for name in base_zip.get_all_records():
+                if name.startswith('data/'):
+                    digest = hashlib.sha256(base_zip.get_record(name)).hexdigest()
+                    index.setdefault(digest, (os.path.relpath(base_path, out_dir), name[len('data/'):]))
+    return index
+
+
+def _save(obj, zip_file, pickle_module, pickle_protocol, base_index=None):
     serialized_storages = {}
 
     def persistent_id(obj):
@@ -478,6 +569,7 @@ def _save(obj, zip_file, pickle_module, pickle_protocol):
     zip_file.write_record('data.pkl', data_value, len(data_value))
 
     # Write each tensor to a file named tensor/the_tensor_key in the zip archive
+    manifest = {}
     for key in sorted(serialized_storages.keys()):
         name = f'data/{key}'
         storage = serialized_storages[key]
@@ -486,12 +578,83 @@ def _save(obj, zip_file, pickle_module, pickle_protocol):
         # .cpu() on the underlying Storage
         if storage.device.type != 'cpu':
             storage = storage.cpu()
+        if base_index is not None:
+            # Incremental checkpoint: reference identical data in the base chain
+            digest = _storage_digest(storage)
+            if digest in base_index:
+                manifest[key] = (digest,) + base_index[digest]
+                continue
+            manifest[key] = (digest, None, key)
         # Now that it is on the CPU we can directly copy it into the zip file
         num_bytes = storage.size() * storage.element_size()
         zip_file.write_record(name, storage.data_ptr(), num_bytes)
 
+    if base_index is not None:
+        manifest_value = pickle.dumps({'version': 1, 'storages': manifest}, protocol=DEFAULT_PROTOCOL)
+        zip_file.write_record(STORAGE_MANIFEST_RECORD, manifest_value, len(manifest_value))
 
-def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
+
+def _save_streaming(obj, zip_file, pickle_module, pickle_protocol, num_threads):
+    # Same archive layout as _save, but every storage is scheduled for writing
+    # as soon as the pickler reaches it. ``num_threads`` workers copy storages
+    # to the CPU while a single writer thread appends the finished records to
+    # the archive (the zip writer is not thread-safe). Records are located
+    # through the central directory, so data.pkl can be written last.
+    serialized_storages = {}
+    pending_writes = []
+    # Bounds the number of storages that are copied to the CPU but not yet
+    # written, so that device memory is never mirrored on the host at once.
+    in_flight = threading.BoundedSemaphore(2 * num_threads)
+
+    def stage(storage):
+        if storage.device.type != 'cpu':
+            storage = storage.cpu()
+        return storage
+
+    def write(name, staged):
+        try:
+            storage = staged.result()
+            num_bytes = storage.size() * storage.element_size()
+            zip_file.write_record(name, storage.data_ptr(), num_bytes)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=num_threads) as copy_pool, \
+            ThreadPoolExecutor(max_workers=1) as writer:
+
+        def persistent_id(obj):
+            # See the note on persistent_id in _save
+            if torch.is_storage(obj):
+                storage_type = normalize_storage_type(type(obj))
+                obj_key = str(obj._cdata)
+                location = location_tag(obj)
+                if obj_key not in serialized_storages:
+                    serialized_storages[obj_key] = obj
+                    in_flight.acquire()
+                    staged = copy_pool.submit(stage, obj)
+                    pending_writes.append(writer.submit(write, f'data/{obj_key}', staged))
+
+                return ('storage',
+                        storage_type,
+                        obj_key,
+                        location,
+                        obj.size())
+            return None
+
+        data_buf = io.BytesIO()
+        pickler = pickle_module.Pickler(data_buf, protocol=pickle_protocol)
+        pickler.persistent_id = persistent_id
+        pickler.dump(obj)
+
+        for future in pending_writes:
+            # Re-raises the first error hit while copying or writing a storage
+            future.result()
+
+    data_value = data_buf.getvalue()
+    zip_file.write_record('data.pkl', data_value, len(data_value))
+
+
+def load(f, map_location=None, pickle_module=pickle, *, mmap=False, **pickle_load_args):
     """Loads an object saved with :func:`torch.save` from a file.
 
     :func:`torch.load` uses Python's unpickling facilities but treats storages,
@@ -530,6 +693,9 @@ def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
             locations
         pickle_module: module used for unpickling metadata and objects (has to
             match the :attr:`pickle_module` used to serialize file)
+        mmap: if ``True``, ``f`` must be a file name and the storages of a zipfile
+            checkpoint are memory-mapped from it instead of being read into
+            freshly allocated memory (see note below)
         pickle_load_args: (Python 3 only) optional keyword arguments passed over to
             :func:`pickle_module.load` and :func:`pickle_module.Unpickler`, e.g.,
             :attr:`errors=...`.
@@ -554,6 +720,15 @@ def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
         to strings using ``latin1`` encoding, and :attr:`encoding='bytes'` keeps them
         as byte arrays which can be decoded later with ``byte_array.decode(...)``.
 
+    .. note::
+        With ``mmap=True`` the CPU storages returned by :func:`torch.load()` point
+        directly into a private (copy-on-write) mapping of the file, so no tensor
+        data is copied at load time and pages are only read when they are first
+        touched. Processes mapping the same file share its page cache until they
+        write to a tensor. This is only supported for files written with the
+        zipfile format (the default since 1.6). Storages that :attr:`map_location`
+        moves to another device are copied as usual.
+
     Example:
         >>> torch.load('tensors.pt')
         # Load all tensors onto the CPU
@@ -570,9 +745,15 @@ def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
         >>> torch.load(buffer)
         # Load a module with 'ascii' encoding for unpickling
         >>> torch.load('module.pt', encoding='ascii')
+        # Memory-map the tensor data instead of reading it
+        >>> torch.load('tensors.pt', mmap=True)
     """
     _check_dill_version(pickle_module)
 
+    if mmap and not _is_path(f):
+        raise ValueError("torch.load with mmap=True expects a file name, but got "
+                         f"{type(f).__name__}")
+
     if 'encoding' not in pickle_load_args.keys():
         pickle_load_args['encoding'] = 'utf-8'
 
@@ -589,7 +770,15 @@ def load(f, map_location=None, pickle_module=pickle, **pickle_load_args):
                                   " silence this warning)", UserWarning)
                     opened_file.seek(orig_position)
                     return torch.jit.load(opened_file)
-                return _load(opened_zipfile, map_location, pickle_module, **pickle_load_args)
+                mapped_file = None
+                if mmap:
+                    mapped_file = torch.from_file(str(f), shared=False, size=os.path.getsize(f),
+                                                  dtype=torch.uint8)
+                return _load(opened_zipfile, map_location, pickle_module, mapped_file=mapped_file,
+                             archive_path=f if _is_path(f) else None, **pickle_load_args)
+        if mmap:
+            raise RuntimeError("torch.load with mmap=True is only supported for the zipfile "
+                               "serialization format, but the file was saved in the legacy format")
         return _legacy_load(opened_file, map_location, pickle_module, **pickle_load_args)
 
 
@@ -819,16 +1008,42 @@ def _get_restore_location(map_location):
     return restore_location
 
 
-def _load(zip_file, map_location, pickle_module, pickle_file='data.pkl', **pickle_load_args):
+def _load(zip_file, map_location, pickle_module, pickle_file='data.pkl', mapped_file=None,
+          archive_path=None, **pickle_load_args):
     restore_location = _get_restore_location(map_location)
 
     loaded_storages = {}
+    # Other archives of an incremental checkpoint chain, see torch.save
+    manifest = _read_storage_manifest(zip_file)
+    base_archives: Dict[str, Tuple[Any, Optional[torch.Tensor]]] = {}
+
+    def get_archive(key):
+        if manifest is None:
+            return zip_file, mapped_file, key
+        _, archive, record_key = manifest['storages'][key]
+        if archive is None:
+            return zip_file, mapped_file, record_key
+        if archive_path is None:
+            raise RuntimeError("an incremental checkpoint that refers to other checkpoints can only "
+                               "be loaded from a file name")
+        path = os.path.join(os.path.dirname(os.path.abspath(archive_path)), archive)
+        if path not in base_archives:
+            base_mapped_file = None
+            if mapped_file is not None:
+                base_mapped_file = torch.from_file(path, shared=False, size=os.path.getsize(path),
+                                                   dtype=torch.uint8)
+            base_archives[path] = (torch._C.PyTorchFileReader(path), base_mapped_file)
+        return base_archives[path] + (record_key,)
 
     def load_tensor(data_type, size, key, location):
-        name = f'data/{key}'
+        archive, archive_mapped_file, record_key = get_archive(key)
+        name = f'data/{record_key}'
         dtype = data_type(0).dtype
 
-        storage = zip_file.get_storage_from_record(name, size, dtype).storage()
+        if archive_mapped_file is not None:
+            storage = archive.get_storage_from_mapped_record(name, archive_mapped_file, size, dtype).storage()
+        else:
+            storage = archive.get_storage_from_record(name, size, dtype).storage()
         loaded_storages[key] = restore_location(storage, location)
 
     def persistent_load(saved_id):
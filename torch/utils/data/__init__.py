@@ -2,11 +2,12 @@ from .sampler import Sampler, SequentialSampler, RandomSampler, SubsetRandomSamp
 from .dataset import (Dataset, IterableDataset, TensorDataset, ConcatDataset, ChainDataset, BufferedShuffleDataset, 
                       Subset, random_split)
 from .distributed import DistributedSampler
-from .dataloader import DataLoader, _DatasetKind, get_worker_info
+from .dataloader import DataLoader, WorkerPool, _DatasetKind, get_worker_info
 
 
 __all__ = ['Sampler', 'SequentialSampler', 'RandomSampler',
            'SubsetRandomSampler', 'WeightedRandomSampler', 'BatchSampler',
            'DistributedSampler', 'Dataset', 'IterableDataset', 'TensorDataset',
            'ConcatDataset', 'ChainDataset', 'BufferedShuffleDataset', 'Subset',
-           'random_split', 'DataLoader', '_DatasetKind', 'get_worker_info']
+           'random_split', 'DataLoader', 'WorkerPool', '_DatasetKind',
+           'get_worker_info']
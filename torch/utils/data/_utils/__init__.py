@@ -42,4 +42,4 @@ def _set_python_exit_flag():
 atexit.register(_set_python_exit_flag)
 
 
-from . import worker, signal_handling, pin_memory, collate, fetch
+from . import worker, signal_handling, pin_memory, collate, fetch, ring_buffer, prefetch
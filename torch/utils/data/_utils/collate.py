@@ -39,19 +39,42 @@ default_collate_err_msg_format = (
     "dicts or lists; found {}")
 
 
+def _new_shared_out(elem, numel):
+    # If we're in a background process, returns an empty tensor like ``elem``
+    # backed by shared memory with room for ``numel`` elements, so that the
+    # batch can be collated in place and isn't copied again when it is sent to
+    # the main process
+    if torch.utils.data.get_worker_info() is None:
+        return None
+    storage = elem.storage()._new_shared(numel)
+    return elem.new(storage)
+
+
+def _collate_numpy_arrays(batch):
+    # Copies a batch of arrays with the same shape and dtype straight into the
+    # output tensor, instead of wrapping every sample in a tensor and stacking
+    import numpy as np
+
+    elem = batch[0]
+    if any(b.shape != elem.shape or b.dtype != elem.dtype for b in batch):
+        # let torch.stack report the mismatch
+        return default_collate([torch.as_tensor(b) for b in batch])
+    empty = torch.from_numpy(np.empty(0, dtype=elem.dtype))
+    out = _new_shared_out(empty, len(batch) * elem.size)
+    if out is None:
+        out = empty.new()
+    out.resize_((len(batch),) + elem.shape)
+    np.stack(batch, out=out.numpy())
+    return out
+
+
 def default_collate(batch):
     r"""Puts each data field into a tensor with outer dimension batch size"""
 
     elem = batch[0]
     elem_type = type(elem)
     if isinstance(elem, torch.Tensor):
-        out = None
-        if torch.utils.data.get_worker_info() is not None:
-            # If we're in a background process, concatenate directly into a
-            # shared memory tensor to avoid an extra copy
-            numel = sum([x.numel() for x in batch])
-            storage = elem.storage()._new_shared(numel)
-            out = elem.new(storage)
+        out = _new_shared_out(elem, sum([x.numel() for x in batch]))
         return torch.stack(batch, 0, out=out)
     elif elem_type.__module__ == 'numpy' and elem_type.__name__ != 'str_' \
             and elem_type.__name__ != 'string_':
@@ -60,7 +83,7 @@ def default_collate(batch):
             if np_str_obj_array_pattern.search(elem.dtype.str) is not None:
                 raise TypeError(default_collate_err_msg_format.format(elem.dtype))
 
-            return default_collate([torch.as_tensor(b) for b in batch])
+            return _collate_numpy_arrays(batch)
         elif elem.shape == ():  # scalars
             return torch.as_tensor(batch)
     elif isinstance(elem, float):
@@ -5,13 +5,14 @@ These **needs** to be in global scope since Py2 doesn't support serializing
 static methods.
 """
 
+import threading
 import torch
 from torch._six import queue, container_abcs, string_classes
-from . import MP_STATUS_CHECK_INTERVAL
+from . import MP_STATUS_CHECK_INTERVAL, ring_buffer
 from torch._utils import ExceptionWrapper
 
 
-def _pin_memory_loop(in_queue, out_queue, device_id, done_event):
+def _pin_memory_loop(in_queue, out_queue, device_id, done_event, ring_reader=None, buffer_pool=None):
     # This setting is thread local, and prevents the copy in pin_memory from
     # consuming all CPU cores.
     torch.set_num_threads(1)
@@ -28,7 +29,14 @@ def _pin_memory_loop(in_queue, out_queue, device_id, done_event):
         idx, data = r
         if not done_event.is_set() and not isinstance(data, ExceptionWrapper):
             try:
-                data = pin_memory(data)
+                pin = pin_memory if buffer_pool is None else buffer_pool.pin
+                if isinstance(data, ring_buffer._RingBatch):
+                    # Pinning copies the batch, so its slot can be reused right away
+                    batch = data
+                    data = pin(ring_reader.unpack(batch))
+                    ring_reader.release(batch)
+                else:
+                    data = pin(data)
             except Exception:
                 data = ExceptionWrapper(
                     where="in pin memory thread for device {}".format(device_id))
@@ -57,3 +65,106 @@ def pin_memory(data):
         return data.pin_memory()
     else:
         return data
+
+
+def _pinned_empty(numel, dtype):
+    return torch.empty(numel, dtype=dtype, pin_memory=True)
+
+
+class _PinnedBatch(object):
+    r"""A batch copied into buffers of a `_PinnedBufferPool`. The buffers in
+    `lease` have to be given back with `_PinnedBufferPool.release` once the
+    batch is no longer used."""
+    __slots__ = ('data', 'lease')
+
+    def __init__(self, data, lease):
+        self.data = data
+        self.lease = lease
+
+
+class _PinnedBufferPool(object):
+    r"""Pool of reusable page-locked host buffers for the pin memory thread.
+
+    Allocating pinned memory is slow and serializes the pin memory thread, so
+    instead of calling `pin_memory` on every batch, its tensors are copied into
+    flat buffers taken from this pool. Buffers grow to the largest tensor of
+    their dtype seen so far, so after the first few batches they are reused
+    as-is. At most `max_buffers` buffers are ever allocated; when no suitable
+    buffer is free, tensors are pinned with `pin_memory` as usual.
+
+    `pin` returns a `_PinnedBatch` if any tensor was copied into the buffers,
+    and the pinned data itself otherwise. The lease of a `_PinnedBatch` is
+    handed back with `release`, optionally with a CUDA event that must complete before the buffers are
+    overwritten (e.g., recorded after a non-blocking copy from them).
+
+    Arguments:
+        max_buffers (int): maximum number of buffers to allocate
+        allocator (callable, optional): ``allocator(numel, dtype)`` returns a new
+            1-D buffer. Defaults to allocating pinned memory.
+    """
+
+    def __init__(self, max_buffers, allocator=None):
+        self.max_buffers = max_buffers
+        self.allocator = _pinned_empty if allocator is None else allocator
+        self.num_buffers = 0
+        # dtype => list of (buffer, event) that are free to be reused
+        self.free_buffers = {}
+        # dtype => largest numel requested so far
+        self.max_numel = {}
+        self.lock = threading.Lock()
+
+    def _acquire(self, numel, dtype):
+        with self.lock:
+            self.max_numel[dtype] = max(numel, self.max_numel.get(dtype, 0))
+            free = self.free_buffers.setdefault(dtype, [])
+            fitting = [i for i, (buffer, _) in enumerate(free) if buffer.numel() >= numel]
+            if len(fitting) > 0:
+                buffer, event = free.pop(min(fitting, key=lambda i: free[i][0].numel()))
+            elif self.num_buffers < self.max_buffers or len(free) > 0:
+                if self.num_buffers >= self.max_buffers:
+                    # Replace a free buffer that became too small
+                    free.pop(0)
+                    self.num_buffers -= 1
+                buffer, event = None, None
+                self.num_buffers += 1
+            else:
+                return None
+        if event is not None:
+            event.synchronize()
+        if buffer is None:
+            buffer = self.allocator(self.max_numel[dtype], dtype)
+        return buffer
+
+    def _pin(self, data, lease):
+        if isinstance(data, torch.Tensor):
+            if data.is_pinned() or data.layout != torch.strided:
+                return pin_memory(data)
+            buffer = self._acquire(data.numel(), data.dtype)
+            if buffer is None:
+                return pin_memory(data)
+            lease.append(buffer)
+            return buffer[:data.numel()].view(data.shape).copy_(data)
+        elif isinstance(data, string_classes):
+            return data
+        elif isinstance(data, container_abcs.Mapping):
+            return {k: self._pin(sample, lease) for k, sample in data.items()}
+        elif isinstance(data, tuple) and hasattr(data, '_fields'):  # namedtuple
+            return type(data)(*(self._pin(sample, lease) for sample in data))
+        elif isinstance(data, container_abcs.Sequence):
+            return [self._pin(sample, lease) for sample in data]
+        else:
+            return pin_memory(data)
+
+    def pin(self, data):
+        lease = []
+        data = self._pin(data, lease)
+        if len(lease) == 0:
+            # Nothing was copied into the buffers, e.g., sentinels like
+            # `_IterableDatasetStopIteration`
+            return data
+        return _PinnedBatch(data, lease)
+
+    def release(self, lease, event=None):
+        with self.lock:
+            for buffer in lease:
+                self.free_buffers[buffer.dtype].append((buffer, event))
@@ -0,0 +1,154 @@
+r""""Contains definitions of the methods used by the _MultiProcessingDataLoaderIter
+to adapt the number of batches prefetched by the workers when
+``max_prefetch_factor`` is set.
+
+NOTE [ Adaptive Prefetching ]
+
+With a fixed ``prefetch_factor``, each worker always has ``prefetch_factor``
+batches in flight. When the workload alternates between phases where loading
+is slow and phases where the consumer is slow, a fixed value either lets the
+consumer starve or holds more batches in host memory than needed.
+
+The controller below looks at windows of consecutive batches and compares the
+time the main process spent waiting for data with the time the consumer spent
+between two batches (``busy_time``):
+
+  * If the consumer spent a noticeable fraction of the window waiting, the
+    prefetch factor grows by one, as long as ``prefetch_factor * num_workers``
+    average batches fit in the memory budget.
+  * If it barely waited (even a batch that is ready takes a little time to
+    get from the queue) for a few consecutive windows, the prefetch factor
+    shrinks by one, down to ``1``, to release host memory.
+  * If the batches in flight no longer fit in the memory budget, the prefetch
+    factor shrinks by one.
+
+The latency of the workers (the time between sending an index to a worker and
+receiving the batch) is only tracked for the statistics, and doesn't drive the
+decision, e.g. as ``latency / busy_time`` batches in flight. Measured from the
+main process, it includes the time batches wait in the index queue behind the
+ones already in flight, and in the data queue until the consumer asks for them.
+Both grow with the prefetch factor itself, so a target derived from it would
+mostly confirm the current depth. The wait time of the consumer is what the
+prefetch depth is meant to remove, and is measured directly.
+
+The depth is the same for all the workers, rather than adapted per worker.
+Indices are sent to the workers in turn and batches are returned in order, so
+a worker that is slower than the others stalls the consumer whatever the depth
+of the other workers, and each worker has ``prefetch_factor`` batches in flight
+in the steady state.
+"""
+
+import torch
+from torch._six import container_abcs, string_classes
+
+
+def _batch_nbytes(data):
+    if isinstance(data, torch.Tensor):
+        return data.numel() * data.element_size()
+    elif isinstance(data, string_classes):
+        return 0
+    elif isinstance(data, container_abcs.Mapping):
+        return sum(_batch_nbytes(sample) for sample in data.values())
+    elif isinstance(data, container_abcs.Sequence):
+        return sum(_batch_nbytes(sample) for sample in data)
+    else:
+        return 0
+
+
+class _AdaptivePrefetchController(object):
+    r"""Decides the prefetch factor of a _MultiProcessingDataLoaderIter. See
+    NOTE [ Adaptive Prefetching ]"""
+
+    # fraction of a window spent waiting above which the prefetch factor grows
+    grow_wait_ratio = 0.05
+    # fraction of a window spent waiting below which the window counts as idle
+    shrink_wait_ratio = 0.01
+    # number of consecutive idle windows before it shrinks
+    shrink_idle_windows = 4
+
+    def __init__(self, prefetch_factor, max_prefetch_factor, num_workers, memory_budget=None, window=None):
+        self.prefetch_factor = prefetch_factor
+        self.max_prefetch_factor = max_prefetch_factor
+        self.num_workers = num_workers
+        self.memory_budget = memory_budget
+        self.window = 2 * num_workers if window is None else window
+
+        self._window_batches = 0
+        self._window_wait_time = 0.0
+        self._window_busy_time = 0.0
+        self._idle_windows = 0
+
+        self.num_batches = 0
+        self.total_wait_time = 0.0
+        self.total_busy_time = 0.0
+        self.avg_batch_nbytes = None
+        self.avg_worker_latency = None
+        self.num_increases = 0
+        self.num_decreases = 0
+
+    @staticmethod
+    def _ema(avg, value, momentum=0.1):
+        return value if avg is None else (1 - momentum) * avg + momentum * value
+
+    def record_latency(self, latency):
+        self.avg_worker_latency = self._ema(self.avg_worker_latency, latency)
+
+    def _fits_budget(self, prefetch_factor):
+        if self.memory_budget is None or self.avg_batch_nbytes is None:
+            return True
+        return prefetch_factor * self.num_workers * self.avg_batch_nbytes <= self.memory_budget
+
+    def record(self, wait_time, busy_time, nbytes=0):
+        r"""Records a batch handed to the consumer and returns the prefetch factor
+        to use from now on"""
+        self.num_batches += 1
+        self.total_wait_time += wait_time
+        self.total_busy_time += busy_time
+        if nbytes > 0:
+            self.avg_batch_nbytes = self._ema(self.avg_batch_nbytes, nbytes)
+
+        self._window_batches += 1
+        self._window_wait_time += wait_time
+        self._window_busy_time += busy_time
+        if self._window_batches < self.window:
+            return self.prefetch_factor
+
+        total_time = self._window_wait_time + self._window_busy_time
+        wait_ratio = self._window_wait_time / total_time if total_time > 0 else 0.0
+        self._window_batches = 0
+        self._window_wait_time = 0.0
+        self._window_busy_time = 0.0
+
+        if not self._fits_budget(self.prefetch_factor) and self.prefetch_factor > 1:
+            self._decrease()
+        elif wait_ratio > self.grow_wait_ratio:
+            self._idle_windows = 0
+            if self.prefetch_factor < self.max_prefetch_factor and self._fits_budget(self.prefetch_factor + 1):
+                self.prefetch_factor += 1
+                self.num_increases += 1
+        elif wait_ratio < self.shrink_wait_ratio:
+            self._idle_windows += 1
+            if self._idle_windows >= self.shrink_idle_windows and self.prefetch_factor > 1:
+                self._decrease()
+        else:
+            self._idle_windows = 0
+        return self.prefetch_factor
+
+    def _decrease(self):
+        self.prefetch_factor -= 1
+        self.num_decreases += 1
+        self._idle_windows = 0
+
+    def stats(self):
+        num_batches = max(self.num_batches, 1)
+        return {
+            'prefetch_factor': self.prefetch_factor,
+            'max_prefetch_factor': self.max_prefetch_factor,
+            'num_batches': self.num_batches,
+            'avg_wait_time': self.total_wait_time / num_batches,
+            'avg_busy_time': self.total_busy_time / num_batches,
+            'avg_worker_latency': self.avg_worker_latency,
+            'avg_batch_nbytes': self.avg_batch_nbytes,
+            'num_increases': self.num_increases,
+            'num_decreases': self.num_decreases,
+        }
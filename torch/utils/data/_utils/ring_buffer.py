@@ -0,0 +1,207 @@
+r""""Contains definitions of the shared memory ring buffer used by the
+_MultiProcessingDataLoaderIter to send batches from the workers to the main
+process when ``ring_buffer_slots > 0``.
+
+NOTE [ DataLoader Shared Memory Ring Buffer ]
+
+By default, every batch a worker produces is pickled into the result queue,
+which moves each of its tensors into a freshly allocated shared memory segment
+and passes a file descriptor per tensor to the main process. With small
+batches at high rates, the allocations and the fd passing dominate, and can
+exhaust the open files limit.
+
+With the ring buffer, each worker allocates ``ring_buffer_slots`` slots once,
+the first time it produces a batch. A slot holds one shared memory buffer per
+tensor of that first batch, sized to fit it. A batch is then sent by copying
+its tensors into a free slot and putting a `_RingBatch` on the result queue,
+which only carries the structure of the batch and the slot index (the buffers
+themselves are only sent along with the first batch). The main process
+rebuilds the batch as views into the slot.
+
+A slot is handed back to its worker through the worker's `free_slot_queue`:
+
+  * without ``pin_memory``, when the next batch is requested, so a batch is
+    only valid until the following call to ``next()`` on the iterator (clone
+    its tensors to keep them for longer), and
+  * with ``pin_memory``, right after the batch was copied to pinned memory.
+
+Workers never wait for a slot: if no slot is free, or a batch doesn't match
+the layout of the slots (e.g., a larger batch or different dtypes), it is sent
+through the result queue as usual.
+"""
+
+import torch
+from torch._six import queue, container_abcs, string_classes
+
+
+class _Leaf(object):
+    r"""Placeholder for the ``index``-th tensor of a batch in a `_RingBatch`"""
+    __slots__ = ('index', 'shape')
+
+    def __init__(self, index, shape):
+        self.index = index
+        self.shape = shape
+
+    def __getstate__(self):
+        return (self.index, self.shape)
+
+    def __setstate__(self, state):
+        self.index, self.shape = state
+
+
+class _RingBatch(object):
+    r"""A batch written to slot ``slot`` of the ring of worker ``worker_id``"""
+    __slots__ = ('worker_id', 'slot', 'structure', 'buffers')
+
+    def __init__(self, worker_id, slot, structure, buffers=None):
+        self.worker_id = worker_id
+        self.slot = slot
+        self.structure = structure
+        # The shared memory buffers of all slots, only set on the first batch
+        self.buffers = buffers
+
+    def __getstate__(self):
+        return (self.worker_id, self.slot, self.structure, self.buffers)
+
+    def __setstate__(self, state):
+        self.worker_id, self.slot, self.structure, self.buffers = state
+
+
+def _flatten(data, leaves):
+    # Replaces every tensor of `data` with a `_Leaf`, appending it to `leaves`
+    if isinstance(data, torch.Tensor):
+        leaves.append(data)
+        return _Leaf(len(leaves) - 1, tuple(data.shape))
+    elif isinstance(data, string_classes):
+        return data
+    elif isinstance(data, container_abcs.Mapping):
+        return {k: _flatten(sample, leaves) for k, sample in data.items()}
+    elif isinstance(data, tuple) and hasattr(data, '_fields'):  # namedtuple
+        return type(data)(*(_flatten(sample, leaves) for sample in data))
+    elif isinstance(data, container_abcs.Sequence):
+        return [_flatten(sample, leaves) for sample in data]
+    else:
+        return data
+
+
+def _unflatten(structure, buffers):
+    if isinstance(structure, _Leaf):
+        buffer = buffers[structure.index]
+        numel = 1
+        for size in structure.shape:
+            numel *= size
+        return buffer[:numel].view(structure.shape)
+    elif isinstance(structure, string_classes):
+        return structure
+    elif isinstance(structure, container_abcs.Mapping):
+        return {k: _unflatten(sample, buffers) for k, sample in structure.items()}
+    elif isinstance(structure, tuple) and hasattr(structure, '_fields'):  # namedtuple
+        return type(structure)(*(_unflatten(sample, buffers) for sample in structure))
+    elif isinstance(structure, container_abcs.Sequence):
+        return [_unflatten(sample, buffers) for sample in structure]
+    else:
+        return structure
+
+
+def _is_ring_compatible(tensor):
+    return tensor.device.type == 'cpu' and tensor.layout == torch.strided
+
+
+class _WorkerRing(object):
+    r"""Worker side of the ring. See NOTE [ DataLoader Shared Memory Ring Buffer ]"""
+
+    def __init__(self, worker_id, num_slots, free_slot_queue):
+        self.worker_id = worker_id
+        self.num_slots = num_slots
+        self.free_slot_queue = free_slot_queue
+        self.slots = None
+        self.free_slots = []
+        self.sent_buffers = False
+
+    def _allocate(self, leaves):
+        self.slots = []
+        for _ in range(self.num_slots):
+            self.slots.append([torch.empty(t.numel(), dtype=t.dtype).share_memory_() for t in leaves])
+        self.free_slots = list(range(self.num_slots))
+
+    def _fits(self, leaves):
+        buffers = self.slots[0]
+        return len(leaves) == len(buffers) and \
+            all(t.dtype == b.dtype and t.numel() <= b.numel() for t, b in zip(leaves, buffers))
+
+    def _next_free_slot(self):
+        while True:
+            try:
+                self.free_slots.append(self.free_slot_queue.get_nowait())
+            except queue.Empty:
+                break
+        if len(self.free_slots) == 0:
+            return None
+        return self.free_slots.pop()
+
+    def pack(self, data):
+        r"""Returns a `_RingBatch` for `data`, or `data` itself if it can't be
+        written to a slot"""
+        leaves = []
+        structure = _flatten(data, leaves)
+        if len(leaves) == 0 or not all(_is_ring_compatible(t) for t in leaves):
+            return data
+        if self.slots is None:
+            self._allocate(leaves)
+        if not self._fits(leaves):
+            return data
+        slot = self._next_free_slot()
+        if slot is None:
+            return data
+        for t, buffer in zip(leaves, self.slots[slot]):
+            buffer[:t.numel()].view(t.shape).copy_(t)
+        batch = _RingBatch(self.worker_id, slot, structure)
+        if not self.sent_buffers:
+            batch.buffers = self.slots
+            self.sent_buffers = True
+        return batch
+
+
+class _RingReader(object):
+    r"""Main process side of the rings of all workers. See NOTE [ DataLoader
+    Shared Memory Ring Buffer ]"""
+
+    def __init__(self, free_slot_queues):
+        self.free_slot_queues = free_slot_queues
+        self.slots = {}
+        # (worker_id, slot) of the batch last returned by `unpack(hold=True)`
+        self.held = None
+
+    def unpack(self, batch, hold=False):
+        r"""Returns the batch as views into its slot. If `hold`, the slot is
+        released by the next `release_held` call, otherwise it must be released
+        with `release`."""
+        if batch.buffers is not None:
+            self.slots[batch.worker_id] = batch.buffers
+        data = _unflatten(batch.structure, self.slot_buffers(batch))
+        if hold:
+            self.release_held()
+            self.held = (batch.worker_id, batch.slot)
+        return data
+
+    def slot_buffers(self, batch):
+        r"""Returns the shared memory buffers of the slot of the batch"""
+        if batch.buffers is not None:
+            return batch.buffers[batch.slot]
+        return self.slots[batch.worker_id][batch.slot]
+
+    def release(self, batch):
+        self.free_slot_queues[batch.worker_id].put(batch.slot)
+
+    def discard(self, batch):
+        r"""Releases the slot of a batch that is dropped without being
+        unpacked, keeping the buffers of the worker if it's the first batch"""
+        if batch.buffers is not None:
+            self.slots[batch.worker_id] = batch.buffers
+        self.release(batch)
+
+    def release_held(self):
+        if self.held is not None:
+            worker_id, slot = self.held
+            self.free_slot_queues[worker_id].put(slot)
+            self.held = None
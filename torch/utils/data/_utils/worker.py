@@ -10,8 +10,8 @@ import os
 from dataclasses import dataclass
 from torch._six import queue
 from torch._utils import ExceptionWrapper
-from typing import Union
-from . import signal_handling, MP_STATUS_CHECK_INTERVAL, IS_WINDOWS
+from typing import Any, Dict, Union
+from . import signal_handling, ring_buffer, MP_STATUS_CHECK_INTERVAL, IS_WINDOWS
 
 if IS_WINDOWS:
     import ctypes
@@ -119,9 +119,24 @@ r"""Dummy class used to resume the fetching when worker reuse is enabled"""
 class _ResumeIteration(object):
     pass
 
+r"""Registers a dataset with the workers of a `torch.utils.data.WorkerPool`"""
+@dataclass(frozen=True)
+class _RegisterDataset(object):
+    dataset_id: int
+    dataset_kind: int
+    dataset: Any
+    auto_collation: bool
+    collate_fn: Any
+    drop_last: bool
+
+r"""Removes a dataset from the workers of a `torch.utils.data.WorkerPool`"""
+@dataclass(frozen=True)
+class _UnregisterDataset(object):
+    dataset_id: int
+
 def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
                  auto_collation, collate_fn, drop_last, seed, init_fn, worker_id,
-                 num_workers, persistent_workers):
+                 num_workers, persistent_workers, ring_buffer_slots=0, free_slot_queue=None):
     # See NOTE [ Data Loader Multiprocessing Shutdown Logic ] for details on the
     # logic of this function.
 
@@ -168,6 +183,11 @@ def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
         # `None`.
         iteration_end = False
 
+        # See NOTE [ DataLoader Shared Memory Ring Buffer ]
+        ring = None
+        if ring_buffer_slots > 0:
+            ring = ring_buffer._WorkerRing(worker_id, ring_buffer_slots, free_slot_queue)
+
         watchdog = ManagerWatchdog()
 
         while watchdog.is_alive():
@@ -176,8 +196,9 @@ def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
             except queue.Empty:
                 continue
             if isinstance(r, _ResumeIteration):
-                # Acknowledge the main process
-                data_queue.put(r)
+                # Acknowledge the main process, as a `(idx, data)` pair like
+                # all other results, which the pin memory thread passes on
+                data_queue.put((r, None))
                 iteration_end = False
                 # Recreate the fetcher for worker-reuse policy
                 fetcher = _DatasetKind.create_fetcher(
@@ -200,6 +221,8 @@ def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
             else:
                 try:
                     data = fetcher.fetch(index)
+                    if ring is not None:
+                        data = ring.pack(data)
                 except Exception as e:
                     if isinstance(e, StopIteration) and dataset_kind == _DatasetKind.Iterable:
                         data = _IterableDatasetStopIteration(worker_id)
@@ -221,3 +244,78 @@ def _worker_loop(dataset_kind, dataset, index_queue, data_queue, done_event,
     if done_event.is_set():
         data_queue.cancel_join_thread()
         data_queue.close()
+
+
+def _pool_worker_loop(index_queue, data_queue, done_event, seed, init_fn, worker_id, num_workers):
+    # Worker of a `torch.utils.data.WorkerPool`. Unlike `_worker_loop`, it
+    # serves the (map-style) datasets of several DataLoaders: datasets are
+    # registered with `_RegisterDataset`, and every task is a tuple
+    # `(iter_id, dataset_id, idx, index)` whose result is sent back as
+    # `(iter_id, idx, data)`. Shutdown follows `_worker_loop`, see NOTE [ Data
+    # Loader Multiprocessing Shutdown Logic ].
+    try:
+        signal_handling._set_worker_signal_handlers()
+
+        torch.set_num_threads(1)
+        random.seed(seed)
+        torch.manual_seed(seed)
+
+        global _worker_info
+        _worker_info = WorkerInfo(id=worker_id, num_workers=num_workers,
+                                  seed=seed, dataset=None)
+
+        from torch.utils.data import _DatasetKind
+
+        init_exception = None
+        try:
+            if init_fn is not None:
+                init_fn(worker_id)
+        except Exception:
+            init_exception = ExceptionWrapper(
+                where="in DataLoader worker process {}".format(worker_id))
+
+        fetchers: Dict[int, Any] = {}
+        worker_infos: Dict[int, WorkerInfo] = {}
+
+        watchdog = ManagerWatchdog()
+
+        while watchdog.is_alive():
+            try:
+                r = index_queue.get(timeout=MP_STATUS_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            if isinstance(r, _RegisterDataset):
+                fetchers[r.dataset_id] = _DatasetKind.create_fetcher(
+                    r.dataset_kind, r.dataset, r.auto_collation, r.collate_fn, r.drop_last)
+                worker_infos[r.dataset_id] = WorkerInfo(id=worker_id, num_workers=num_workers,
+                                                        seed=seed, dataset=r.dataset)
+                continue
+            elif isinstance(r, _UnregisterDataset):
+                fetchers.pop(r.dataset_id, None)
+                worker_infos.pop(r.dataset_id, None)
+                continue
+            elif r is None:
+                # Received the final signal
+                assert done_event.is_set()
+                break
+            elif done_event.is_set():
+                continue
+            iter_id, dataset_id, idx, index = r
+            data: Union[ExceptionWrapper, Any]
+            if init_exception is not None:
+                data = init_exception
+                init_exception = None
+            else:
+                try:
+                    _worker_info = worker_infos[dataset_id]
+                    data = fetchers[dataset_id].fetch(index)
+                except Exception:
+                    data = ExceptionWrapper(
+                        where="in DataLoader worker process {}".format(worker_id))
+            data_queue.put((iter_id, idx, data))
+            del data, idx, index, r  # save memory
+    except KeyboardInterrupt:
+        pass
+    if done_event.is_set():
+        data_queue.cancel_join_thread()
+        data_queue.close()
@@ -6,7 +6,9 @@ in `./_utils/worker.py`.
 """
 
 import threading
+import weakref
 import itertools
+import time
 import warnings
 from typing import Any, Callable, TypeVar, Generic, Sequence, List, Optional
 
@@ -66,6 +68,219 @@ class _InfiniteConstantSampler(Sampler):
             yield None
 
 
+class WorkerPool(object):
+    r"""
+    A pool of data loading worker processes that can be shared by several
+    :class:`~torch.utils.data.DataLoader` s, passed as their ``worker_pool``
+    argument.
+
+    Each :class:`~torch.utils.data.DataLoader` otherwise starts (and, unless
+    ``persistent_workers=True``, stops) its own workers. With a pool, the
+    workers are started once and keep serving the datasets of all the data
+    loaders using it, e.g., the training and validation loaders, or one loader
+    per task. A dataset is sent to the workers the first time its data loader
+    is iterated, and removed from them once the data loader is garbage
+    collected.
+
+    The workers are seeded once, when the pool starts, and
+    :func:`~torch.utils.data.get_worker_info` returns the dataset of the batch
+    being loaded. Only map-style datasets are supported.
+
+    Arguments:
+        num_workers (int): how many subprocesses to start.
+        worker_init_fn (callable, optional): If not ``None``, this will be called on each
+            worker subprocess with the worker id (an int in ``[0, num_workers - 1]``) as
+            input, after seeding and before data loading. (default: ``None``)
+        multiprocessing_context (str or multiprocessing.context.BaseContext, optional):
+            context used to start the workers. (default: ``None``)
+        generator (torch.Generator, optional): If not ``None``, this RNG will be used
+            to generate the ``base_seed`` of the workers. (default: ``None``)
+
+    Example::
+
+        >>> with WorkerPool(4) as pool:
+        >>>     train_loader = DataLoader(train_set, batch_size=32, worker_pool=pool)
+        >>>     val_loader = DataLoader(val_set, batch_size=64, worker_pool=pool)
+        >>>     for epoch in range(10):
+        >>>         train(train_loader)
+        >>>         validate(val_loader)
+    """
+    num_workers: int
+
+    def __init__(self, num_workers: int, worker_init_fn: _worker_init_fn_t = None,
+                 multiprocessing_context=None, generator=None):
+        if num_workers <= 0:
+            raise ValueError('num_workers option should be positive, but got '
+                             'num_workers={}'.format(num_workers))
+
+        if multiprocessing_context is None:
+            multiprocessing_context = multiprocessing
+        elif isinstance(multiprocessing_context, string_classes):
+            multiprocessing_context = multiprocessing.get_context(multiprocessing_context)
+
+        self.num_workers = num_workers
+        self._shutdown = False
+        self._worker_pids_set = False
+        self._worker_queue_idx_cycle = itertools.cycle(range(num_workers))
+        self._next_dataset_id = 0
+        self._next_iter_id = 0
+        # map: iter_id => number of tasks sent and not yet received
+        self._outstanding = {}
+        # map: iter_id => list of (idx, data) received while waiting for
+        # another iterator
+        self._received = {}
+        # iter_ids of the iterators deleted with tasks still outstanding
+        self._discarded = set()
+
+        base_seed = torch.empty((), dtype=torch.int64).random_(generator=generator).item()
+        # No certainty which module multiprocessing_context is
+        self._worker_result_queue = multiprocessing_context.Queue()  # type: ignore
+        self._workers_done_event = multiprocessing_context.Event()
+        self._index_queues = []
+        self._workers = []
+        for i in range(num_workers):
+            index_queue = multiprocessing_context.Queue()  # type: ignore
+            w = multiprocessing_context.Process(  # type: ignore
+                target=_utils.worker._pool_worker_loop,
+                args=(index_queue, self._worker_result_queue, self._workers_done_event,
+                      base_seed + i, worker_init_fn, i, num_workers))
+            w.daemon = True
+            # See `_MultiProcessingDataLoaderIter.__init__` on why workers are
+            # only added after they started
+            w.start()
+            self._index_queues.append(index_queue)
+            self._workers.append(w)
+
+        # .pid can be None only before process is spawned (not the case, so ignore)
+        _utils.signal_handling._set_worker_pids(id(self), tuple(w.pid for w in self._workers))  # type: ignore
+        _utils.signal_handling._set_SIGCHLD_handler()
+        self._worker_pids_set = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def _check_alive(self):
+        if self._shutdown:
+            raise RuntimeError('WorkerPool has been shut down')
+
+    def _register(self, loader):
+        # Sends the dataset of `loader` to all workers, returns its dataset_id
+        self._check_alive()
+        dataset_id = self._next_dataset_id
+        self._next_dataset_id += 1
+        r = _utils.worker._RegisterDataset(dataset_id, loader._dataset_kind, loader.dataset,
+                                           loader._auto_collation, loader.collate_fn, loader.drop_last)
+        for q in self._index_queues:
+            q.put(r)
+        return dataset_id
+
+    def _unregister(self, dataset_id):
+        if self._shutdown:
+            return
+        r = _utils.worker._UnregisterDataset(dataset_id)
+        for q in self._index_queues:
+            q.put(r)
+
+    def _new_iter(self):
+        self._check_alive()
+        iter_id = self._next_iter_id
+        self._next_iter_id += 1
+        self._outstanding[iter_id] = 0
+        self._received[iter_id] = []
+        return iter_id
+
+    def _discard_iter(self, iter_id):
+        # Results of the tasks still outstanding for `iter_id` are dropped
+        # when they arrive
+        self._received.pop(iter_id, None)
+        if self._outstanding.get(iter_id, 0) > 0:
+            self._discarded.add(iter_id)
+        else:
+            self._outstanding.pop(iter_id, None)
+
+    def _put(self, iter_id, dataset_id, idx, index):
+        self._check_alive()
+        worker_queue_idx = next(self._worker_queue_idx_cycle)
+        self._index_queues[worker_queue_idx].put((iter_id, dataset_id, idx, index))
+        self._outstanding[iter_id] += 1
+
+    def _try_get_data(self, timeout=_utils.MP_STATUS_CHECK_INTERVAL):
+        # See `_MultiProcessingDataLoaderIter._try_get_data`
+        try:
+            return (True, self._worker_result_queue.get(timeout=timeout))
+        except queue.Empty as e:
+            failed_workers = [w for w in self._workers if not w.is_alive()]
+            if len(failed_workers) > 0:
+                self.shutdown()
+                pids_str = ', '.join(str(w.pid) for w in failed_workers)
+                raise RuntimeError('DataLoader worker (pid(s) {}) exited unexpectedly'.format(pids_str)) from e
+            return (False, None)
+
+    def _get(self, iter_id, timeout=0):
+        # Returns the next (idx, data) received for `iter_id`, stashing the
+        # results of other iterators
+        self._check_alive()
+        received = self._received[iter_id]
+        if len(received) > 0:
+            return received.pop(0)
+        assert self._outstanding[iter_id] > 0
+        while True:
+            if timeout > 0:
+                success, result = self._try_get_data(timeout)
+                if not success:
+                    raise RuntimeError('DataLoader timed out after {} seconds'.format(timeout))
+            else:
+                success, result = self._try_get_data()
+                if not success:
+                    continue
+            result_iter_id, idx, data = result
+            self._outstanding[result_iter_id] -= 1
+            if result_iter_id == iter_id:
+                return idx, data
+            elif result_iter_id in self._discarded:
+                if self._outstanding[result_iter_id] == 0:
+                    self._discarded.remove(result_iter_id)
+                    del self._outstanding[result_iter_id]
+            else:
+                self._received[result_iter_id].append((idx, data))
+
+    def shutdown(self):
+        r"""Stops the worker processes. The data loaders using this pool can't
+        be iterated anymore."""
+        # See NOTE [ Data Loader Multiprocessing Shutdown Logic ]
+        python_exit_status = _utils.python_exit_status
+        if python_exit_status is True or python_exit_status is None:
+            return
+        if self._shutdown:
+            return
+        self._shutdown = True
+        try:
+            self._workers_done_event.set()
+            for q in self._index_queues:
+                q.put(None)
+            for w in self._workers:
+                w.join(timeout=_utils.MP_STATUS_CHECK_INTERVAL)
+                if w.is_alive():
+                    w.terminate()
+            for q in self._index_queues:
+                q.cancel_join_thread()
+                q.close()
+            self._worker_result_queue.cancel_join_thread()
+            self._worker_result_queue.close()
+        finally:
+            if self._worker_pids_set:
+                _utils.signal_handling._remove_worker_pids(id(self))
+                self._worker_pids_set = False
+
+    def __del__(self):
+        # `__init__` may have failed before setting `_shutdown`
+        if hasattr(self, '_shutdown'):
+            self.shutdown()
+
+
 class DataLoader(Generic[T_co]):
     r"""
     Data loader. Combines a dataset and a sampler, and provides an iterable over
@@ -112,9 +327,35 @@ class DataLoader(Generic[T_co]):
         prefetch_factor (int, optional, keyword-only arg): Number of sample loaded
             in advance by each worker. ``2`` means there will be a total of
             2 * num_workers samples prefetched across all workers. (default: ``2``)
+        max_prefetch_factor (int, optional, keyword-only arg): If set, the number of
+            samples loaded in advance by each worker starts at :attr:`prefetch_factor`
+            and adapts between ``1`` and this value: it grows while the main process
+            has to wait for data and shrinks while it doesn't. The iterator's
+            ``prefetch_stats()`` reports the current value and timing statistics.
+            (default: ``None``)
+        prefetch_memory_budget (int, optional, keyword-only arg): Upper bound, in
+            bytes, on the estimated size of all batches loaded in advance when
+            :attr:`max_prefetch_factor` is set. (default: ``None``)
         persistent_workers (bool, optional): If ``True``, the data loader will not shutdown
             the worker processes after a dataset has been consumed once. This allows to
             maintain the workers `Dataset` instances alive. (default: ``False``)
+        ring_buffer_slots (int, optional, keyword-only arg): If positive, each worker
+            sends its batches through a ring of this many reusable shared memory
+            slots instead of allocating new shared memory for every batch. Without
+            :attr:`pin_memory`, the returned batches are views into the ring and are
+            only valid until the next batch is requested. See
+            `torch/utils/data/_utils/ring_buffer.py` for details. (default: ``0``)
+        pin_memory_buffers (int, optional, keyword-only arg): If positive and
+            :attr:`pin_memory` is ``True``, batches are copied into a pool of at most
+            this many reusable pinned buffers (one per tensor of each batch in
+            flight) instead of allocating new pinned memory for every batch. The
+            returned batch is then only valid until the next batch is requested.
+            (default: ``0``)
+        worker_pool (WorkerPool, optional, keyword-only arg): If not ``None``, the
+            batches are loaded by the workers of this
+            :class:`~torch.utils.data.WorkerPool`, which can be shared with other
+            data loaders, instead of workers started by this data loader. Needs
+            ``num_workers=0`` and a map-style :attr:`dataset`. (default: ``None``)
 
 
     .. warning:: If the ``spawn`` start method is used, :attr:`worker_init_fn`
@@ -151,6 +392,11 @@ class DataLoader(Generic[T_co]):
     timeout: float
     sampler: Sampler
     prefetch_factor: int
+    max_prefetch_factor: Optional[int]
+    prefetch_memory_budget: Optional[int]
+    ring_buffer_slots: int
+    pin_memory_buffers: int
+    worker_pool: Optional[WorkerPool]
     _iterator : Optional['_BaseDataLoaderIter']
     __initialized = False
 
@@ -162,7 +408,12 @@ class DataLoader(Generic[T_co]):
                  timeout: float = 0, worker_init_fn: _worker_init_fn_t = None,
                  multiprocessing_context=None, generator=None,
                  *, prefetch_factor: int = 2,
-                 persistent_workers: bool = False):
+                 max_prefetch_factor: Optional[int] = None,
+                 prefetch_memory_budget: Optional[int] = None,
+                 persistent_workers: bool = False,
+                 ring_buffer_slots: int = 0,
+                 pin_memory_buffers: int = 0,
+                 worker_pool: Optional[WorkerPool] = None):
         torch._C._log_api_usage_once("python.data_loader")  # type: ignore
 
         if num_workers < 0:
@@ -172,17 +423,52 @@ class DataLoader(Generic[T_co]):
         if timeout < 0:
             raise ValueError('timeout option should be non-negative')
 
-        if num_workers == 0 and prefetch_factor != 2:
+        if num_workers == 0 and worker_pool is None and prefetch_factor != 2:
             raise ValueError('prefetch_factor option could only be specified in multiprocessing.'
                              'let num_workers > 0 to enable multiprocessing.')
         assert prefetch_factor > 0
 
+        if max_prefetch_factor is not None:
+            if num_workers == 0:
+                raise ValueError('max_prefetch_factor option needs num_workers > 0')
+            if max_prefetch_factor < prefetch_factor:
+                raise ValueError('max_prefetch_factor option should be at least prefetch_factor, '
+                                 'but got max_prefetch_factor={} and prefetch_factor={}'.format(
+                                     max_prefetch_factor, prefetch_factor))
+        elif prefetch_memory_budget is not None:
+            raise ValueError('prefetch_memory_budget option needs max_prefetch_factor to be set')
+
         if persistent_workers and num_workers == 0:
             raise ValueError('persistent_workers option needs num_workers > 0')
 
+        if ring_buffer_slots < 0:
+            raise ValueError('ring_buffer_slots option should be non-negative')
+
+        if ring_buffer_slots > 0 and num_workers == 0:
+            raise ValueError('ring_buffer_slots option needs num_workers > 0')
+
+        if pin_memory_buffers < 0:
+            raise ValueError('pin_memory_buffers option should be non-negative')
+
+        if pin_memory_buffers > 0 and (not pin_memory or num_workers == 0):
+            raise ValueError('pin_memory_buffers option needs pin_memory=True and num_workers > 0')
+
+        if worker_pool is not None:
+            if num_workers > 0:
+                raise ValueError('worker_pool option is mutually exclusive with num_workers; '
+                                 'the pool provides the workers')
+            if worker_init_fn is not None or multiprocessing_context is not None:
+                raise ValueError('worker_pool option is mutually exclusive with worker_init_fn '
+                                 'and multiprocessing_context; pass them to the WorkerPool instead')
+
         self.dataset = dataset
         self.num_workers = num_workers
+        self.worker_pool = worker_pool
         self.prefetch_factor = prefetch_factor
+        self.max_prefetch_factor = max_prefetch_factor
+        self.prefetch_memory_budget = prefetch_memory_budget
+        self.ring_buffer_slots = ring_buffer_slots
+        self.pin_memory_buffers = pin_memory_buffers
         self.pin_memory = pin_memory
         self.timeout = timeout
         self.worker_init_fn = worker_init_fn
@@ -233,6 +519,8 @@ class DataLoader(Generic[T_co]):
                 raise ValueError(
                     "DataLoader with IterableDataset: expected unspecified "
                     "batch_sampler option, but got batch_sampler={}".format(batch_sampler))
+            if worker_pool is not None:
+                raise ValueError('worker_pool option is not supported with IterableDataset')
         else:
             self._dataset_kind = _DatasetKind.Map
 
@@ -289,9 +577,13 @@ class DataLoader(Generic[T_co]):
         self._IterableDataset_len_called = None  # See NOTE [ IterableDataset and __len__ ]
 
         self._iterator = None
+        # dataset_id of `dataset` in `worker_pool`, see `WorkerPool._register`
+        self._worker_pool_dataset_id = None
 
     def _get_iterator(self) -> '_BaseDataLoaderIter':
-        if self.num_workers == 0:
+        if self.worker_pool is not None:
+            return _WorkerPoolDataLoaderIter(self)
+        elif self.num_workers == 0:
             return _SingleProcessDataLoaderIter(self)
         else:
             return _MultiProcessingDataLoaderIter(self)
@@ -331,7 +623,8 @@ class DataLoader(Generic[T_co]):
 
     def __setattr__(self, attr, val):
         if self.__initialized and attr in (
-                'batch_size', 'batch_sampler', 'sampler', 'drop_last', 'dataset', 'persistent_workers'):
+                'batch_size', 'batch_sampler', 'sampler', 'drop_last', 'dataset', 'persistent_workers',
+                'worker_pool'):
             raise ValueError('{} attribute should not be set after {} is '
                              'initialized'.format(attr, self.__class__.__name__))
 
@@ -354,6 +647,21 @@ class DataLoader(Generic[T_co]):
         else:
             return self._get_iterator()
 
+    def load_state_dict(self, state_dict):
+        r"""Makes the next iterator over this data loader resume from
+        :attr:`state_dict`, as returned by the ``state_dict()`` method of an
+        iterator over this data loader (or one configured the same way).
+
+        Arguments:
+            state_dict (dict): iterator state.
+        """
+        if self._dataset_kind == _DatasetKind.Iterable:
+            raise ValueError('DataLoader iterator state is not supported with IterableDataset')
+        if not hasattr(self._index_sampler, 'load_state_dict'):
+            raise TypeError('DataLoader iterator state needs a sampler that implements '
+                            'state_dict() and load_state_dict()')
+        self._index_sampler.load_state_dict(state_dict['sampler'])
+
     @property
     def _auto_collation(self):
         return self.batch_sampler is not None
@@ -410,20 +718,34 @@ class _BaseDataLoaderIter(object):
         self._index_sampler = loader._index_sampler
         self._num_workers = loader.num_workers
         self._prefetch_factor = loader.prefetch_factor
+        self._ring_buffer_slots = loader.ring_buffer_slots
+        self._pin_memory_buffers = loader.pin_memory_buffers
         self._pin_memory = loader.pin_memory and torch.cuda.is_available()
         self._timeout = loader.timeout
         self._collate_fn = loader.collate_fn
-        self._sampler_iter = iter(self._index_sampler)
+        # The seed is drawn first, so that samplers drawing from the default
+        # generator on `iter` sample what they would lazily, after it
         self._base_seed = torch.empty((), dtype=torch.int64).random_(generator=loader.generator).item()
+        self._start_sampler_iter()
         self._persistent_workers = loader.persistent_workers
-        self._num_yielded = 0
 
     def __iter__(self) -> '_BaseDataLoaderIter':
         return self
 
-    def _reset(self, loader, first_iter=False):
+    def _start_sampler_iter(self):
         self._sampler_iter = iter(self._index_sampler)
-        self._num_yielded = 0
+        # The position of the sampler at the start of this iteration, see NOTE
+        # [ Sampler State ]. It is taken now as indices are prefetched.
+        state_dict = getattr(self._index_sampler, 'state_dict', None)
+        self._sampler_state = None if state_dict is None else state_dict()
+        # If the sampler resumes an iteration (see `DataLoader.load_state_dict`),
+        # the batches returned before count as yielded
+        self._num_yielded = 0 if self._sampler_state is None else self._sampler_state.get('num_yielded', 0)
+
+    def _reset(self, loader, first_iter=False):
+        if not first_iter:
+            # `__init__` already started iterating over the sampler
+            self._start_sampler_iter()
         self._IterableDataset_len_called = loader._IterableDataset_len_called
 
     def _next_index(self):
@@ -455,6 +777,21 @@ class _BaseDataLoaderIter(object):
     def __len__(self) -> int:
         return len(self._index_sampler)
 
+    def state_dict(self):
+        r"""Returns the position of this iterator as a :class:`dict`. Passing it
+        to :meth:`DataLoader.load_state_dict` makes the next iterator over the
+        data loader resume right after the last batch returned by this one.
+        Batches loaded in advance by workers are not part of the state, so they
+        are loaded again after resuming."""
+        if self._dataset_kind == _DatasetKind.Iterable:
+            raise ValueError('DataLoader iterator state is not supported with IterableDataset')
+        if self._sampler_state is None or self._sampler_state.get('sampler', {}) is None:
+            raise TypeError('DataLoader iterator state needs a sampler that implements '
+                            'state_dict() and load_state_dict()')
+        sampler_state = dict(self._sampler_state)
+        sampler_state['num_yielded'] = self._num_yielded
+        return {'sampler': sampler_state}
+
     def __getstate__(self):
         # TODO: add limited pickling support for sharing an iterator
         # across multiple threads for HOGWILD.
@@ -768,6 +1105,15 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
         assert self._num_workers > 0
         assert self._prefetch_factor > 0
 
+        # See NOTE [ Adaptive Prefetching ]
+        self._prefetch_controller = None
+        if loader.max_prefetch_factor is not None:
+            self._prefetch_controller = _utils.prefetch._AdaptivePrefetchController(
+                self._prefetch_factor, loader.max_prefetch_factor, self._num_workers,
+                loader.prefetch_memory_budget)
+        self._wait_time = 0.0
+        self._last_yield_time = time.perf_counter()
+
         if loader.multiprocessing_context is None:
             multiprocessing_context = multiprocessing
         else:
@@ -783,6 +1129,14 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
 
         self._index_queues = []
         self._workers = []
+        # See NOTE [ DataLoader Shared Memory Ring Buffer ]
+        self._free_slot_queues = []
+        self._ring_reader = None
+        if self._ring_buffer_slots > 0:
+            # No certainty which module multiprocessing_context is
+            self._free_slot_queues = [multiprocessing_context.Queue()  # type: ignore
+                                      for _ in range(self._num_workers)]
+            self._ring_reader = _utils.ring_buffer._RingReader(self._free_slot_queues)
         for i in range(self._num_workers):
             # No certainty which module multiprocessing_context is
             index_queue = multiprocessing_context.Queue()  # type: ignore
@@ -793,7 +1147,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                       self._worker_result_queue, self._workers_done_event,
                       self._auto_collation, self._collate_fn, self._drop_last,
                       self._base_seed + i, self._worker_init_fn, i, self._num_workers,
-                      self._persistent_workers))
+                      self._persistent_workers, self._ring_buffer_slots,
+                      self._free_slot_queues[i] if self._free_slot_queues else None))
             w.daemon = True
             # NB: Process.start() actually take some time as it needs to
             #     start a process and pass the arguments over via a pipe.
@@ -805,8 +1160,14 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
             self._index_queues.append(index_queue)
             self._workers.append(w)
 
+        # Lease of the pinned buffers of the batch returned last, see
+        # `_utils.pin_memory._PinnedBufferPool`
+        self._pinned_buffer_pool = None
+        self._held_pinned_lease = None
         if self._pin_memory:
             self._pin_memory_thread_done_event = threading.Event()
+            if self._pin_memory_buffers > 0:
+                self._pinned_buffer_pool = _utils.pin_memory._PinnedBufferPool(self._pin_memory_buffers)
 
             # Queue is not type-annotated
             self._data_queue = queue.Queue()  # type: ignore
@@ -814,7 +1175,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 target=_utils.pin_memory._pin_memory_loop,
                 args=(self._worker_result_queue, self._data_queue,
                       torch.cuda.current_device(),
-                      self._pin_memory_thread_done_event))
+                      self._pin_memory_thread_done_event, self._ring_reader,
+                      self._pinned_buffer_pool))
             pin_memory_thread.daemon = True
             pin_memory_thread.start()
             # Similar to workers (see comment above), we only register
@@ -831,12 +1193,19 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
 
     def _reset(self, loader, first_iter=False):
         super()._reset(loader, first_iter)
+        if not first_iter:
+            # Drop the batches of the previous epoch fetched out-of-order
+            for info in self._task_info.values():
+                if len(info) == 2:
+                    self._discard_data(info[1])
         self._send_idx = 0  # idx of the next task to be sent to workers
         self._rcvd_idx = 0  # idx of the next task to be returned in __next__
         # information about data not yet yielded, i.e., tasks w/ indices in range [rcvd_idx, send_idx).
         # map: task idx => - (worker_id,)        if data isn't fetched (outstanding)
         #                  \ (worker_id, data)   if data is already fetched (out-of-order)
         self._task_info = {}
+        # map: task idx => time it was sent to a worker, with `max_prefetch_factor`
+        self._task_send_times = {}
         self._tasks_outstanding = 0  # always equal to count(v for v in task_info.values() if len(v) == 1)
         # A list of booleans representing whether each worker still has work to
         # do, i.e., not having exhausted its iterable dataset object. It always
@@ -846,15 +1215,22 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
         # It does not mean that a worker is dead. In case of `_persistent_workers`, 
         # the worker will be reset to available in the next epoch.
         self._workers_status = [True for i in range(self._num_workers)]
+        if self._ring_reader is not None:
+            self._ring_reader.release_held()
+        self._release_pinned_lease()
         # We resume the prefetching in case it was enabled
         if not first_iter:
             for idx in range(self._num_workers):
                 self._index_queues[idx].put(_utils.worker._ResumeIteration())
             resume_iteration_cnt = self._num_workers
             while resume_iteration_cnt > 0:
-                data = self._get_data()
-                if isinstance(data, _utils.worker._ResumeIteration):
+                return_idx, return_data = self._get_data()
+                if isinstance(return_idx, _utils.worker._ResumeIteration):
+                    assert return_data is None
                     resume_iteration_cnt -= 1
+                else:
+                    # A batch of the previous epoch still in flight
+                    self._discard_data(return_data)
         # prime the prefetch loop
         for _ in range(self._prefetch_factor * self._num_workers):
             self._try_put_index()
@@ -1068,7 +1444,14 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                 return self._process_data(data)
 
             assert not self._shutdown and self._tasks_outstanding > 0
-            idx, data = self._get_data()
+            if self._prefetch_controller is not None:
+                start = time.perf_counter()
+                idx, data = self._get_data()
+                now = time.perf_counter()
+                self._wait_time += now - start
+                self._prefetch_controller.record_latency(now - self._task_send_times.pop(idx, start))
+            else:
+                idx, data = self._get_data()
             self._tasks_outstanding -= 1
             if self._dataset_kind == _DatasetKind.Iterable:
                 # Check for _IterableDatasetStopIteration
@@ -1077,7 +1460,10 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                         self._workers_status[data.worker_id] = False
                     else:
                         self._mark_worker_as_unavailable(data.worker_id)
-                    self._try_put_index()
+                    # The adaptive prefetch factor may have shrunk below the
+                    # number of outstanding tasks
+                    if self._tasks_outstanding < self._prefetch_factor * self._num_workers:
+                        self._try_put_index()
                     continue
 
             if idx != self._rcvd_idx:
@@ -1103,17 +1489,88 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
             return
 
         self._index_queues[worker_queue_idx].put((self._send_idx, index))
+        if self._prefetch_controller is not None:
+            self._task_send_times[self._send_idx] = time.perf_counter()
         self._task_info[self._send_idx] = (worker_queue_idx,)
         self._tasks_outstanding += 1
         self._send_idx += 1
 
     def _process_data(self, data):
         self._rcvd_idx += 1
-        self._try_put_index()
+        if self._prefetch_controller is not None:
+            self._update_prefetch_factor(data)
+        else:
+            self._try_put_index()
         if isinstance(data, ExceptionWrapper):
             data.reraise()
+        if isinstance(data, _utils.ring_buffer._RingBatch):
+            # Returns views into the slot, which is released on the next batch
+            data = self._ring_reader.unpack(data, hold=True)
+        # The pinned buffers are likewise given back on the next batch
+        self._release_pinned_lease()
+        if isinstance(data, _utils.pin_memory._PinnedBatch):
+            self._held_pinned_lease = data.lease
+            data = data.data
         return data
 
+    def _update_prefetch_factor(self, data):
+        now = time.perf_counter()
+        busy_time = max(now - self._last_yield_time - self._wait_time, 0.0)
+        if isinstance(data, _utils.pin_memory._PinnedBatch):
+            data = data.data
+        elif isinstance(data, _utils.ring_buffer._RingBatch):
+            # The batch takes up its whole slot until it's released
+            data = self._ring_reader.slot_buffers(data)
+        self._prefetch_factor = self._prefetch_controller.record(
+            self._wait_time, busy_time, _utils.prefetch._batch_nbytes(data))
+        self._wait_time = 0.0
+        self._last_yield_time = now
+        # Top up (or, by not refilling, drain) the batches in flight, i.e.
+        # sent to the workers but not yet returned
+        while self._send_idx - self._rcvd_idx < self._prefetch_factor * self._num_workers:
+            send_idx = self._send_idx
+            self._try_put_index()
+            if self._send_idx == send_idx:
+                break
+
+    def prefetch_stats(self):
+        r"""Returns a dict with the current prefetch factor and timing statistics
+        if ``max_prefetch_factor`` is set, and ``None`` otherwise."""
+        if self._prefetch_controller is None:
+            return None
+        return self._prefetch_controller.stats()
+
+    def _discard_data(self, data):
+        # Releases the resources of a fetched batch that won't be returned
+        if isinstance(data, _utils.ring_buffer._RingBatch):
+            self._ring_reader.discard(data)
+        elif isinstance(data, _utils.pin_memory._PinnedBatch):
+            # Never copied from, so the buffers can be reused right away
+            self._pinned_buffer_pool.release(data.lease)
+
+    def _discard_pinned_batches(self):
+        # Gives the buffers of the batches that won't be returned back to the
+        # pool, once `pin_memory_thread` has exited
+        self._release_pinned_lease()
+        task_info = getattr(self, '_task_info', {})
+        for idx in [idx for idx, info in task_info.items() if len(info) == 2]:
+            self._discard_data(task_info.pop(idx)[1])
+        while True:
+            try:
+                _, data = self._data_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._discard_data(data)
+
+    def _release_pinned_lease(self):
+        if self._held_pinned_lease is not None:
+            # Copies from the buffers may still be in flight on the current
+            # stream, the pool waits for them before reusing the buffers.
+            event = torch.cuda.Event()
+            event.record()
+            self._pinned_buffer_pool.release(self._held_pinned_lease, event)
+            self._held_pinned_lease = None
+
     def _mark_worker_as_unavailable(self, worker_id, shutdown=False):
         # Mark a worker as having finished its work e.g., due to
         # exhausting an `IterableDataset`. This should be used only when this
@@ -1165,6 +1622,8 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                     self._pin_memory_thread.join()
                     self._worker_result_queue.cancel_join_thread()
                     self._worker_result_queue.close()
+                    if self._pinned_buffer_pool is not None:
+                        self._discard_pinned_batches()
 
                 # Exit workers now.
                 self._workers_done_event.set()
@@ -1184,7 +1643,7 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
                         # here, which we shouldn't, (e.g., pytorch/pytorch#39570),
                         # we kill the worker.
                         w.terminate()
-                for q in self._index_queues:
+                for q in self._index_queues + self._free_slot_queues:
                     q.cancel_join_thread()
                     q.close()
             finally:
@@ -1204,3 +1663,66 @@ class _MultiProcessingDataLoaderIter(_BaseDataLoaderIter):
 
     def __del__(self):
         self._shutdown_workers()
+
+
+class _WorkerPoolDataLoaderIter(_BaseDataLoaderIter):
+    r"""Iterates once over the DataLoader's dataset with the workers of the
+    DataLoader's `WorkerPool`"""
+
+    def __init__(self, loader):
+        super(_WorkerPoolDataLoaderIter, self).__init__(loader)
+        assert self._dataset_kind == _DatasetKind.Map
+
+        self._pool = loader.worker_pool
+        # Keeps the loader, and so its dataset registered with the workers,
+        # alive as long as this iterator, e.g. for `iter(DataLoader(...))`
+        self._loader = loader
+        if loader._worker_pool_dataset_id is None:
+            loader._worker_pool_dataset_id = self._pool._register(loader)
+            finalizer = weakref.finalize(loader, self._pool._unregister, loader._worker_pool_dataset_id)
+            # The workers are shut down at exit anyway
+            finalizer.atexit = False
+        self._dataset_id = loader._worker_pool_dataset_id
+        self._iter_id = self._pool._new_iter()
+
+        self._send_idx = 0  # idx of the next task to be sent to workers
+        self._rcvd_idx = 0  # idx of the next task to be returned in __next__
+        # map: task idx => data fetched out-of-order
+        self._task_info = {}
+        # prime the prefetch loop
+        for _ in range(self._prefetch_factor * self._pool.num_workers):
+            self._try_put_index()
+
+    def _try_put_index(self):
+        try:
+            index = self._next_index()
+        except StopIteration:
+            return
+        self._pool._put(self._iter_id, self._dataset_id, self._send_idx, index)
+        self._send_idx += 1
+
+    def _next_data(self):
+        while True:
+            if self._rcvd_idx == self._send_idx:
+                raise StopIteration
+            if self._rcvd_idx in self._task_info:
+                return self._process_data(self._task_info.pop(self._rcvd_idx))
+            idx, data = self._pool._get(self._iter_id, self._timeout)
+            if idx != self._rcvd_idx:
+                # store out-of-order samples
+                self._task_info[idx] = data
+            else:
+                return self._process_data(data)
+
+    def _process_data(self, data):
+        self._rcvd_idx += 1
+        self._try_put_index()
+        if isinstance(data, ExceptionWrapper):
+            data.reraise()
+        if self._pin_memory:
+            data = _utils.pin_memory.pin_memory(data)
+        return data
+
+    def __del__(self):
+        if hasattr(self, '_iter_id'):
+            self._pool._discard_iter(self._iter_id)
@@ -21,7 +21,12 @@ class Dataset(Generic[T_co]):
     data sample for a given key. Subclasses could also optionally overwrite
     :meth:`__len__`, which is expected to return the size of the dataset by many
     :class:`~torch.utils.data.Sampler` implementations and the default options
-    of :class:`~torch.utils.data.DataLoader`.
+    of :class:`~torch.utils.data.DataLoader`. Subclasses could also
+    optionally implement :meth:`__getitems__`, which takes a list of keys and
+    returns the list of the corresponding samples, to fetch a whole batch at
+    once (e.g., with a single vectorized read). When automatic batching is
+    enabled, :class:`~torch.utils.data.DataLoader` calls it instead of calling
+    :meth:`__getitem__` for every key of a batch.
 
     .. note::
       :class:`~torch.utils.data.DataLoader` by default constructs a index
@@ -329,6 +334,13 @@ class Subset(Dataset[T_co]):
     def __getitem__(self, idx):
         return self.dataset[self.indices[idx]]
 
+    def __getitems__(self, indices: List[int]) -> List[T_co]:
+        # Forward batched fetching to the wrapped dataset if it supports it,
+        # see torch.utils.data._utils.fetch._MapDatasetFetcher
+        if callable(getattr(self.dataset, '__getitems__', None)):
+            return self.dataset.__getitems__([self.indices[idx] for idx in indices])  # type: ignore
+        return [self.dataset[self.indices[idx]] for idx in indices]
+
     def __len__(self):
         return len(self.indices)
 
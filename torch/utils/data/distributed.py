@@ -1,5 +1,5 @@
 import math
-from typing import TypeVar, Optional, Iterator
+from typing import Any, Dict, TypeVar, Optional, Iterator
 
 import torch
 from . import Sampler, Dataset
@@ -88,8 +88,17 @@ class DistributedSampler(Sampler[T_co]):
         self.total_size = self.num_samples * self.num_replicas
         self.shuffle = shuffle
         self.seed = seed
+        # epoch of the most recent iteration
+        self._iter_epoch: Optional[int] = None
+        self._num_yielded = 0
+        self._resume_state = None
 
     def __iter__(self) -> Iterator[T_co]:
+        # See NOTE [ Sampler State ]
+        state = self._start_iter()
+        if state is not None:
+            self.epoch = state['epoch']
+        self._iter_epoch = self.epoch
         if self.shuffle:
             # deterministically shuffle based on epoch and seed
             g = torch.Generator()
@@ -114,7 +123,7 @@ class DistributedSampler(Sampler[T_co]):
         indices = indices[self.rank:self.total_size:self.num_replicas]
         assert len(indices) == self.num_samples
 
-        return iter(indices)
+        return self._count_yielded(indices[self._num_yielded:])
 
     def __len__(self) -> int:
         return self.num_samples
@@ -129,3 +138,25 @@ class DistributedSampler(Sampler[T_co]):
             epoch (int): Epoch number.
         """
         self.epoch = epoch
+
+    def state_dict(self) -> Dict[str, Any]:
+        r"""
+        Returns the state of the sampler as a :class:`dict`: the epoch and how
+        many indices its most recent iteration yielded.
+        """
+        if self._resume_state is not None:
+            return dict(self._resume_state)
+        if self._iter_epoch is None:
+            return {'epoch': self.epoch, 'num_yielded': 0}
+        return {'epoch': self._iter_epoch, 'num_yielded': self._num_yielded}
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        r"""
+        Loads the sampler state. The next iteration of this sampler resumes from
+        this state, using its epoch.
+
+        Arguments:
+            state_dict (dict): sampler state. Should be an object returned
+                from a call to :meth:`state_dict`.
+        """
+        self._resume_state = dict(state_dict)
@@ -1,8 +1,10 @@
+import itertools
+
 import torch
 from torch._six import int_classes as _int_classes
 from torch import Tensor
 
-from typing import Iterator, Optional, Sequence, List, TypeVar, Generic, Sized
+from typing import Any, Dict, Iterator, Optional, Sequence, List, TypeVar, Generic, Sized
 
 T_co = TypeVar('T_co', covariant=True)
 
@@ -16,6 +18,13 @@ class Sampler(Generic[T_co]):
     .. note:: The :meth:`__len__` method isn't strictly required by
               :class:`~torch.utils.data.DataLoader`, but is expected in any
               calculation involving the length of a :class:`~torch.utils.data.DataLoader`.
+
+    .. note:: A Sampler can also provide ``state_dict()`` and ``load_state_dict()``
+              methods. ``state_dict()`` returns the position of its most recent
+              iteration, and after ``load_state_dict()``, the next iteration
+              resumes from that position. They are required to save and resume
+              :class:`~torch.utils.data.DataLoader` iterators, and are provided by
+              all the samplers in :mod:`torch.utils.data`.
     """
 
     def __init__(self, data_source: Optional[Sized]) -> None:
@@ -51,6 +60,73 @@ class Sampler(Generic[T_co]):
     #     a method that is not defined on an object.
     #     (@ssnl verifies that this works on at least Python 3.7.)
 
+    # NOTE [ Sampler State ]
+    #
+    # The built-in samplers count the indices they yield in `_num_yielded`, and
+    # keep whatever else they need to reproduce their most recent iteration
+    # (e.g., the state of the generator at its start). `load_state_dict` stores
+    # the state in `_resume_state`, which the next `__iter__` consumes: it
+    # reproduces the iteration, and skips the first `num_yielded` indices.
+    #
+    # `__iter__` takes the state eagerly rather than in a generator function, so
+    # that `state_dict()` right after `iter(sampler)` describes that iteration.
+    # This is what `_BaseDataLoaderIter` relies on, since it prefetches indices
+    # ahead of the batches it returns.
+    #
+    # The state is declared at class level, so that subclasses overriding
+    # `__init__` without calling it still iterate.
+    _num_yielded = 0
+    _resume_state: Optional[Dict[str, Any]] = None
+
+    def _count_yielded(self, indices):
+        for index in indices:
+            self._num_yielded += 1
+            yield index
+
+    def _start_iter(self):
+        # Returns the state loaded by `load_state_dict`, if any, and resets it
+        state, self._resume_state = self._resume_state, None
+        self._num_yielded = 0 if state is None else state['num_yielded']
+        return state
+
+
+def _start_generator_iter(sampler, seed_new_generator=False):
+    # Returns the generator to draw the next iteration of `sampler` from, see
+    # NOTE [ Sampler State ]. `sampler.generator` is rewound to the state it was
+    # in at the start of the resumed iteration. Without a `generator`, the
+    # iteration draws from the default generator (returns `None`), or from a new
+    # generator seeded from it if `seed_new_generator`. Either way, the state of
+    # the generator drawn from is recorded, and a resumed iteration replays it
+    # on a new generator, leaving the default one untouched.
+    state = sampler._start_iter()
+    generator = sampler.generator
+    if state is not None and state['generator_state'] is not None:
+        if generator is None:
+            generator = torch.Generator()
+        generator.set_state(state['generator_state'])
+    elif generator is None:
+        if not seed_new_generator:
+            sampler._generator_state = torch.default_generator.get_state()
+            return None
+        generator = torch.Generator()
+        generator.manual_seed(int(torch.empty((), dtype=torch.int64).random_().item()))
+    sampler._generator_state = generator.get_state()
+    return generator
+
+
+class _GeneratorSamplerStateMixin(object):
+    # `state_dict` and `load_state_dict` of the samplers that draw from a
+    # `torch.Generator`, see `_start_generator_iter`
+    _generator_state: Optional[torch.Tensor] = None
+
+    def state_dict(self) -> Dict[str, Any]:
+        if self._resume_state is not None:
+            return dict(self._resume_state)
+        return {'generator_state': self._generator_state, 'num_yielded': self._num_yielded}
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        self._resume_state = dict(state_dict)
+
 
 class SequentialSampler(Sampler[int]):
     r"""Samples elements sequentially, always in the same order.
@@ -64,13 +140,22 @@ class SequentialSampler(Sampler[int]):
         self.data_source = data_source
 
     def __iter__(self):
-        return iter(range(len(self.data_source)))
+        self._start_iter()
+        return self._count_yielded(range(self._num_yielded, len(self.data_source)))
 
     def __len__(self) -> int:
         return len(self.data_source)
 
+    def state_dict(self) -> Dict[str, Any]:
+        if self._resume_state is not None:
+            return dict(self._resume_state)
+        return {'num_yielded': self._num_yielded}
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        self._resume_state = dict(state_dict)
+
 
-class RandomSampler(Sampler[int]):
+class RandomSampler(_GeneratorSamplerStateMixin, Sampler[int]):
     r"""Samples elements randomly. If without replacement, then sample from a shuffled dataset.
     If with replacement, then user can specify :attr:`num_samples` to draw.
 
@@ -112,23 +197,23 @@ class RandomSampler(Sampler[int]):
 
     def __iter__(self):
         n = len(self.data_source)
-        if self.generator is None:
-            generator = torch.Generator()
-            generator.manual_seed(int(torch.empty((), dtype=torch.int64).random_().item()))
-        else:
-            generator = self.generator
+        generator = _start_generator_iter(self, seed_new_generator=self.replacement)
         if self.replacement:
-            for _ in range(self.num_samples // 32):
-                yield from torch.randint(high=n, size=(32,), dtype=torch.int64, generator=generator).tolist()
-            yield from torch.randint(high=n, size=(self.num_samples % 32,), dtype=torch.int64, generator=generator).tolist()
+            indices = self._sample_with_replacement(n, generator)
         else:
-            yield from torch.randperm(n, generator=self.generator).tolist()
+            indices = iter(torch.randperm(n, generator=generator).tolist())
+        return self._count_yielded(itertools.islice(indices, self._num_yielded, None))
+
+    def _sample_with_replacement(self, n, generator):
+        for _ in range(self.num_samples // 32):
+            yield from torch.randint(high=n, size=(32,), dtype=torch.int64, generator=generator).tolist()
+        yield from torch.randint(high=n, size=(self.num_samples % 32,), dtype=torch.int64, generator=generator).tolist()
 
     def __len__(self):
         return self.num_samples
 
 
-class SubsetRandomSampler(Sampler[int]):
+class SubsetRandomSampler(_GeneratorSamplerStateMixin, Sampler[int]):
     r"""Samples elements randomly from a given list of indices, without replacement.
 
     Arguments:
@@ -142,13 +227,15 @@ class SubsetRandomSampler(Sampler[int]):
         self.generator = generator
 
     def __iter__(self):
-        return (self.indices[i] for i in torch.randperm(len(self.indices), generator=self.generator))
+        generator = _start_generator_iter(self)
+        permutation = torch.randperm(len(self.indices), generator=generator)[self._num_yielded:]
+        return self._count_yielded(self.indices[i] for i in permutation)
 
     def __len__(self):
         return len(self.indices)
 
 
-class WeightedRandomSampler(Sampler[int]):
+class WeightedRandomSampler(_GeneratorSamplerStateMixin, Sampler[int]):
     r"""Samples elements from ``[0,..,len(weights)-1]`` with given probabilities (weights).
 
     Args:
@@ -184,8 +271,9 @@ class WeightedRandomSampler(Sampler[int]):
         self.generator = generator
 
     def __iter__(self):
-        rand_tensor = torch.multinomial(self.weights, self.num_samples, self.replacement, generator=self.generator)
-        return iter(rand_tensor.tolist())
+        generator = _start_generator_iter(self)
+        rand_tensor = torch.multinomial(self.weights, self.num_samples, self.replacement, generator=generator)
+        return self._count_yielded(rand_tensor[self._num_yielded:].tolist())
 
     def __len__(self):
         return self.num_samples
@@ -223,8 +311,18 @@ class BatchSampler(Sampler[List[int]]):
         self.drop_last = drop_last
 
     def __iter__(self):
+        state = self._start_iter()
+        if state is not None:
+            # The wrapped sampler resumes after the indices of the batches
+            # already yielded
+            sampler_state = dict(state['sampler'])
+            sampler_state['num_yielded'] = state['num_yielded'] * self.batch_size
+            self.sampler.load_state_dict(sampler_state)  # type: ignore
+        return self._count_yielded(self._batches(iter(self.sampler)))
+
+    def _batches(self, sampler_iter):
         batch = []
-        for idx in self.sampler:
+        for idx in sampler_iter:
             batch.append(idx)
             if len(batch) == self.batch_size:
                 yield batch
@@ -241,3 +339,21 @@ class BatchSampler(Sampler[List[int]]):
             return len(self.sampler) // self.batch_size  # type: ignore
         else:
             return (len(self.sampler) + self.batch_size - 1) // self.batch_size  # type: ignore
+
+    def state_dict(self) -> Dict[str, Any]:
+        if self._resume_state is not None:
+            return dict(self._resume_state)
+        # `sampler` can be any iterable, which can only be resumed if it
+        # provides `state_dict`. Its position follows from `num_yielded`.
+        state_dict = getattr(self.sampler, 'state_dict', None)
+        sampler_state = None
+        if state_dict is not None:
+            sampler_state = state_dict()
+            sampler_state.pop('num_yielded', None)
+        return {'sampler': sampler_state, 'num_yielded': self._num_yielded}
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        if state_dict['sampler'] is None or not hasattr(self.sampler, 'load_state_dict'):
+            raise TypeError("BatchSampler can only be resumed if its sampler implements "
+                            "state_dict() and load_state_dict()")
+        self._resume_state = dict(state_dict)